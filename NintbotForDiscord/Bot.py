@@ -1,16 +1,18 @@
 import datetime
 import discord
 import asyncio
-import shlex
 import logging
+from typing import Callable, FrozenSet, Optional
 
 from .Plugin import BasePlugin
+from .Permissions.Cache import permission_cache
 from .EventManager import EventManager
 from .PluginManager import PluginManager
 from .Enums import EventTypes
 from .CommandRegistry import CommandRegistry
+from .PrefixManager import PrefixManager
 from .Scheduler import Scheduler
-from .Utils import channel_is_private
+from .Utils import channel_is_private, get_channel_server
 from .Types import DiscordGuildChannel, DiscordTextChannel
 from . import __version__
 
@@ -18,17 +20,23 @@ __author__ = 'Riley Flynn (nint8835)'
 
 
 class Bot(discord.Client):
-    def __init__(self, config: dict, loop: asyncio.BaseEventLoop = None):
+    def __init__(self, config: dict, loop: asyncio.BaseEventLoop = None, config_loader: Callable[[], dict] = None):
         """
         Initializes a new NintbotForDiscord instance
         :param config: A dictionary object containing the bot's settings
         :param loop: The asyncio event loop to handle connection to Discord
+        :param config_loader: A function returning a fresh copy of the bot's settings, used to reload settings
         """
         super(Bot, self).__init__(loop=loop)
         self.VERSION = __version__
         self.config = config
+        self._config_loader = config_loader
         self.logger = logging.getLogger("NintbotForDiscord")
 
+        self._blacklisted_servers = frozenset()  # type: FrozenSet
+        self._allowed_servers = None  # type: Optional[FrozenSet]
+        self._load_server_filter()
+
         try:
             log_level = getattr(logging, self.config["log_level"])
         except AttributeError:
@@ -50,6 +58,10 @@ class Bot(discord.Client):
         self.CommandRegistry = CommandRegistry(self)
         self.logger.debug("Done")
 
+        self.logger.debug("Creating PrefixManager...")
+        self.PrefixManager = PrefixManager(self)
+        self.logger.debug("Done")
+
         self.logger.debug("Creating Scheduler...")
         self.Scheduler = Scheduler(self)
         self.logger.debug("Done")
@@ -64,6 +76,48 @@ class Bot(discord.Client):
         self.email = self.config["email"]
         self.run(config["token"], bot=self.config["bot"])
 
+        # Gives plugins a chance to write out anything they haven't saved yet
+        self.logger.debug("Disabling plugins...")
+        self.PluginManager.unload_plugins()
+        self.Scheduler.close()
+        self.logger.debug("Done.")
+
+    def _load_server_filter(self):
+        """
+        Loads the blacklisted and allowed servers from the config
+        """
+        self._blacklisted_servers = frozenset(self.config.get("blacklisted_servers", []))
+        allowed_servers = self.config.get("allowed_servers", None)
+        self._allowed_servers = frozenset(allowed_servers) if allowed_servers is not None else None
+
+    def reload_server_filter(self):
+        """
+        Reloads the blacklisted and allowed servers from the config, without restarting the bot
+        """
+        if self._config_loader is not None:
+            config = self._config_loader()
+            for key in ("blacklisted_servers", "allowed_servers"):
+                if key in config:
+                    self.config[key] = config[key]
+                else:
+                    self.config.pop(key, None)
+        self._load_server_filter()
+        self.logger.info("Server filter reloaded. {} blacklisted servers, allowlist mode {}.".format(
+            len(self._blacklisted_servers), "enabled" if self._allowed_servers is not None else "disabled"))
+
+    def server_allowed(self, server: Optional[discord.Guild]) -> bool:
+        """
+        Checks whether events from a server should be passed on to the EventManager.
+        Every event handler goes through this before dispatching events.
+        :param server: The server the event came from, or None for events from private channels
+        :return: Whether events from the server should be handled
+        """
+        if server is None:
+            return True
+        if server.id in self._blacklisted_servers:
+            return False
+        return self._allowed_servers is None or server.id in self._allowed_servers
+
     def register_handler(self, eventtype: EventTypes, handler, plugin: BasePlugin):
         """
         Registers a new event handler in the bot's EventManager
@@ -73,38 +127,44 @@ class Bot(discord.Client):
         """
         self.EventManager.register_handler(eventtype, handler, plugin)
 
+    async def dispatch_message_event(self,
+                                     event_type: EventTypes,
+                                     private_event_type: EventTypes,
+                                     channel_event_type: EventTypes,
+                                     private: bool,
+                                     **kwargs):
+        """
+        Dispatches a message event along with its private or channel specific version.
+        Each event gets its own event object, so handlers see the event_type they registered for, but an object is only
+        created for an event type that something handles.
+        :param event_type: The general event type
+        :param private_event_type: The event type to also dispatch for private channels
+        :param channel_event_type: The event type to also dispatch for server channels
+        :param private: Whether the message was in a private channel
+        :param kwargs: The event arguments
+        """
+        await self.EventManager.dispatch_event(event_type, **kwargs)
+        await self.EventManager.dispatch_event(private_event_type if private else channel_event_type, **kwargs)
+
     async def on_message(self, message: discord.Message):
         """
         Passes incoming messages to the EventManager
         :param message: The incoming message
         """
-        if channel_is_private(message.channel) or message.guild.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(get_channel_server(message.channel)):
             await self.log_message(message)
-            await self.EventManager.dispatch_event(EventTypes.MESSAGE_SENT,
-                                                   message=message,
-                                                   author=message.author,
-                                                   channel=message.channel)
-            if channel_is_private(message.channel):
-                await self.EventManager.dispatch_event(EventTypes.PRIVATE_MESSAGE_SENT,
-                                                       message=message,
-                                                       author=message.author,
-                                                       channel=message.channel)
-            else:
-                await self.EventManager.dispatch_event(EventTypes.CHANNEL_MESSAGE_SENT,
-                                                       message=message,
-                                                       author=message.author,
-                                                       channel=message.channel)
-
-            if message.content.startswith(self.config["command_prefix"]):
-                command_str = message.content.lstrip(self.config["command_prefix"])
-                try:
-                    args = shlex.split(command_str)
-                except ValueError:
-                    self.logger.warning("Failed to process arguments for message '{}' using shlex, falling back to\
-                                         processing using spaces.".format(message.content))
-                    args = command_str.split(" ")
+            await self.dispatch_message_event(EventTypes.MESSAGE_SENT,
+                                              EventTypes.PRIVATE_MESSAGE_SENT,
+                                              EventTypes.CHANNEL_MESSAGE_SENT,
+                                              channel_is_private(message.channel),
+                                              message=message,
+                                              author=message.author,
+                                              channel=message.channel)
+
+            command_str = self.PrefixManager.strip_prefix(message.content, message.guild)
+            if command_str is not None and command_str.strip() != "":
+                # The arguments are only split if something uses them
                 await self.EventManager.dispatch_event(EventTypes.COMMAND_SENT,
-                                                       command_args=args,
                                                        unsplit_args=command_str,
                                                        message=message,
                                                        author=message.author,
@@ -115,23 +175,14 @@ class Bot(discord.Client):
         Passes message deletions to the EventManager
         :param message: The message that was deleted
         """
-        if channel_is_private(message.channel) or message.guild.id not in self.config.get("blacklisted_servers", []):
-            await self.EventManager.dispatch_event(EventTypes.MESSAGE_DELETED,
-                                                   message=message,
-                                                   author=message.author,
-                                                   channel=message.channel)
-
-            if channel_is_private(message.channel):
-                await self.EventManager.dispatch_event(EventTypes.PRIVATE_MESSAGE_DELETED,
-                                                       message=message,
-                                                       author=message.author,
-                                                       channel=message.channel)
-
-            else:
-                await self.EventManager.dispatch_event(EventTypes.CHANNEL_MESSAGE_DELETED,
-                                                       message=message,
-                                                       author=message.author,
-                                                       channel=message.channel)
+        if self.server_allowed(get_channel_server(message.channel)):
+            await self.dispatch_message_event(EventTypes.MESSAGE_DELETED,
+                                              EventTypes.PRIVATE_MESSAGE_DELETED,
+                                              EventTypes.CHANNEL_MESSAGE_DELETED,
+                                              channel_is_private(message.channel),
+                                              message=message,
+                                              author=message.author,
+                                              channel=message.channel)
 
     async def on_message_edit(self, before: discord.Message, after: discord.Message):
         """
@@ -139,33 +190,22 @@ class Bot(discord.Client):
         :param before: The message before it was edited
         :param after: The message after it was edited
         """
-        if channel_is_private(after) or after.guild.id not in self.config.get("blacklisted_servers", []):
-            await self.EventManager.dispatch_event(EventTypes.MESSAGE_EDITED,
-                                                   message_before=before,
-                                                   message_after=after,
-                                                   author=after.author,
-                                                   channel=after.channel)
-
-            if channel_is_private(after):
-                await self.EventManager.dispatch_event(EventTypes.PRIVATE_MESSAGE_EDITED,
-                                                       message_before=before,
-                                                       message_after=after,
-                                                       author=after.author,
-                                                       channel=after.channel)
-
-            else:
-                await self.EventManager.dispatch_event(EventTypes.PRIVATE_MESSAGE_EDITED,
-                                                       message_before=before,
-                                                       message_after=after,
-                                                       author=after.author,
-                                                       channel=after.channel)
+        if self.server_allowed(get_channel_server(after.channel)):
+            await self.dispatch_message_event(EventTypes.MESSAGE_EDITED,
+                                              EventTypes.PRIVATE_MESSAGE_EDITED,
+                                              EventTypes.CHANNEL_MESSAGE_EDITED,
+                                              channel_is_private(after.channel),
+                                              message_before=before,
+                                              message_after=after,
+                                              author=after.author,
+                                              channel=after.channel)
 
     async def on_channel_delete(self, channel: DiscordGuildChannel):
         """
         Passes channel deletions to the EventManager
         :param channel: The channel that was deleted
         """
-        if channel_is_private(channel) or channel.guild.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(get_channel_server(channel)):
             await self.EventManager.dispatch_event(EventTypes.CHANNEL_DELETED,
                                                    channel=channel,
                                                    server=channel.guild)
@@ -175,7 +215,7 @@ class Bot(discord.Client):
         Passes channel creations to the EventManager
         :param channel: The channel that was created
         """
-        if channel_is_private(channel) or channel.guild.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(get_channel_server(channel)):
             if not channel_is_private(channel):
                 await self.EventManager.dispatch_event(EventTypes.CHANNEL_CREATED,
                                                        channel=channel,
@@ -190,7 +230,7 @@ class Bot(discord.Client):
         :param before: The channel before it was updated
         :param after: The channel after it was updated
         """
-        if channel_is_private(after) or after.guild.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(get_channel_server(after)):
             await self.EventManager.dispatch_event(EventTypes.CHANNEL_UPDATED,
                                                    channel_before=before,
                                                    channel_after=after,
@@ -201,7 +241,7 @@ class Bot(discord.Client):
         Passes member joins to the EventManager
         :param member: The member that joined
         """
-        if member.guild.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(member.guild):
             await self.EventManager.dispatch_event(EventTypes.MEMBER_JOINED,
                                                    member=member,
                                                    server=member.guild)
@@ -211,7 +251,8 @@ class Bot(discord.Client):
         Passes member leaves to the EventManager
         :param member: The member that left
         """
-        if member.guild.id not in self.config.get("blacklisted_servers", []):
+        permission_cache.invalidate_member(member)
+        if self.server_allowed(member.guild):
             await self.EventManager.dispatch_event(EventTypes.MEMBER_LEFT,
                                                    member=member,
                                                    server=member.guild)
@@ -222,7 +263,8 @@ class Bot(discord.Client):
         :param before: The member before the update
         :param after: The member after the update
         """
-        if after.guild.id not in self.config.get("blacklisted_servers", []):
+        permission_cache.invalidate_member(after)
+        if self.server_allowed(after.guild):
             await self.EventManager.dispatch_event(EventTypes.MEMBER_UPDATED,
                                                    member_before=before,
                                                    member_after=after,
@@ -233,7 +275,7 @@ class Bot(discord.Client):
         Passes member bans to the EventManager
         :param member: The member that was banned
         """
-        if member.guild.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(member.guild):
             await self.EventManager.dispatch_event(EventTypes.MEMBER_BANNED,
                                                    member=member,
                                                    server=member.guild)
@@ -244,7 +286,7 @@ class Bot(discord.Client):
         :param server: The server that the user was unbanned from
         :param user: The user that was unbanned
         """
-        if server.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(server):
             await self.EventManager.dispatch_event(EventTypes.MEMBER_UNBANNED,
                                                    server=server,
                                                    user=user)
@@ -255,7 +297,7 @@ class Bot(discord.Client):
         :param before: The member before the update
         :param after: The member after the update
         """
-        if user.guild.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(user.guild):
             await self.EventManager.dispatch_event(EventTypes.MEMBER_VOICE_STATE_UPDATED,
                                                    member_before=before,
                                                    member_after=after)
@@ -267,7 +309,7 @@ class Bot(discord.Client):
         :param user: The user that is typing
         :param when: When the user started typing
         """
-        if channel_is_private(channel) or channel.guild.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(get_channel_server(channel)):
             await self.EventManager.dispatch_event(EventTypes.MEMBER_TYPING,
                                                    channel=channel,
                                                    user=user,
@@ -278,7 +320,7 @@ class Bot(discord.Client):
         Passes server joins to the EventManager
         :param server: The server that was joined
         """
-        if server.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(server):
             await self.EventManager.dispatch_event(EventTypes.SERVER_JOINED,
                                                    server=server)
 
@@ -287,17 +329,25 @@ class Bot(discord.Client):
         Passes server leaves to the EventManager
         :param server: The server that was left
         """
-        if server.id not in self.config.get("blacklisted_servers", []):
+        permission_cache.invalidate_server(server)
+        if self.server_allowed(server):
             await self.EventManager.dispatch_event(EventTypes.SERVER_LEFT,
                                                    server=server)
 
+    async def on_guild_remove(self, server: discord.Guild):
+        """
+        Passes server leaves to the EventManager, under the name discord.py's rewrite uses for them
+        :param server: The server that was left
+        """
+        await self.on_server_remove(server)
+
     async def on_server_update(self, before: discord.Guild, after: discord.Guild):
         """
         Passes server updates to the EventManager
         :param before: The server before the update
         :param after: The server after the update
         """
-        if before.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(after):
             await self.EventManager.dispatch_event(EventTypes.SERVER_UPDATED,
                                                    server_before=before,
                                                    server_after=after)
@@ -307,7 +357,7 @@ class Bot(discord.Client):
         Passes server available events to the EventManager
         :param server: The server that became available
         """
-        if server.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(server):
             await self.EventManager.dispatch_event(EventTypes.SERVER_AVAILABLE,
                                                    server=server)
 
@@ -316,7 +366,7 @@ class Bot(discord.Client):
         Passes server unavailable events to the EventManager
         :param server: The server that became unavailable
         """
-        if server.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(server):
             await self.EventManager.dispatch_event(EventTypes.SERVER_UNAVAILABLE,
                                                    server=server)
 
@@ -326,7 +376,7 @@ class Bot(discord.Client):
         :param server: The server that the role was created in
         :param role: The role that was created
         """
-        if server.id not in self.config.get("blacklisted_servers", []):
+        if self.server_allowed(server):
             await self.EventManager.dispatch_event(EventTypes.SERVER_ROLE_CREATED,
                                                    server=server,
                                                    role=role)
@@ -337,7 +387,8 @@ class Bot(discord.Client):
         :param server: The server that the role was deleted from
         :param role: The role that was deleted
         """
-        if server.id not in self.config.get("blacklisted_servers", []):
+        permission_cache.invalidate_server(server)
+        if self.server_allowed(server):
             await self.EventManager.dispatch_event(EventTypes.SERVER_ROLE_DELETED,
                                                    server=server,
                                                    role=role)
@@ -348,16 +399,34 @@ class Bot(discord.Client):
         :param before: The role before the update
         :param after: The role after the update
         """
-        if before.id not in self.config.get("blacklisted_servers", []):
+        permission_cache.invalidate_server(after.guild)
+        if self.server_allowed(after.guild):
             await self.EventManager.dispatch_event(EventTypes.SERVER_ROLE_UPDATED,
                                                    role_before=before,
                                                    role_after=after,
-                                                   server=[server for server in self.guilds if after in server.roles][0])
+                                                   server=after.guild)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        """
+        Passes server role deletions to the EventManager, under the name discord.py's rewrite uses for them
+        :param role: The role that was deleted
+        """
+        await self.on_server_role_delete(role.guild, role)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        """
+        Passes server role updates to the EventManager, under the name discord.py's rewrite uses for them
+        :param before: The role before the update
+        :param after: The role after the update
+        """
+        await self.on_server_role_update(before, after)
 
     async def on_ready(self):
         """
         Passes ready events to the EventManager
         """
+        self.PrefixManager.set_bot_user(self.user)
+        self.Scheduler.load_tasks()
         await self.EventManager.dispatch_event(EventTypes.CLIENT_READY)
 
     async def log_message(self, message: discord.Message):
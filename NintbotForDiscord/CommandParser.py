@@ -0,0 +1,41 @@
+import logging
+import re
+import shlex
+from typing import List
+
+__author__ = 'Riley Flynn (nint8835)'
+
+logger = logging.getLogger("CommandParser")
+
+# Characters that shlex treats differently from str.split: quotes, escapes, and whitespace other than the whitespace
+# shlex splits on
+SHLEX_SPECIAL_CHARS = re.compile(r"[\"'\\]|(?![ \t\r\n])\s")
+
+
+def split_args(command_str: str) -> List[str]:
+    """
+    Splits a command into its arguments, allowing quotes to be used to group arguments containing spaces
+    :param command_str: The command, without the prefix
+    :return: The list of arguments, including the command name
+    """
+    # Most commands don't use quotes, and for those a plain split gives the same result as shlex, much faster
+    if SHLEX_SPECIAL_CHARS.search(command_str) is None:
+        return command_str.split()
+
+    try:
+        return shlex.split(command_str)
+    except ValueError:
+        logger.warning("Failed to process arguments for command '{}' using shlex, falling back to processing using "
+                       "spaces.".format(command_str))
+        return command_str.split(" ")
+
+
+def get_command_name(command_str: str) -> str:
+    """
+    Gets the name of a command without splitting all of its arguments, if possible
+    :param command_str: The command, without the prefix
+    :return: The command name
+    """
+    if SHLEX_SPECIAL_CHARS.search(command_str) is None:
+        return command_str.split(None, 1)[0]
+    return split_args(command_str)[0]
@@ -3,7 +3,7 @@ import logging
 import re
 
 import discord
-from typing import Callable, Union
+from typing import Callable, Dict, List, Optional, Pattern, Tuple, Union
 
 from .Events import CommandSentEvent
 from .Plugin import BasePlugin
@@ -13,12 +13,209 @@ __author__ = 'Riley Flynn (nint8835)'
 
 CommandHandler = Union[Callable[[dict], asyncio.coroutine], Callable[[CommandSentEvent], asyncio.coroutine]]
 
+REGEX_SPECIAL_CHARS = set(".^$*+?{}[]\\|()")
+REGEX_QUANTIFIERS = set("*+?{")
+# A repeat that allows the preceding item to appear zero times, such as {0,3} or {,3}
+OPTIONAL_REPEAT = re.compile(r"\{0*[,}]")
+
+
+def get_command_name_from_pattern(pattern: str) -> Optional[str]:
+    """
+    Gets the literal command name that a modern command pattern requires the message to start with
+    :param pattern: The pattern of the modern command
+    :return: The command name, or None if the pattern could match messages starting with more than one word
+    """
+    if "|" in pattern or "(?" in pattern:
+        return None
+
+    index = 0
+    if pattern.startswith("^"):
+        index = 1
+    elif pattern.startswith("\\A"):
+        index = 2
+
+    name = ""
+    while index < len(pattern) and pattern[index] not in REGEX_SPECIAL_CHARS and not pattern[index].isspace():
+        name += pattern[index]
+        index += 1
+
+    rest = pattern[index:]
+    if name == "" or rest[:1] in REGEX_QUANTIFIERS:
+        return None
+    # The name must be followed by something that ends the first word, otherwise "help" would also match "helpme"
+    if rest.startswith(("\\Z", "$")):
+        return name
+    if rest[:1].isspace():
+        rest = rest[1:]
+    elif rest.startswith("\\s"):
+        rest = rest[2:]
+    else:
+        return None
+    # The whitespace must also be required, as "ping\s*(.*)" matches "pingpong" too
+    if rest[:1] in ("*", "?") or OPTIONAL_REPEAT.match(rest):
+        return None
+    return name
+
+
+# Patterns that can't safely be combined with other patterns, as their meaning depends on their own group numbers or
+# they set flags for the whole pattern
+UNCOMBINABLE_PATTERN = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]")
+# The most groups in a combined pattern. The regex engine copies the state of every group before the one being matched
+# when it backtracks, so matching a pattern with many groups takes time quadratic in the number of groups.
+COMBINED_PATTERN_GROUPS = 128
+
+
+def remove_group_names(pattern: str) -> str:
+    """
+    Turns all of the named groups in a pattern into unnamed groups, so that patterns using the same group names can be
+    combined. The groups keep their numbers.
+    :param pattern: The pattern to convert
+    :return: The pattern without any group names
+    """
+    result = []
+    index = 0
+    in_class = False
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            result.append(pattern[index:index + 2])
+            index += 2
+            continue
+
+        if in_class:
+            if char == "]":
+                in_class = False
+        elif char == "[":
+            in_class = True
+            result.append(char)
+            index += 1
+            # A ] straight after the opening [ or [^ is part of the set rather than the end of it
+            if pattern.startswith("^", index):
+                result.append("^")
+                index += 1
+            if pattern.startswith("]", index):
+                result.append("]")
+                index += 1
+            continue
+        elif pattern.startswith("(?P<", index):
+            result.append("(")
+            index = pattern.index(">", index) + 1
+            continue
+
+        result.append(char)
+        index += 1
+    return "".join(result)
+
+
+def get_match_args(whole: str, groups: tuple):
+    """
+    Gets the command arguments for a match, in the same format as the first result of re.findall
+    :param whole: The whole match
+    :param groups: The groups of the match
+    :return: The whole match if there are no groups, the group if there is one, or a tuple of groups otherwise
+    """
+    groups = tuple(group if group is not None else "" for group in groups)
+    if len(groups) == 0:
+        return whole
+    return groups[0] if len(groups) == 1 else groups
+
+
+class ModernCommandMatcher:
+
+    """
+    Matches a set of modern commands against messages using regexes made up of several of their patterns each, so a
+    single pass over each regex finds the first matching command in it along with its arguments.
+    """
+
+    def __init__(self, commands: Tuple[dict, ...]):
+        """
+        Creates a new ModernCommandMatcher
+        :param commands: The modern commands to match, in the order they were registered
+        """
+        self.commands = commands
+        # The combined patterns starting at each command, built when first needed. Each is stored along with the
+        # position after its last command, and the position and first group number of the command each of its marker
+        # groups belongs to.
+        self._patterns = {}  # type: Dict[int, Optional[Tuple[Pattern, int, Dict[int, Tuple[int, int]]]]]
+
+    def _get_pattern(self, start: int) -> Optional[Tuple[Pattern, int, Dict[int, Tuple[int, int]]]]:
+        """
+        Gets the combined pattern of the commands from a position onwards, up to COMBINED_PATTERN_GROUPS groups
+        :param start: The position of the first command to include
+        :return: The pattern, the position after its last command and its marker groups, or None if the command at the
+        position has to be matched on its own
+        """
+        if start in self._patterns:
+            return self._patterns[start]
+
+        # Each pattern is followed by an empty marker group. It closes after the pattern's own groups, so the last
+        # group of a match is the marker of the pattern that matched.
+        parts = []
+        markers = {}
+        group = 0
+        end = start
+        while end < len(self.commands) and not UNCOMBINABLE_PATTERN.search(self.commands[end]["command_string"]):
+            command = self.commands[end]
+            if parts and group + command["command"].groups + 1 > COMBINED_PATTERN_GROUPS:
+                break
+            parts.append("(?:{})()".format(remove_group_names(command["command_string"])))
+            markers[group + command["command"].groups + 1] = (end, group + 1)
+            group += command["command"].groups + 1
+            end += 1
+
+        self._patterns[start] = None
+        if len(parts) > 1:
+            try:
+                self._patterns[start] = (re.compile("|".join(parts)), end, markers)
+            except re.error:
+                pass
+        return self._patterns[start]
+
+    def match(self, content: str) -> List[Tuple[dict, object]]:
+        """
+        Finds all of the commands that match a message
+        :param content: The message content, with the prefix removed
+        :return: A list of tuples of each matching command and its arguments
+        """
+        matches = []
+        start = 0
+        while start < len(self.commands):
+            combined = self._get_pattern(start)
+            if combined is None:
+                command = self.commands[start]
+                match = command["command"].match(content)
+                if match is not None:
+                    matches.append((command, get_match_args(match.group(0), match.groups())))
+                start += 1
+                continue
+
+            pattern, end, markers = combined
+            match = pattern.match(content)
+            if match is None:
+                start = end
+                continue
+            index, first_group = markers[match.lastindex]
+            command = self.commands[index]
+            matches.append((command, get_match_args(match.group(0),
+                                                    match.groups()[first_group - 1:match.lastindex - 1])))
+            # Alternation stops at the first match, so the commands after it are matched again to find any others
+            start = index + 1
+        return matches
+
 
 class CommandRegistry:
 
     def __init__(self, bot):
         self._commands = []
         self._modern_commands = []
+
+        # Lookup tables rebuilt whenever commands are registered or unregistered.
+        # Modern commands are indexed by the command name their pattern starts with, when there is one, and the
+        # commands that could match any name are kept in _unindexed_modern_commands.
+        self._command_index = {}  # type: Dict[str, Tuple[dict, ...]]
+        self._modern_command_index = {}  # type: Dict[str, ModernCommandMatcher]
+        self._unindexed_modern_commands = ModernCommandMatcher(())
+        self._modern_command_positions = {}  # type: Dict[int, int]
         self.logger = logging.getLogger("CommandRegistry")
         self.bot = bot
 
@@ -38,6 +235,7 @@ class CommandRegistry:
             "plugin": plugin,
             "handler": command_handler
         })
+        self._command_index[command] = self._command_index.get(command, ()) + (self._commands[-1],)
         self.logger.debug("New command registered. Info: {}".format(self._commands[-1]))
 
     def register_modern_command(self, command: str, description: str, required_perm: Permission, plugin: BasePlugin, command_handler: Callable[[CommandSentEvent], asyncio.coroutine]):
@@ -49,8 +247,50 @@ class CommandRegistry:
             "plugin": plugin,
             "handler": command_handler
         })
+        self._index_modern_command(self._modern_commands[-1], len(self._modern_commands) - 1)
         self.logger.debug("New command registered. Info: {}".format(self._modern_commands[-1]))
 
+    def _rebuild_command_index(self):
+        """
+        Rebuilds the lookup table for commands
+        """
+        index = {}
+        for command in self._commands:
+            index[command["command"]] = index.get(command["command"], ()) + (command,)
+        self._command_index = index
+
+    def _index_modern_command(self, command: dict, position: int):
+        """
+        Adds a modern command to the modern command lookup tables
+        :param command: The modern command to add
+        :param position: The position of the command in the list of modern commands
+        """
+        self._modern_command_positions[id(command)] = position
+        name = get_command_name_from_pattern(command["command_string"])
+        if name is None:
+            self._unindexed_modern_commands = ModernCommandMatcher(self._unindexed_modern_commands.commands + (command,))
+        elif name in self._modern_command_index:
+            self._modern_command_index[name] = ModernCommandMatcher(self._modern_command_index[name].commands + (command,))
+        else:
+            self._modern_command_index[name] = ModernCommandMatcher((command,))
+
+    def _rebuild_modern_command_index(self):
+        """
+        Rebuilds the lookup tables for modern commands
+        """
+        indexed = {}
+        unindexed = []
+        self._modern_command_positions = {}
+        for position, command in enumerate(self._modern_commands):
+            self._modern_command_positions[id(command)] = position
+            name = get_command_name_from_pattern(command["command_string"])
+            if name is None:
+                unindexed.append(command)
+            else:
+                indexed.setdefault(name, []).append(command)
+        self._modern_command_index = {name: ModernCommandMatcher(tuple(commands)) for name, commands in indexed.items()}
+        self._unindexed_modern_commands = ModernCommandMatcher(tuple(unindexed))
+
     def unregister_command(self, command_name: str, plugin: BasePlugin):
         """
         Removes a command from the command registry
@@ -60,6 +300,7 @@ class CommandRegistry:
         for command in self._commands[:]:
             if command["command"] == command_name and command["plugin"] == plugin:
                 self._commands.remove(command)
+        self._rebuild_command_index()
 
     def unregister_all_commands_for_plugin(self, plugin: BasePlugin):
         """
@@ -72,6 +313,8 @@ class CommandRegistry:
         for command in self._modern_commands[:]:
             if command["plugin"] == plugin:
                 self._modern_commands.remove(command)
+        self._rebuild_command_index()
+        self._rebuild_modern_command_index()
 
     def get_available_commands_for_user(self, user: discord.User) -> list:
         """
@@ -87,7 +330,20 @@ class CommandRegistry:
         :param command: The command to return all results for
         :return: The list of results for that command
         """
-        return [i for i in self._commands if i["command"] == command]
+        return list(self._command_index.get(command, ()))
+
+    def match_modern_commands(self, content: str) -> List[Tuple[dict, object]]:
+        """
+        Finds all of the modern commands that match a command, in the order they were registered
+        :param content: The command, with the prefix removed
+        :return: A list of tuples of each matching command and its arguments
+        """
+        words = content.split(None, 1)
+        matches = self._unindexed_modern_commands.match(content)
+        if words and words[0] in self._modern_command_index:
+            matches += self._modern_command_index[words[0]].match(content)
+            matches.sort(key=lambda match: self._modern_command_positions[id(match[0])])
+        return matches
 
     async def handle_command(self, command_name: str, args: CommandSentEvent):
         """
@@ -96,8 +352,8 @@ class CommandRegistry:
         :param args: The argument dictionary to pass to the handler
         """
         self.logger.debug("Handling command {}.".format(command_name))
-        for command in self._commands:
-            if command["command"] == command_name and command["handler"] is not None:
+        for command in self._command_index.get(command_name, ()):
+            if command["handler"] is not None:
                 if command["required_permission"].has_permission(args.author):
                     try:
                         await asyncio.wait_for(command["handler"](args),
@@ -106,12 +362,15 @@ class CommandRegistry:
                     except asyncio.TimeoutError:
                         self.bot.logger.warning("Handling of {} command from plugin {} timed out.".format(command,
                                                                                                           command["plugin"].manifest["name"]))
-        for command in self._modern_commands:
-            if command["command"].match(args.content.lstrip(self.bot.config["command_prefix"])) and command["handler"] is not None:
+        content = args.unsplit_args
+        if content is None:
+            content = self.bot.PrefixManager.strip_prefix(args.content, getattr(args.channel, "guild", None)) or ""
+        for command, command_args in self.match_modern_commands(content):
+            if command["handler"] is not None:
                 if command["required_permission"].has_permission(args["author"]):
                     try:
                         await asyncio.wait_for(command["handler"](CommandSentEvent(
-                            args.message, args.author, args.channel, command["command_string"], command["command"].findall(args.content.lstrip(self.bot.config["command_prefix"]))[0]
+                            args.message, args.author, args.channel, command["command_string"], command_args, content
                         )),
                                                timeout=self.bot.config["event_timeout"],
                                                loop=self.bot.EventManager.loop)
@@ -49,3 +49,16 @@ class EventTypes(Enum):
 
     # Client Status
     CLIENT_READY = "on_ready"
+
+
+class ShedPolicy(Enum):
+    """An enum containing the ways events of a certain type can be discarded when the event queue is full"""
+
+    # Never discard the event, instead wait for room in the queue
+    NEVER = "never"
+
+    # Discard the oldest queued event of this type to make room for newer events
+    DROP_OLDEST = "drop_oldest"
+
+    # Discard incoming events of this type while the queue is full
+    DROP_NEWEST = "drop_newest"
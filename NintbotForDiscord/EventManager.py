@@ -1,7 +1,9 @@
 import traceback
 import asyncio
+from typing import Dict, List, Tuple
 
-from .Enums import EventTypes
+from .Enums import EventTypes, ShedPolicy
+from .EventQueue import EventQueue
 from .Plugin import BasePlugin
 from .Events import classes
 __author__ = 'Riley Flynn (nint8835)'
@@ -10,25 +12,57 @@ __author__ = 'Riley Flynn (nint8835)'
 class EventManager:
 
     def __init__(self, bot_instance):
-        self._handlers = []
+        # Handlers indexed by event type. Each entry is an immutable tuple that gets replaced (rather than mutated)
+        # whenever handlers are added or removed, so dispatch never has to scan handlers for other event types.
+        self._handlers = {}  # type: Dict[EventTypes, Tuple[dict, ...]]
         self._bot = bot_instance
         self.loop = asyncio.get_event_loop()
-        self.queue = asyncio.Queue(loop=self.loop)
-        self.loop.create_task(self.event_handle_loop())
+        self.queue = EventQueue(self._bot.config.get("event_queue_size", 10000),
+                                loop=self.loop,
+                                priorities={EventTypes(event_type): priority
+                                            for event_type, priority in self._bot.config.get("event_priorities", {}).items()},
+                                policies={EventTypes(event_type): ShedPolicy(policy)
+                                          for event_type, policy in self._bot.config.get("event_shed_policies", {}).items()})
+
+        # With event ordering, a plugin is held in the queue while one of its handlers runs, so each plugin handles its
+        # events one at a time, in the order the queue hands them out, while workers move on to events for other plugins
+        self._ordered = self._bot.config.get("event_ordering", True)
+
+        self._workers = []  # type: List[asyncio.Task]
+        for _ in range(max(1, self._bot.config.get("event_workers", 1))):
+            self._workers.append(self.loop.create_task(self.event_handle_loop()))
 
     async def event_handle_loop(self):
         """
-        The main loop that dispatches incoming events to all registered handlers
+        The main loop that dispatches incoming events to all registered handlers.
+        Several of these run at once, as configured by the event_workers config option.
         """
         while not self._bot.is_closed:
             handler = await self.queue.get()
             self._bot.logger.debug("{} items in event queue.".format(self.queue.qsize()))
+            if not self._ordered:
+                await self._run_handler(handler)
+                continue
+            self.queue.hold(handler["plugin"])
             try:
-                await asyncio.wait_for(handler["handler"](handler["args"]), timeout=self._bot.config["event_timeout"],
-                                       loop=self.loop)
-            except asyncio.TimeoutError:
-                self._bot.logger.warning("Handling of {} event from plugin {} timed out.".format(handler["type"],
-                                                                                                 handler["plugin"].manifest["name"]))
+                await self._run_handler(handler)
+            finally:
+                self.queue.release(handler["plugin"])
+
+    async def _run_handler(self, handler: dict):
+        """
+        Runs a single queued handler, enforcing the event timeout
+        :param handler: The queue item containing the handler and its arguments
+        """
+        # noinspection PyBroadException
+        try:
+            await asyncio.wait_for(handler["handler"](handler["args"]), timeout=self._bot.config["event_timeout"],
+                                   loop=self.loop)
+        except asyncio.TimeoutError:
+            self._bot.logger.warning("Handling of {} event from plugin {} timed out.".format(handler["type"],
+                                                                                             handler["plugin"].manifest["name"]))
+        except:
+            traceback.print_exc(5)
 
     def register_handler(self, event_type: EventTypes, event_handler, plugin: BasePlugin):
         """
@@ -37,7 +71,21 @@ class EventManager:
         :param event_handler: The coroutine that will handle this event
         :param plugin: The plugin instance that this module belongs to
         """
-        self._handlers.append({"type": event_type, "handler": event_handler, "plugin": plugin})
+        handler = {"type": event_type, "handler": event_handler, "plugin": plugin}
+        self._handlers[event_type] = self._handlers.get(event_type, ()) + (handler,)
+
+    def create_event(self, event_type: EventTypes, **kwargs):
+        """
+        Creates the object that will be passed to handlers of an event
+        :param event_type: The type of event to create
+        :param kwargs: The event arguments
+        :return: The Event object for the event, or the argument dict if the event type has no Event class
+        """
+        kwargs["bot"] = self._bot
+        kwargs["event_type"] = event_type
+        if event_type in classes:
+            return classes[event_type].from_dict(kwargs)
+        return kwargs
 
     async def dispatch_event(self, event_type: EventTypes, **kwargs):
         """
@@ -45,26 +93,54 @@ class EventManager:
         :param event_type: The type of event to dispatch
         :param kwargs: The event arguments
         """
-        new_args = kwargs
-        new_args["bot"] = self._bot
-        new_args["event_type"] = event_type
-        if event_type in classes:
-            new_args = classes[event_type].from_dict(new_args)
-        for handler in self._handlers:
-            if handler["type"] == event_type:
-                # noinspection PyBroadException
-                try:
-                    await self.queue.put({"handler": handler["handler"],
-                                          "type": event_type,
-                                          "args": new_args,
-                                          "plugin": handler["plugin"]})
-                except:
-                    traceback.print_exc(5)
+        # Don't bother creating the event object if nothing is going to receive it
+        if event_type not in self._handlers and event_type != EventTypes.COMMAND_SENT:
+            return
+
+        event = self.create_event(event_type, **kwargs)
+
+        for handler in self._handlers.get(event_type, ()):
+            # noinspection PyBroadException
+            try:
+                await self.queue.put({"handler": handler["handler"],
+                                      "type": event_type,
+                                      "args": event,
+                                      "plugin": handler["plugin"]})
+            except:
+                traceback.print_exc(5)
 
         if event_type == EventTypes.COMMAND_SENT:
-            await self._bot.CommandRegistry.handle_command(new_args["command_args"][0], new_args)
+            await self._bot.CommandRegistry.handle_command(event.command, event)
+
+    def get_handlers(self, event_type: EventTypes) -> Tuple[dict, ...]:
+        """
+        Returns all handlers registered for an event type
+        :param event_type: The type of event to return handlers for
+        :return: A tuple of the handlers registered for that event type
+        """
+        return self._handlers.get(event_type, ())
+
+    def get_queue_stats(self) -> dict:
+        """
+        Returns statistics about the event queue
+        :return: A dict containing the queue size and the number of dropped and shed events of each type
+        """
+        return {"size": self.queue.qsize(),
+                "max_size": self.queue.maxsize,
+                "dropped": dict(self.queue.dropped),
+                "shed": dict(self.queue.shed)}
 
     def remove_handlers(self, plugin: BasePlugin):
-        for handler in self._handlers:
-            if handler["plugin"] == plugin:
-                self._handlers.remove(handler)
+        """
+        Removes all handlers registered by a plugin
+        :param plugin: The plugin to remove all handlers for
+        """
+        handlers = {}
+        for event_type, event_handlers in self._handlers.items():
+            remaining = tuple(handler for handler in event_handlers if handler["plugin"] != plugin)
+            if remaining:
+                handlers[event_type] = remaining
+        self._handlers = handlers
+
+        # Events already queued for the plugin are discarded, but a handler that is running is allowed to finish
+        self.queue.remove_plugin(plugin)
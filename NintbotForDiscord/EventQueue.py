@@ -0,0 +1,246 @@
+import asyncio
+import collections
+import itertools
+from typing import Callable, Deque, Dict, Set, Tuple
+
+from .Enums import EventTypes, ShedPolicy
+
+__author__ = 'Riley Flynn (nint8835)'
+
+# Lower numbers are handled first
+DEFAULT_PRIORITY = 5
+DEFAULT_PRIORITIES = {
+    EventTypes.COMMAND_SENT: 0,
+    EventTypes.MEMBER_UPDATED: 8,
+    EventTypes.MEMBER_VOICE_STATE_UPDATED: 8,
+    EventTypes.MEMBER_TYPING: 10
+}
+
+DEFAULT_SHED_POLICY = ShedPolicy.NEVER
+DEFAULT_SHED_POLICIES = {
+    EventTypes.MEMBER_UPDATED: ShedPolicy.DROP_OLDEST,
+    EventTypes.MEMBER_VOICE_STATE_UPDATED: ShedPolicy.DROP_OLDEST,
+    EventTypes.MEMBER_TYPING: ShedPolicy.DROP_OLDEST
+}
+
+
+class _EventBuckets:
+
+    """
+    Storage for EventQueue, keeping a FIFO bucket of items for each event type and plugin.
+    Items for held plugins stay in their buckets, counting towards the size of the queue and able to be shed, but aren't
+    handed out until their plugin is released.
+    """
+
+    def __init__(self, get_priority: Callable[[EventTypes], int]):
+        self.buckets = {}  # type: Dict[Tuple[EventTypes, object], Deque[Tuple[int, dict]]]
+        self._get_priority = get_priority
+        self._size = 0
+        self._counter = itertools.count()
+        self._held = set()  # type: Set[object]
+        # The number of items for each plugin, and for all held plugins
+        self._plugin_sizes = collections.Counter()  # type: Dict[object, int]
+        self._held_size = 0
+
+    def __len__(self):
+        return self._size
+
+    def ready(self) -> int:
+        """
+        :return: The number of items that can be handed out
+        """
+        return self._size - self._held_size
+
+    def event_types(self) -> Set[EventTypes]:
+        """
+        :return: The event types that have items waiting
+        """
+        return {event_type for event_type, _ in self.buckets}
+
+    def append(self, item: dict):
+        key = (item["type"], item.get("plugin"))
+        if key not in self.buckets:
+            self.buckets[key] = collections.deque()
+        self.buckets[key].append((next(self._counter), item))
+        self._added(key[1], 1)
+
+    def _added(self, plugin, count: int):
+        self._size += count
+        self._plugin_sizes[plugin] += count
+        if plugin in self._held:
+            self._held_size += count
+        if self._plugin_sizes[plugin] <= 0:
+            del self._plugin_sizes[plugin]
+
+    def _pop(self, key: Tuple[EventTypes, object]) -> dict:
+        bucket = self.buckets[key]
+        _, item = bucket.popleft()
+        if not bucket:
+            del self.buckets[key]
+        self._added(key[1], -1)
+        return item
+
+    def pop(self, event_type: EventTypes) -> dict:
+        # The oldest item of the type, whichever plugin it is for
+        return self._pop(min((key for key in self.buckets if key[0] == event_type),
+                             key=lambda key: self.buckets[key][0][0]))
+
+    def pop_next(self) -> dict:
+        # Highest priority first, then oldest first among event types sharing a priority
+        return self._pop(min((key for key in self.buckets if key[1] not in self._held),
+                             key=lambda key: (self._get_priority(key[0]), self.buckets[key][0][0])))
+
+    def hold(self, plugin):
+        if plugin not in self._held:
+            self._held.add(plugin)
+            self._held_size += self._plugin_sizes.get(plugin, 0)
+
+    def release(self, plugin):
+        if plugin in self._held:
+            self._held.discard(plugin)
+            self._held_size -= self._plugin_sizes.get(plugin, 0)
+
+    def remove_plugin(self, plugin) -> int:
+        """
+        Discards every item for a plugin
+        :param plugin: The plugin
+        :return: The number of items discarded
+        """
+        count = 0
+        for key in [key for key in self.buckets if key[1] is plugin]:
+            count += len(self.buckets.pop(key))
+        self._added(plugin, -count)
+        return count
+
+
+class EventQueue(asyncio.Queue):
+
+    """
+    A bounded queue of pending event handlers.
+    Items are handed out by event type priority, and in the order they were added within a priority.
+    When the queue is full, events are discarded according to the shed policy of their type, starting with the least
+    important event types. Event types that are never discarded wait for room in the queue instead.
+    A plugin can be held while one of its handlers runs, so its other events wait in the queue, in order and still
+    subject to the queue's size limit and shedding, while events for other plugins are handed out past them.
+    """
+
+    def __init__(self,
+                 maxsize: int = 0,
+                 *,
+                 loop: asyncio.AbstractEventLoop = None,
+                 priorities: Dict[EventTypes, int] = None,
+                 policies: Dict[EventTypes, ShedPolicy] = None):
+        """
+        Creates a new EventQueue
+        :param maxsize: The maximum number of queued items, or 0 for no limit
+        :param loop: The event loop the queue belongs to
+        :param priorities: Priorities for event types, overriding the defaults. Lower numbers are handled first.
+        :param policies: Shed policies for event types, overriding the defaults
+        """
+        super(EventQueue, self).__init__(maxsize, loop=loop)
+        self._priorities = dict(DEFAULT_PRIORITIES)
+        self._priorities.update(priorities or {})
+        self._policies = dict(DEFAULT_SHED_POLICIES)
+        self._policies.update(policies or {})
+
+        # Number of incoming events of each type that were discarded because the queue was full
+        self.dropped = collections.Counter()  # type: Dict[EventTypes, int]
+        # Number of queued events of each type that were discarded to make room for other events
+        self.shed = collections.Counter()  # type: Dict[EventTypes, int]
+
+    def get_priority(self, event_type: EventTypes) -> int:
+        """
+        Gets the priority of an event type
+        :param event_type: The event type to get the priority of
+        :return: The priority, where lower numbers are handled first
+        """
+        return self._priorities.get(event_type, DEFAULT_PRIORITY)
+
+    def get_policy(self, event_type: EventTypes) -> ShedPolicy:
+        """
+        Gets the shed policy of an event type
+        :param event_type: The event type to get the shed policy of
+        :return: The shed policy
+        """
+        return self._policies.get(event_type, DEFAULT_SHED_POLICY)
+
+    def empty(self) -> bool:
+        """
+        :return: Whether there are no items that can be handed out, although items for held plugins may be waiting
+        """
+        return self._queue.ready() == 0
+
+    def hold(self, plugin):
+        """
+        Stops items for a plugin being handed out until the plugin is released
+        :param plugin: The plugin to hold
+        """
+        self._queue.hold(plugin)
+
+    def release(self, plugin):
+        """
+        Lets items for a held plugin be handed out again
+        :param plugin: The plugin to release
+        """
+        self._queue.release(plugin)
+        if not self.empty():
+            self._wakeup_next(self._getters)
+
+    def remove_plugin(self, plugin):
+        """
+        Discards every queued item for a plugin, such as when its handlers are removed
+        :param plugin: The plugin
+        """
+        for _ in range(self._queue.remove_plugin(plugin)):
+            self.task_done()
+            self._wakeup_next(self._putters)
+
+    # asyncio.Queue storage hooks
+
+    def _init(self, maxsize):
+        self._queue = _EventBuckets(self.get_priority)
+
+    def _put(self, item):
+        self._queue.append(item)
+
+    def _get(self):
+        return self._queue.pop_next()
+
+    def _make_room(self, item: dict) -> bool:
+        """
+        Attempts to discard a queued event so that an item can be added to the full queue
+        :param item: The item that is being added
+        :return: Whether the item should still be added to the queue
+        """
+        priority = self.get_priority(item["type"])
+        for event_type in sorted(self._queue.event_types(), key=self.get_priority, reverse=True):
+            if self.get_priority(event_type) < priority:
+                break
+            if self.get_policy(event_type) == ShedPolicy.DROP_OLDEST:
+                self._queue.pop(event_type)
+                self.task_done()
+                self.shed[event_type] += 1
+                return True
+
+        if self.get_policy(item["type"]) != ShedPolicy.NEVER:
+            self.dropped[item["type"]] += 1
+            return False
+        return True
+
+    async def put(self, item: dict):
+        """
+        Adds an item to the queue, discarding events or waiting for room if the queue is full
+        :param item: The item to add
+        """
+        if self.full() and not self._make_room(item):
+            return
+        await super(EventQueue, self).put(item)
+
+    def put_nowait(self, item: dict):
+        """
+        Adds an item to the queue without waiting, discarding events if the queue is full
+        :param item: The item to add
+        """
+        if self.full() and not self._make_room(item):
+            return
+        super(EventQueue, self).put_nowait(item)
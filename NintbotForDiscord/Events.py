@@ -2,6 +2,7 @@ from typing import Union, Tuple
 
 import discord
 
+from .CommandParser import get_command_name, split_args
 from .Enums import EventTypes
 from .Types import DiscordUser, DiscordTextChannel, DiscordPrivateTextChannel
 
@@ -172,18 +173,48 @@ class CommandSentEvent(Event):
 
     event_type = EventTypes.COMMAND_SENT
 
-    def __init__(self, message: discord.Message, author: DiscordUser, channel: DiscordTextChannel, command: str, args: Tuple[str, ...]):
+    def __init__(self,
+                 message: discord.Message,
+                 author: DiscordUser,
+                 channel: DiscordTextChannel,
+                 command: str = None,
+                 args: Union[str, Tuple[str, ...]] = None,
+                 unsplit_args: str = None):
         self.message = message  # type: discord.Message
         self.author = author  # type: DiscordUser
         self.channel = channel  # type: DiscordTextChannel
         self.content = message.content  # type: str
-        self.command = command  # type: str
-        self.args = args  # type: Tuple[str, ...]
-        self.command_args = self.args
+        self.unsplit_args = unsplit_args  # type: str
+        # The command and arguments are worked out from unsplit_args when they are first used, if they weren't given
+        self._command = command
+        self._args = args
+
+    @property
+    def command(self) -> str:
+        if self._command is None:
+            if self._args is None:
+                self._command = get_command_name(self.unsplit_args)
+            else:
+                self._command = self._args[0]
+        return self._command
+
+    @property
+    def args(self) -> Union[str, Tuple[str, ...]]:
+        if self._args is None:
+            self._args = split_args(self.unsplit_args)
+        return self._args
+
+    @property
+    def command_args(self) -> Union[str, Tuple[str, ...]]:
+        return self.args
 
     @staticmethod
     def from_dict(args: dict) -> "CommandSentEvent":
-        return CommandSentEvent(args["message"], args["author"], args["channel"], args["command_args"][0], args["command_args"])
+        return CommandSentEvent(args["message"],
+                                args["author"],
+                                args["channel"],
+                                args=args.get("command_args"),
+                                unsplit_args=args.get("unsplit_args"))
 
 
 # Conversion table for converting dict events to objects
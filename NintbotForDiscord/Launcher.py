@@ -11,7 +11,7 @@ class BotLauncher:
 
     def __init__(self):
         self.config = self._get_config()
-        self._bot = Bot(self.config)
+        self._bot = Bot(self.config, config_loader=self._reload_config)
 
     def _get_config(self) -> dict:
         """
@@ -20,6 +20,13 @@ class BotLauncher:
         """
         return {}
 
+    def _reload_config(self) -> dict:
+        """
+        Returns a fresh copy of the config, used when the bot reloads settings
+        :return: The config
+        """
+        return self._get_config()
+
 
 class StreamBotLauncher(BotLauncher):
 
@@ -34,10 +41,26 @@ class StreamBotLauncher(BotLauncher):
         """
         return json.load(self._stream)
 
+    def _reload_config(self) -> dict:
+        """
+        Returns a fresh copy of the config, used when the bot reloads settings
+        :return: The config (in this case the config originally loaded, as streams can't be read again)
+        """
+        return self.config
+
 
 class FileBotLauncher(StreamBotLauncher):
 
     def __init__(self, path: str):
+        self._path = path
         if os.path.exists(path):
             with open(path) as f:
                 super(FileBotLauncher, self).__init__(f)
+
+    def _reload_config(self) -> dict:
+        """
+        Returns a fresh copy of the config, used when the bot reloads settings
+        :return: The config (in this case a dictionary loaded from the config file again)
+        """
+        with open(self._path) as f:
+            return json.load(f)
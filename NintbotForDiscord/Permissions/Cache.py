@@ -0,0 +1,63 @@
+from typing import Dict, Optional, Tuple
+
+import discord
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+class PermissionCache:
+
+    """
+    Caches the combined permissions of each member's roles.
+    Entries are keyed by server, member and the id and permission bits of each of the member's roles, so changes to a
+    member's roles, or to the permissions of those roles, are picked up without the entry being invalidated. Entries are
+    still invalidated when members, roles or servers are removed, so entries for them don't build up.
+    """
+
+    def __init__(self):
+        self._cache = {}  # type: Dict[int, Dict[int, Tuple[Tuple[Tuple[int, int], ...], discord.Permissions]]]
+
+    def get_permissions(self, member: discord.Member) -> Optional[discord.Permissions]:
+        """
+        Gets the combined permissions of all of a member's roles
+        :param member: The member to get the permissions of
+        :return: The member's permissions, or None if the member isn't in a server
+        """
+        roles = getattr(member, "roles", None)
+        guild = getattr(member, "guild", None)
+        if roles is None or guild is None:
+            return None
+
+        key = tuple((role.id, role.permissions.value) for role in roles)
+        server_cache = self._cache.setdefault(guild.id, {})
+        entry = server_cache.get(member.id)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+
+        value = 0
+        for _, role_value in key:
+            value |= role_value
+        permissions = discord.Permissions(value)
+        server_cache[member.id] = (key, permissions)
+        return permissions
+
+    def invalidate_member(self, member: discord.Member):
+        """
+        Removes the cached permissions of a member
+        :param member: The member to remove the cached permissions of
+        """
+        server_cache = self._cache.get(member.guild.id)
+        if server_cache is not None:
+            server_cache.pop(member.id, None)
+            if not server_cache:
+                del self._cache[member.guild.id]
+
+    def invalidate_server(self, server: discord.Guild):
+        """
+        Removes the cached permissions of every member of a server
+        :param server: The server to remove the cached permissions of
+        """
+        self._cache.pop(server.id, None)
+
+
+permission_cache = PermissionCache()
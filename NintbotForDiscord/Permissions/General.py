@@ -1,114 +1,47 @@
-from discord import Member
-from .Permission import Permission
+from .Permission import RolePermission
 
 __author__ = 'Riley Flynn (nint8835)'
 
 
-# noinspection PyBroadException
-class Administrator(Permission):
+class Administrator(RolePermission):
+    permission_name = "administrator"
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.administrator for role in member.roles])
-        except:
-            return False
 
+class ManageServer(RolePermission):
+    permission_name = "manage_server"
 
-# noinspection PyBroadException
-class ManageServer(Permission):
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.manage_server for role in member.roles])
-        except:
-            return False
+class ManageRoles(RolePermission):
+    permission_name = "manage_roles"
 
 
-# noinspection PyBroadException
-class ManageRoles(Permission):
+class ManageChannels(RolePermission):
+    permission_name = "manage_channels"
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.manage_roles for role in member.roles])
-        except:
-            return False
 
+class KickMembers(RolePermission):
+    permission_name = "kick_members"
 
-# noinspection PyBroadException
-class ManageChannels(Permission):
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.manage_channels for role in member.roles])
-        except:
-            return False
+class BanMembers(RolePermission):
+    permission_name = "ban_members"
 
 
-# noinspection PyBroadException
-class KickMembers(Permission):
+class CreateInstantInvite(RolePermission):
+    permission_name = "create_instant_invite"
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.kick_members for role in member.roles])
-        except:
-            return False
 
+class ChangeNicknames(RolePermission):
+    permission_name = "change_nicknames"
 
-# noinspection PyBroadException
-class BanMembers(Permission):
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.ban_members for role in member.roles])
-        except:
-            return False
+class ManageNicknames(RolePermission):
+    permission_name = "manage_nicknames"
 
 
-# noinspection PyBroadException
-class CreateInstantInvite(Permission):
+class ManageEmojis(RolePermission):
+    permission_name = "manage_emojis"
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.create_instant_invite for role in member.roles])
-        except:
-            return False
 
-
-# noinspection PyBroadException
-class ChangeNicknames(Permission):
-
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.change_nicknames for role in member.roles])
-        except:
-            return False
-
-
-# noinspection PyBroadException
-class ManageNicknames(Permission):
-
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.manage_nicknames for role in member.roles])
-        except:
-            return False
-
-
-# noinspection PyBroadException
-class ManageEmojis(Permission):
-
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.manage_emojis for role in member.roles])
-        except:
-            return False
-
-
-# noinspection PyBroadException
-class ManageWebhooks(Permission):
-
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.manage_webhooks for role in member.roles])
-        except:
-            return False
+class ManageWebhooks(RolePermission):
+    permission_name = "manage_webhooks"
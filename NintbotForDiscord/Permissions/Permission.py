@@ -1,5 +1,7 @@
 from discord import Member
 
+from .Cache import permission_cache
+
 __author__ = 'Riley Flynn (nint8835)'
 
 
@@ -8,16 +10,31 @@ class Permission:
         return True
 
 
+class RolePermission(Permission):
+    """A permission granted by any of a member's roles having a certain Discord permission"""
+
+    # The name of the discord.Permissions attribute to check
+    permission_name = ""
+    # Whether the permission is granted to users that aren't in a server, and so have no roles
+    default = False
+
+    def has_permission(self, member: Member) -> bool:
+        permissions = permission_cache.get_permissions(member)
+        if permissions is None:
+            return self.default
+        return getattr(permissions, self.permission_name, self.default)
+
+
 class PermissionGroup(Permission):
     permissions = [Permission()]
 
     def has_permission(self, member: Member) -> bool:
-        return not any([not permission.has_permission(member) for permission in self.permissions])
+        return all(permission.has_permission(member) for permission in self.permissions)
 
 
 class MatchAnyPermissionGroup(PermissionGroup):
     def has_permission(self, member: Member) -> bool:
-        return any([permission.has_permission(member) for permission in self.permissions])
+        return any(permission.has_permission(member) for permission in self.permissions)
 
 
 def create_permission_group(permissions) -> PermissionGroup:
@@ -22,7 +22,7 @@ class Role(Permission):
     def has_permission(self, member: Member) -> bool:
 
         try:
-            return any([role.name == self.role_name for role in member.roles])
+            return any(role.name == self.role_name for role in member.roles)
         except:
             return False
 
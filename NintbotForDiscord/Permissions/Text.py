@@ -1,94 +1,45 @@
-from discord import Member
-from .Permission import Permission
+from .Permission import RolePermission
 
 __author__ = 'Riley Flynn (nint8835)'
 
 
-# noinspection PyBroadException
-class ReadMessages(Permission):
+class ReadMessages(RolePermission):
+    permission_name = "read_messages"
+    default = True
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.read_messages for role in member.roles])
-        except:
-            return True
 
+class SendMessages(RolePermission):
+    permission_name = "send_messages"
+    default = True
 
-# noinspection PyBroadException
-class SendMessages(Permission):
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.send_messages for role in member.roles])
-        except:
-            return True
+class SendTTSMessages(RolePermission):
+    permission_name = "send_tts_messages"
 
 
-# noinspection PyBroadException
-class SendTTSMessages(Permission):
+class ManageMessages(RolePermission):
+    permission_name = "manage_messages"
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.send_tts_messages for role in member.roles])
-        except:
-            return False
 
+class EmbedLinks(RolePermission):
+    permission_name = "embed_links"
+    default = True
 
-# noinspection PyBroadException
-class ManageMessages(Permission):
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.manage_messages for role in member.roles])
-        except:
-            return False
+class AttachFiles(RolePermission):
+    permission_name = "attach_files"
+    default = True
 
 
-# noinspection PyBroadException
-class EmbedLinks(Permission):
+class ReadMessageHistory(RolePermission):
+    permission_name = "read_message_history"
+    default = True
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.embed_links for role in member.roles])
-        except:
-            return True
 
+class MentionEveryone(RolePermission):
+    permission_name = "mention_everyone"
 
-# noinspection PyBroadException
-class AttachFiles(Permission):
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.attach_files for role in member.roles])
-        except:
-            return True
-
-
-# noinspection PyBroadException
-class ReadMessageHistory(Permission):
-
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.read_message_history for role in member.roles])
-        except:
-            return True
-
-
-# noinspection PyBroadException
-class MentionEveryone(Permission):
-
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.mention_everyone for role in member.roles])
-        except:
-            return False
-
-
-# noinspection PyBroadException
-class UseExternalEmojis(Permission):
-
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.external_emojis for role in member.roles])
-        except:
-            return True
+class UseExternalEmojis(RolePermission):
+    permission_name = "external_emojis"
+    default = True
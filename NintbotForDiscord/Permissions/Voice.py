@@ -1,64 +1,27 @@
-from discord import Member
-from .Permission import Permission
+from .Permission import RolePermission
 
 __author__ = 'Riley Flynn (nint8835)'
 
 
-# noinspection PyBroadException
-class Connect(Permission):
+class Connect(RolePermission):
+    permission_name = "connect"
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.manage_server for role in member.roles])
-        except:
-            return False
 
+class Speak(RolePermission):
+    permission_name = "speak"
 
-# noinspection PyBroadException
-class Speak(Permission):
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.speak for role in member.roles])
-        except:
-            return False
+class MuteMembers(RolePermission):
+    permission_name = "mute_members"
 
 
-# noinspection PyBroadException
-class MuteMembers(Permission):
+class DeafenMembers(RolePermission):
+    permission_name = "deafen_members"
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.mute_members for role in member.roles])
-        except:
-            return False
 
+class MoveMembers(RolePermission):
+    permission_name = "move_members"
 
-# noinspection PyBroadException
-class DeafenMembers(Permission):
 
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.deafen_members for role in member.roles])
-        except:
-            return False
-
-
-# noinspection PyBroadException
-class MoveMembers(Permission):
-
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.move_members for role in member.roles])
-        except:
-            return False
-
-
-# noinspection PyBroadException
-class UseVoiceActivity(Permission):
-
-    def has_permission(self, member: Member) -> bool:
-        try:
-            return any([role.permissions.use_voice_activity for role in member.roles])
-        except:
-            return False
+class UseVoiceActivity(RolePermission):
+    permission_name = "use_voice_activity"
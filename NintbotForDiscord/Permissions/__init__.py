@@ -1,2 +1,2 @@
-from .Permission import Permission, PermissionGroup, MatchAnyPermissionGroup, create_match_any_permission_group, create_permission_group
+from .Permission import Permission, RolePermission, PermissionGroup, MatchAnyPermissionGroup, create_match_any_permission_group, create_permission_group
 __author__ = 'Riley Flynn (nint8835)'
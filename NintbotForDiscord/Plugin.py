@@ -78,4 +78,9 @@ class BasePlugin(JigsawPlugin):
 
         self.logger.debug("Unregistering handlers...")
         self.bot.EventManager.remove_handlers(self)
+        self.logger.debug("Handlers unregistered.")
+
+        self.logger.debug("Cancelling scheduled tasks...")
+        self.bot.Scheduler.remove_tasks_for_plugin(self)
+        self.logger.debug("Scheduled tasks cancelled.")
 
@@ -23,6 +23,9 @@ class PluginManager:
         self._jigsaw.load_plugins(self.bot)
         self._jigsaw.enable_all_plugins()
 
+    def unload_plugins(self):
+        self._jigsaw.disable_all_plugins()
+
     def get_plugin(self, name: str) -> BasePlugin:
         return self._jigsaw.get_plugin(name)
 
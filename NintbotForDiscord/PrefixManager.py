@@ -0,0 +1,119 @@
+import json
+import os
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional, Pattern
+
+import discord
+
+from .Utils import write_json_atomic
+
+if TYPE_CHECKING:
+    from . import Bot
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+class PrefixManager:
+
+    """
+    Keeps track of the command prefixes used in each server.
+    Servers without their own prefixes use the command_prefix from the bot config. The prefixes for each server are
+    compiled into a single regex, so checking a message costs the same no matter how many servers have custom prefixes.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot  # type: Bot.Bot
+        self.path = self.bot.config.get("prefix_path", "prefixes.json")
+        self._mention_prefix = self.bot.config.get("mention_prefix", False)
+        self._mention_pattern = ""
+
+        # Server ids are stored as strings, as they are used as keys in the JSON file
+        if os.path.isfile(self.path):
+            with open(self.path) as f:
+                self._prefixes = json.load(f)  # type: Dict[str, List[str]]
+        else:
+            self._prefixes = {}
+
+        self._patterns = {}  # type: Dict[str, Pattern]
+        self._default_pattern = None  # type: Pattern
+        self._compile_patterns()
+
+    def _compile_pattern(self, prefixes: List[str]) -> Pattern:
+        """
+        Compiles a list of prefixes into a regex matching the longest prefix at the start of a message
+        :param prefixes: The prefixes to match
+        :return: The compiled regex
+        """
+        alternatives = [re.escape(prefix) for prefix in sorted(prefixes, key=len, reverse=True)]
+        if self._mention_pattern != "":
+            alternatives.append(self._mention_pattern)
+        return re.compile("|".join(alternatives))
+
+    def _compile_patterns(self):
+        """
+        Compiles the prefix regexes for all servers
+        """
+        self._default_pattern = self._compile_pattern([self.bot.config["command_prefix"]])
+        self._patterns = {server_id: self._compile_pattern(prefixes) for server_id, prefixes in self._prefixes.items()}
+
+    def _save(self):
+        """
+        Writes the prefixes to the prefix file
+        """
+        write_json_atomic(self.path, self._prefixes)
+
+    def set_bot_user(self, user: discord.User):
+        """
+        Sets the user that can be mentioned in place of a prefix, if mention prefixes are enabled
+        :param user: The bot's user
+        """
+        if self._mention_prefix:
+            self._mention_pattern = r"<@!?{}>\s*".format(user.id)
+            self._compile_patterns()
+
+    def get_prefixes(self, server: discord.Guild = None) -> List[str]:
+        """
+        Returns the prefixes used in a server
+        :param server: The server to return the prefixes for, or None for private channels
+        :return: The list of prefixes
+        """
+        if server is not None and str(server.id) in self._prefixes:
+            return list(self._prefixes[str(server.id)])
+        return [self.bot.config["command_prefix"]]
+
+    def set_prefixes(self, server: discord.Guild, prefixes: List[str]):
+        """
+        Sets the prefixes used in a server
+        :param server: The server to set the prefixes for
+        :param prefixes: The new prefixes
+        """
+        prefixes = [prefix for prefix in prefixes if prefix != ""]
+        if len(prefixes) == 0:
+            raise ValueError("A server must have at least one non-empty prefix.")
+        self._prefixes[str(server.id)] = prefixes
+        self._patterns[str(server.id)] = self._compile_pattern(prefixes)
+        self._save()
+
+    def reset_prefixes(self, server: discord.Guild):
+        """
+        Makes a server go back to using the default prefix
+        :param server: The server to reset the prefixes for
+        """
+        self._prefixes.pop(str(server.id), None)
+        self._patterns.pop(str(server.id), None)
+        self._save()
+
+    def strip_prefix(self, content: str, server: discord.Guild = None) -> Optional[str]:
+        """
+        Removes the command prefix from a message
+        :param content: The message content
+        :param server: The server the message was sent in, or None for private channels
+        :return: The message content without the prefix, or None if the message doesn't start with a prefix
+        """
+        pattern = self._default_pattern
+        if server is not None:
+            pattern = self._patterns.get(str(server.id), pattern)
+        match = pattern.match(content)
+        if match is None:
+            return None
+        return content[match.end():]
@@ -1,10 +1,12 @@
 import time
+from typing import Dict, Type
 
 import discord
 from discord.utils import find
 
 from . import Bot
 from .Plugin import BasePlugin
+from .Schedules import FixedRateSchedule, Schedule
 from . import Scheduler
 
 __author__ = 'Riley Flynn (nint8835)'
@@ -12,12 +14,43 @@ __author__ = 'Riley Flynn (nint8835)'
 
 class ScheduledTask:
 
-    def __init__(self, delay: int = 30):
+    # The schedule the task is executed again on by the scheduler, or None if it is only executed once
+    schedule = None  # type: Schedule
+
+    def __init__(self, delay: float = 30):
         self.created = time.time()
+        # The creation time on the monotonic clock, which deadlines are based on so that changes to the system clock
+        # don't make tasks run early or late
+        self.created_monotonic = time.monotonic()
         self.delay = delay
 
+    def get_deadline(self) -> float:
+        """
+        :return: The time on the monotonic clock at which the task should be executed
+        """
+        return self.created_monotonic + self.delay
+
     def check_task(self):
-        return time.time() - self.created >= self.delay
+        return time.monotonic() >= self.get_deadline()
+
+    def to_dict(self) -> dict:
+        """
+        Converts the task's arguments into a dict that can be stored as JSON, so the task can be recreated by from_dict
+        after the bot restarts. Only task types in TASK_TYPES are stored.
+        :return: The task's arguments
+        """
+        return {}
+
+    @classmethod
+    def from_dict(cls, data: dict, bot_instance: "Bot.Bot", delay: float) -> "ScheduledTask":
+        """
+        Recreates a task stored using to_dict
+        :param data: The dict returned by to_dict
+        :param bot_instance: The bot instance
+        :param delay: The delay before the recreated task should be executed
+        :return: The recreated task
+        """
+        return cls(delay)
 
     async def execute_task(self):
         pass
@@ -25,14 +58,11 @@ class ScheduledTask:
 
 class RepeatingScheduledTask(ScheduledTask):
 
-    def __init__(self, scheduler: "Scheduler.Scheduler", plugin: BasePlugin, delay: int = 30):
+    def __init__(self, scheduler: "Scheduler.Scheduler", plugin: BasePlugin, delay: float = 30):
         ScheduledTask.__init__(self, delay)
         self.scheduler = scheduler
         self.plugin = plugin
-
-    async def execute_task(self):
-        self.created = time.time()
-        self.scheduler.add_task(self, self.plugin)
+        self.schedule = FixedRateSchedule(delay)
 
 
 class RepeatingScheduledTaskWrapper(RepeatingScheduledTask):
@@ -42,22 +72,25 @@ class RepeatingScheduledTaskWrapper(RepeatingScheduledTask):
         self.task = task
         self.scheduler = scheduler
 
-    def check_task(self):
-        return self.task.check_task()
-
     async def execute_task(self):
-        await RepeatingScheduledTask.execute_task(self)
         await self.task.execute_task()
 
 
 class MessageScheduledTask(ScheduledTask):
 
-    def __init__(self, destination: discord.Object, message: str, bot_instance: "Bot.Bot", delay: int = 30):
+    def __init__(self, destination: discord.Object, message: str, bot_instance: "Bot.Bot", delay: float = 30):
         ScheduledTask.__init__(self, delay)
         self.destination = destination
         self.message = message
         self.bot = bot_instance
 
+    def to_dict(self) -> dict:
+        return {"destination": self.destination.id, "message": self.message}
+
+    @classmethod
+    def from_dict(cls, data: dict, bot_instance: "Bot.Bot", delay: float) -> "MessageScheduledTask":
+        return cls(discord.Object(id=data["destination"]), data["message"], bot_instance, delay)
+
     async def execute_task(self):
         await self.bot.send_message(self.destination, self.message)
 
@@ -70,24 +103,30 @@ class RepeatingMessageScheduledTask(RepeatingScheduledTask, MessageScheduledTask
                  bot_instance: "Bot",
                  scheduler: "Scheduler",
                  plugin: BasePlugin,
-                 delay: int = 30):
+                 delay: float = 30):
         RepeatingScheduledTask.__init__(self, scheduler, plugin, delay)
         MessageScheduledTask.__init__(self, destination, message, bot_instance, delay)
 
     async def execute_task(self):
-        await RepeatingMessageScheduledTask.execute_task(self)
         await MessageScheduledTask.execute_task(self)
 
 
 class AddRoleScheduledTask(ScheduledTask):
 
-    def __init__(self, user_id: str, server_id: str, role_id: str, bot_instance: "Bot.Bot", delay: int = 30):
+    def __init__(self, user_id: str, server_id: str, role_id: str, bot_instance: "Bot.Bot", delay: float = 30):
         ScheduledTask.__init__(self, delay)
         self.user_id = user_id
         self.server_id = server_id
         self.role_id = role_id
         self.bot = bot_instance
 
+    def to_dict(self) -> dict:
+        return {"user_id": self.user_id, "server_id": self.server_id, "role_id": self.role_id}
+
+    @classmethod
+    def from_dict(cls, data: dict, bot_instance: "Bot.Bot", delay: float) -> "AddRoleScheduledTask":
+        return cls(data["user_id"], data["server_id"], data["role_id"], bot_instance, delay)
+
     async def execute_task(self):
         await ScheduledTask.execute_task(self)
         server = find(lambda s: s.id == self.server_id, self.bot.servers)
@@ -97,13 +136,20 @@ class AddRoleScheduledTask(ScheduledTask):
 
 class RemoveRoleScheduledTask(ScheduledTask):
 
-    def __init__(self, user_id: str, server_id: str, role_id: str, bot_instance: "Bot.Bot", delay: int = 30):
+    def __init__(self, user_id: str, server_id: str, role_id: str, bot_instance: "Bot.Bot", delay: float = 30):
         ScheduledTask.__init__(self, delay)
         self.user_id = user_id
         self.server_id = server_id
         self.role_id = role_id
         self.bot = bot_instance
 
+    def to_dict(self) -> dict:
+        return {"user_id": self.user_id, "server_id": self.server_id, "role_id": self.role_id}
+
+    @classmethod
+    def from_dict(cls, data: dict, bot_instance: "Bot.Bot", delay: float) -> "RemoveRoleScheduledTask":
+        return cls(data["user_id"], data["server_id"], data["role_id"], bot_instance, delay)
+
     async def execute_task(self):
         await ScheduledTask.execute_task(self)
         server = find(lambda s: s.id == self.server_id, self.bot.servers)
@@ -113,10 +159,27 @@ class RemoveRoleScheduledTask(ScheduledTask):
 
 class GameUpdateScheduledTask(ScheduledTask):
 
-    def __init__(self, game: str, bot: "Bot.Bot", delay: int = 30):
+    def __init__(self, game: str, bot: "Bot.Bot", delay: float = 30):
         ScheduledTask.__init__(self, delay)
         self.game = game
         self.bot = bot
 
     async def execute_task(self):
         await self.bot.change_presence(game=discord.Game(name=self.game))
+
+
+# Task types that are stored so they survive restarts, by name. Subclasses aren't stored unless they are added too.
+TASK_TYPES = {
+    "MessageScheduledTask": MessageScheduledTask,
+    "AddRoleScheduledTask": AddRoleScheduledTask,
+    "RemoveRoleScheduledTask": RemoveRoleScheduledTask
+}  # type: Dict[str, Type[ScheduledTask]]
+
+
+def register_task_type(task_type: Type[ScheduledTask]):
+    """
+    Adds a task type to the types that are stored so they survive restarts.
+    The type must implement to_dict and from_dict, and its name must be unique.
+    :param task_type: The task type to add
+    """
+    TASK_TYPES[task_type.__name__] = task_type
@@ -1,45 +1,375 @@
 import asyncio
+import collections
+import heapq
+import itertools
+import time
+from typing import Deque, Dict, List, Tuple
 
 from .Plugin import BasePlugin
-from .ScheduledTask import ScheduledTask
+from .ScheduledTask import ScheduledTask, TASK_TYPES
+from .Schedules import Schedule, SCHEDULE_TYPES
+from .TaskStore import TaskStore
 
 __author__ = 'Riley Flynn (nint8835)'
 
+# The number of recent executions that lateness statistics are calculated from
+LATENESS_SAMPLES = 1000
+
+# Cancelled tasks are left on the heap until they reach the top of it, unless there are more of them than this
+# fraction of the heap, in which case they are all removed at once
+CANCELLED_FRACTION = 0.5
+
+
+class TaskHandle:
+
+    """
+    Returned by Scheduler.add_task, so the plugin that added a task can cancel it
+    """
+
+    def __init__(self, scheduler: "Scheduler", entry: dict):
+        self._scheduler = scheduler
+        self._entry = entry
+
+    @property
+    def task(self) -> ScheduledTask:
+        """
+        :return: The task the handle is for
+        """
+        return self._entry["task"]
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        :return: Whether the task has been cancelled, either through the handle or by its plugin being disabled
+        """
+        return self._entry.get("cancelled", False)
+
+    def cancel(self):
+        """
+        Cancels the task, so it won't be executed again, and removes it from the stored tasks.
+        A task that is being executed is allowed to finish.
+        """
+        self._scheduler.cancel_task(self)
+
 
 class Scheduler:
 
+    """
+    Runs ScheduledTasks once their delay has passed.
+    Pending tasks are kept in a heap ordered by deadline, and a single timer on the event loop wakes the scheduler at the
+    earliest deadline, so pending tasks cost nothing while they wait and tasks run on time rather than on the next tick.
+    Due tasks are executed concurrently, up to a limit, so a slow task doesn't hold up the others. Each task has a time
+    limit, and exceptions raised by a task are logged to its plugin's logger without affecting other tasks.
+    Tasks of the types in TASK_TYPES are also kept in a TaskStore until they have been executed, and are added again by
+    load_tasks when the bot restarts.
+    Tasks with a schedule are put back on the heap with their next deadline each time they finish executing, rather than
+    being added again as new tasks.
+    Cancelled tasks are only marked as cancelled, and skipped when they come off the heap, so cancelling a task doesn't
+    have to search the heap for it. The tasks of each plugin are also indexed, so disabling a plugin only has to look at
+    that plugin's tasks.
+    """
+
     def __init__(self, bot_instance):
         self.bot = bot_instance
-        self.tasks = []
-        self.bot.EventManager.loop.create_task(self.handle_tasks())
+        self.loop = self.bot.EventManager.loop
+        # (deadline, insertion order, task entry) tuples, earliest deadline first. Tasks with the same deadline run in
+        # the order they were added, and entries never have to be compared with each other.
+        self._heap = []  # type: List[Tuple[float, int, dict]]
+        self._counter = itertools.count()
+        # The timer for the earliest deadline, and the deadline it was set for
+        self._timer = None  # type: asyncio.TimerHandle
+        self._timer_deadline = 0.0
+        # (deadline, task entry) tuples for tasks that are due, waiting for one of the running tasks to finish
+        self._due = collections.deque()  # type: Deque[Tuple[float, dict]]
+        # The entries of the tasks that are being executed
+        self._running = {}  # type: Dict[asyncio.Task, dict]
+        # The entries of each plugin's tasks that haven't finished or been cancelled, by plugin name and entry key
+        self._plugin_tasks = collections.defaultdict(dict)  # type: Dict[str, Dict[int, dict]]
+        self._keys = itertools.count()
+        # The number of cancelled entries still on the heap or waiting in _due
+        self._cancelled = 0
 
-    async def handle_tasks(self):
+        self._concurrency = max(1, self.bot.config.get("scheduler_concurrency", 10))
+        self._timeout = self.bot.config.get("scheduled_task_timeout", 60)
+
+        # Number of tasks from each plugin that raised an exception or timed out
+        self.failures = collections.Counter()  # type: Dict[str, int]
+        self.timeouts = collections.Counter()  # type: Dict[str, int]
+        # How late recent tasks started, in seconds after their deadline
+        self.lateness = collections.deque(maxlen=LATENESS_SAMPLES)  # type: Deque[float]
+
+        self._store = None  # type: TaskStore
+        store_path = self.bot.config.get("scheduled_task_path", "scheduled_tasks.json")
+        if store_path is not None:
+            self._store = TaskStore(store_path)
+        # The number of overdue stored tasks executed per second when the bot starts
+        self._catch_up_rate = self.bot.config.get("scheduler_catch_up_rate", 5)
+        self._tasks_loaded = False
+        self._closed = False
+
+    @property
+    def tasks(self) -> List[dict]:
         """
-        The loop that checks and executes tasks
+        :return: The tasks that haven't been executed yet, in no particular order
         """
-        while not self.bot.is_closed:
+        return [entry for _, _, entry in self._heap if not entry.get("cancelled", False)] + \
+               [entry for _, entry in self._due if not entry.get("cancelled", False)]
 
-            for task in self.tasks[:]:
-                if task["task"].check_task():
-                    self.tasks.remove(task)
-                    await task["task"].execute_task()
+    def _set_timer(self):
+        """
+        Makes sure the timer will wake the scheduler at the earliest deadline
+        """
+        while self._heap and self._heap[0][2].get("cancelled", False):
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+        if not self._heap or self._closed:
+            return
+        deadline = self._heap[0][0]
+        if self._timer is not None:
+            if self._timer_deadline <= deadline:
+                return
+            self._timer.cancel()
+        self._timer_deadline = deadline
+        # ScheduledTask deadlines use time.monotonic, the same clock as the event loop
+        self._timer = self.loop.call_at(deadline, self._collect_due_tasks)
 
-            await asyncio.sleep(1)
+    def _collect_due_tasks(self):
+        """
+        Takes the tasks that are due off the heap, and starts executing them
+        """
+        self._timer = None
+        if self.bot.is_closed:
+            return
+        now = self.loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, entry = heapq.heappop(self._heap)
+            if entry.get("cancelled", False):
+                self._cancelled -= 1
+            else:
+                self._due.append((deadline, entry))
+        self._start_due_tasks()
+        self._set_timer()
 
-    def add_task(self, task_instance: ScheduledTask, plugin: BasePlugin):
+    def _start_due_tasks(self):
+        """
+        Starts executing due tasks, as long as fewer than the maximum number of tasks are running
+        """
+        while self._due and len(self._running) < self._concurrency and not self._closed:
+            deadline, entry = self._due.popleft()
+            if entry.get("cancelled", False):
+                self._cancelled -= 1
+                continue
+            entry["running"] = True
+            task = self.loop.create_task(self._execute_task(entry, deadline))
+            self._running[task] = entry
+            task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task):
+        """
+        Starts the next due task once a task finishes
+        :param task: The task that finished
+        """
+        del self._running[task]
+        self._start_due_tasks()
+
+    async def _execute_task(self, entry: dict, deadline: float):
+        """
+        Executes a task, enforcing the time limit and logging any exception it raises
+        :param entry: The task entry
+        :param deadline: The time the task was due
+        """
+        self.lateness.append(self.loop.time() - deadline)
+        plugin = entry["plugin"]
+        # noinspection PyBroadException
+        try:
+            await asyncio.wait_for(entry["task"].execute_task(), timeout=self._timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.timeouts[plugin.manifest["name"]] += 1
+            plugin.logger.warning("Scheduled task {} timed out.".format(type(entry["task"]).__name__))
+        except Exception:
+            self.failures[plugin.manifest["name"]] += 1
+            plugin.logger.exception("Scheduled task {} raised an exception.".format(type(entry["task"]).__name__))
+
+        entry["running"] = False
+        schedule = entry["task"].schedule
+        if schedule is None:
+            self._plugin_tasks[plugin.manifest["name"]].pop(entry["key"], None)
+            # Tasks are only removed from the store once they've run, so a task interrupted by a restart runs again
+            if "id" in entry:
+                self._store.remove(entry["id"])
+        elif not entry.get("cancelled", False):
+            next_deadline = schedule.get_next_deadline(deadline, self.loop.time())
+            heapq.heappush(self._heap, (next_deadline, next(self._counter), entry))
+            self._set_timer()
+            if "id" in entry:
+                self._store.set_deadline(entry["id"], self._to_wall_time(next_deadline))
+
+    def _to_wall_time(self, deadline: float) -> float:
+        """
+        Converts a deadline on the event loop's clock to a wall clock time, for storing
+        :param deadline: The deadline
+        :return: The wall clock time
+        """
+        return time.time() + deadline - self.loop.time()
+
+    def get_lateness_stats(self) -> Dict[str, float]:
+        """
+        Gets statistics on how late recent tasks started after their deadlines, which grows when the event loop is
+        overloaded or too many tasks are due at once
+        :return: A dict containing the number of samples, and the mean, median, 99th percentile and maximum lateness in
+        seconds
+        """
+        samples = sorted(self.lateness)
+        if not samples:
+            return {"count": 0, "mean": 0.0, "median": 0.0, "p99": 0.0, "max": 0.0}
+        return {"count": len(samples),
+                "mean": sum(samples) / len(samples),
+                "median": samples[len(samples) // 2],
+                "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+                "max": samples[-1]}
+
+    def _add_entry(self, entry: dict) -> dict:
+        """
+        Adds a task entry to the index of its plugin's tasks
+        :param entry: The task entry
+        :return: The task entry
+        """
+        entry["key"] = next(self._keys)
+        self._plugin_tasks[entry["plugin"].manifest["name"]][entry["key"]] = entry
+        return entry
+
+    def _cancel_entry(self, entry: dict):
+        """
+        Marks a task entry as cancelled, leaving it to be skipped when it comes off the heap
+        :param entry: The task entry
+        """
+        if entry.get("cancelled", False):
+            return
+        entry["cancelled"] = True
+        # Running tasks aren't on the heap, and recurring ones aren't put back on it once they finish
+        if not entry.get("running", False):
+            self._cancelled += 1
+        if self._cancelled > len(self._heap) * CANCELLED_FRACTION:
+            self._remove_cancelled()
+
+    def _remove_cancelled(self):
+        """
+        Removes every cancelled entry from the heap and the due tasks
+        """
+        self._heap = [item for item in self._heap if not item[2].get("cancelled", False)]
+        heapq.heapify(self._heap)
+        self._due = collections.deque(item for item in self._due if not item[1].get("cancelled", False))
+        self._cancelled = 0
+
+    def add_task(self, task_instance: ScheduledTask, plugin: BasePlugin, schedule: Schedule = None) -> TaskHandle:
         """
         Adds a new task to the task list
         :param task_instance: The task to add
         :param plugin: The plugin that is adding the task
+        :param schedule: The schedule to execute the task on, replacing the task's own schedule. Tasks without a
+        schedule are executed once, after their delay.
+        :return: A handle that can be used to cancel the task
+        """
+        if schedule is not None:
+            task_instance.schedule = schedule
+        deadline = task_instance.get_deadline()
+        if task_instance.schedule is not None:
+            deadline = task_instance.schedule.get_first_deadline(task_instance)
+
+        entry = self._add_entry({"task": task_instance, "plugin": plugin})
+        if self._store is not None and TASK_TYPES.get(type(task_instance).__name__) is type(task_instance) and \
+                (task_instance.schedule is None or type(task_instance.schedule).__name__ in SCHEDULE_TYPES):
+            entry["id"] = self._store.add(task_instance, plugin, self._to_wall_time(deadline))
+        heapq.heappush(self._heap, (deadline, next(self._counter), entry))
+        self._set_timer()
+        return TaskHandle(self, entry)
+
+    def cancel_task(self, handle: TaskHandle):
+        """
+        Cancels a task, so it won't be executed again, and removes it from the stored tasks.
+        A task that is being executed is allowed to finish.
+        :param handle: The handle returned when the task was added
         """
-        self.tasks.append({"task": task_instance,
-                           "plugin": plugin})
+        entry = handle._entry
+        if entry.get("cancelled", False):
+            return
+        self._plugin_tasks[entry["plugin"].manifest["name"]].pop(entry["key"], None)
+        self._cancel_entry(entry)
+        if "id" in entry:
+            self._store.remove(entry["id"])
+
+    def load_tasks(self):
+        """
+        Adds the tasks stored before the bot was last stopped. This only needs to be called once, after the plugins are
+        loaded and the bot is connected.
+        Tasks that became due while the bot was stopped are executed in the order they were due, at the catch up rate
+        from the config, rather than all at once.
+        """
+        if self._store is None or self._tasks_loaded:
+            return
+        self._tasks_loaded = True
+
+        now = time.time()
+        overdue = 0
+        items = []
+        for row in self._store.get_tasks():
+            task_type = TASK_TYPES.get(row["type"])
+            plugin = self.bot.PluginManager.get_plugin(row["plugin"])
+            schedule = row.get("schedule")
+            schedule_type = SCHEDULE_TYPES.get(schedule["type"]) if schedule is not None else None
+            if task_type is None or plugin is None or (schedule is not None and schedule_type is None):
+                if task_type is None:
+                    missing = "task type"
+                elif plugin is None:
+                    missing = "plugin"
+                else:
+                    missing = "{} schedule type".format(schedule["type"])
+                # The task stays stored, in case what's missing is loaded again
+                self.bot.logger.warning("Not loading stored {} task from plugin {}, as the {} isn't loaded.".format(
+                    row["type"], row["plugin"], missing))
+                continue
+            delay = row["deadline"] - now
+            if delay <= 0:
+                delay = overdue / self._catch_up_rate
+                overdue += 1
+            task = task_type.from_dict(row["data"], self.bot, delay)
+            if schedule_type is not None:
+                task.schedule = schedule_type.from_dict(schedule["data"])
+            entry = self._add_entry({"task": task, "plugin": plugin, "id": row["id"]})
+            items.append((task.get_deadline(), next(self._counter), entry))
+
+        # Building the heap in one go is faster than adding tasks one at a time
+        self._heap.extend(items)
+        heapq.heapify(self._heap)
+        self._set_timer()
+        self.bot.logger.info("Loaded {} stored scheduled tasks, {} of which are overdue.".format(len(items), overdue))
+
+    def close(self):
+        """
+        Stops the timer, cancels the tasks being executed and writes any changes to the stored tasks to disk.
+        Stored tasks that were interrupted stay stored, and are executed again when the bot restarts.
+        """
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        running = list(self._running)
+        if running and not self.loop.is_closed():
+            for task in running:
+                task.cancel()
+            # Once the bot has stopped, the loop has to be run for the tasks to finish being cancelled
+            if not self.loop.is_running():
+                self.loop.run_until_complete(asyncio.gather(*running, return_exceptions=True))
+        if self._store is not None:
+            self._store.close()
 
     def remove_tasks_for_plugin(self, plugin: BasePlugin):
         """
-        Removes all tasks for a plugin
-        :param plugin: The plugin that is adding the task
+        Cancels all tasks for a plugin. This is called when the plugin is disabled. Stored tasks stay stored, and are
+        added again when the bot restarts.
+        :param plugin: The plugin whose tasks are cancelled
         """
-        for task in self.tasks[:]:
-            if task["plugin"] == plugin:
-                self.tasks.remove(task)
+        for entry in self._plugin_tasks.pop(plugin.manifest["name"], {}).values():
+            self._cancel_entry(entry)
@@ -0,0 +1,225 @@
+import datetime
+import math
+import time
+from typing import Dict, FrozenSet, Type
+
+from . import ScheduledTask
+
+__author__ = 'Riley Flynn (nint8835)'
+
+CRON_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *"
+}
+
+# How far ahead a cron expression is searched for its next time, so expressions that can never match, such as the
+# 30th of February, fail instead of searching forever
+CRON_SEARCH_LIMIT = datetime.timedelta(days=366 * 5)
+
+
+class Schedule:
+
+    """
+    Decides when a recurring task is executed next.
+    Deadlines are times on the monotonic clock used by the scheduler's event loop.
+    """
+
+    def get_first_deadline(self, task: "ScheduledTask.ScheduledTask") -> float:
+        """
+        Gets the time a task should first be executed at
+        :param task: The task
+        :return: The deadline
+        """
+        return task.get_deadline()
+
+    def get_next_deadline(self, deadline: float, finished: float) -> float:
+        """
+        Gets the time a task should be executed at next, after it has been executed
+        :param deadline: The time the task was due at
+        :param finished: The time the task finished executing
+        :return: The next deadline
+        """
+        raise NotImplementedError()
+
+    def to_dict(self) -> dict:
+        """
+        Converts the schedule into a dict that can be stored as JSON, so it can be recreated by from_dict
+        :return: The schedule's arguments
+        """
+        raise NotImplementedError()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Schedule":
+        """
+        Recreates a schedule stored using to_dict
+        :param data: The dict returned by to_dict
+        :return: The recreated schedule
+        """
+        return cls(**data)
+
+
+class FixedRateSchedule(Schedule):
+
+    """
+    Executes a task every period seconds, measured from when it was due rather than when it ran, so time spent
+    executing the task or waiting for the event loop doesn't add up. Periods missed entirely, such as when the task
+    takes longer than the period, are skipped.
+    """
+
+    def __init__(self, period: float):
+        """
+        Creates a new FixedRateSchedule
+        :param period: The number of seconds between executions
+        """
+        if period <= 0:
+            raise ValueError("The period must be greater than 0.")
+        self.period = period
+
+    def get_next_deadline(self, deadline: float, finished: float) -> float:
+        # Multiplying rather than repeatedly adding the period keeps rounding errors from building up
+        missed = max(0, math.floor((finished - deadline) / self.period))
+        return deadline + (missed + 1) * self.period
+
+    def to_dict(self) -> dict:
+        return {"period": self.period}
+
+
+class FixedDelaySchedule(Schedule):
+
+    """Executes a task again delay seconds after it finishes executing"""
+
+    def __init__(self, delay: float):
+        """
+        Creates a new FixedDelaySchedule
+        :param delay: The number of seconds between the end of one execution and the start of the next
+        """
+        if delay < 0:
+            raise ValueError("The delay can't be negative.")
+        self.delay = delay
+
+    def get_next_deadline(self, deadline: float, finished: float) -> float:
+        return finished + self.delay
+
+    def to_dict(self) -> dict:
+        return {"delay": self.delay}
+
+
+def parse_cron_field(field: str, minimum: int, maximum: int) -> FrozenSet[int]:
+    """
+    Parses a field of a cron expression
+    :param field: The field, made up of comma separated values, ranges (a-b), and steps (*/n or a-b/n)
+    :param minimum: The lowest value allowed in the field
+    :param maximum: The highest value allowed in the field
+    :return: The values the field matches
+    """
+    values = set()
+    for part in field.split(","):
+        part, slash, step = part.partition("/")
+        step = int(step or 1)
+        if step < 1:
+            raise ValueError("Invalid step in cron field {}.".format(field))
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            # a/n means every nth value starting at a
+            end = maximum if slash else start
+        if start < minimum or end > maximum or start > end:
+            raise ValueError("Cron field {} is out of range ({}-{}).".format(field, minimum, maximum))
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule(Schedule):
+
+    """
+    Executes a task at the times matched by a cron expression, in the machine's local time.
+    Expressions have the five standard fields (minute, hour, day of month, month and day of week, where 0 and 7 are
+    Sunday), or are one of the aliases such as @daily. As in cron, when both the day of month and day of week are
+    restricted, a day matching either one matches.
+    """
+
+    def __init__(self, expression: str):
+        """
+        Creates a new CronSchedule
+        :param expression: The cron expression
+        """
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression, expression).split()
+        if len(fields) != 5:
+            raise ValueError("Cron expressions must have 5 fields, but {} has {}.".format(expression, len(fields)))
+        self.minutes = parse_cron_field(fields[0], 0, 59)
+        self.hours = parse_cron_field(fields[1], 0, 23)
+        self.days = parse_cron_field(fields[2], 1, 31)
+        self.months = parse_cron_field(fields[3], 1, 12)
+        self.weekdays = frozenset(day % 7 for day in parse_cron_field(fields[4], 0, 7))
+        self._days_restricted = not fields[2].startswith("*")
+        self._weekdays_restricted = not fields[4].startswith("*")
+        # Fails now, rather than when the task is added, if the expression never matches
+        self.get_next_time(time.time())
+
+    def _day_matches(self, day: datetime.datetime) -> bool:
+        # Python counts weekdays from Monday, and cron from Sunday
+        day_matches = day.day in self.days
+        weekday_matches = (day.weekday() + 1) % 7 in self.weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return day_matches or weekday_matches
+        return day_matches and weekday_matches
+
+    def get_next_time(self, after: float) -> float:
+        """
+        Gets the first time matched by the expression after a time
+        :param after: The wall clock time to search from
+        :return: The wall clock time
+        """
+        current = datetime.datetime.fromtimestamp(after).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = current + CRON_SEARCH_LIMIT
+        # Each check skips straight to the start of the next month, day or hour that could match
+        while current < limit:
+            if current.month not in self.months:
+                current = (current.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(current):
+                current = current.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif current.hour not in self.hours:
+                current = current.replace(minute=0) + datetime.timedelta(hours=1)
+            elif current.minute not in self.minutes:
+                current += datetime.timedelta(minutes=1)
+            else:
+                return current.timestamp()
+        raise ValueError("The cron expression {} never matches.".format(self.expression))
+
+    def _to_deadline(self, after: float) -> float:
+        """
+        Gets the deadline for the first time matched by the expression after a time
+        :param after: The monotonic time to search from
+        :return: The deadline
+        """
+        # The difference between the wall clock and the monotonic clock, which changes if the system clock is changed
+        offset = time.time() - time.monotonic()
+        return self.get_next_time(after + offset) - offset
+
+    def get_first_deadline(self, task: "ScheduledTask.ScheduledTask") -> float:
+        return self._to_deadline(time.monotonic())
+
+    def get_next_deadline(self, deadline: float, finished: float) -> float:
+        # Searching from the later of the two means a task that finishes quickly, or that the event loop woke slightly
+        # early, isn't executed twice for the same time
+        return self._to_deadline(max(deadline, finished))
+
+    def to_dict(self) -> dict:
+        return {"expression": self.expression}
+
+
+# Schedules that can be stored along with persistent tasks, by name
+SCHEDULE_TYPES = {
+    "FixedRateSchedule": FixedRateSchedule,
+    "FixedDelaySchedule": FixedDelaySchedule,
+    "CronSchedule": CronSchedule
+}  # type: Dict[str, Type[Schedule]]
@@ -0,0 +1,147 @@
+import itertools
+import os
+from typing import Dict, List
+
+from libraries.JSONDB.Codecs import get_codec
+from libraries.JSONDB.Journal import load_json, read_entries, write_json_atomic
+from .Plugin import BasePlugin
+from .ScheduledTask import ScheduledTask
+
+__author__ = 'Riley Flynn (nint8835)'
+
+# The journal is compacted once it has more entries than this, or than there are stored tasks if there are more
+COMPACT_AFTER = 1000
+
+
+class TaskStore:
+
+    """
+    Stores scheduled tasks on disk, so they can be added to the scheduler again after the bot restarts.
+    Tasks are stored with the wall clock time they are next due at, as the monotonic clock used while the bot is running
+    starts over when the machine restarts.
+    Stored tasks are kept in a dict by id, and each change is appended to a journal as a single line, so adding,
+    rescheduling or removing a task takes the same time however many tasks are stored. Once the journal has more entries
+    than there are stored tasks, the tasks are written to the task file and the journal is emptied. Journal entries can
+    be applied more than once without changing the result, so a crash part way through compacting loses nothing.
+    """
+
+    def __init__(self, path: str):
+        """
+        Creates a new TaskStore
+        :param path: The path of the task file
+        """
+        self.path = path
+        self.journal_path = path + ".journal"
+        self._codec = get_codec()
+        self._tasks = {}  # type: Dict[int, dict]
+        self._file = None
+        self._entries = 0
+
+        if os.path.isfile(self.path):
+            for row in load_json(self.path, self._codec):
+                self._tasks[row["id"]] = row
+        for entry in read_entries(self.journal_path, self._codec):
+            self._apply(entry)
+        if not os.path.isfile(self.path) or (os.path.isfile(self.journal_path) and
+                                             os.path.getsize(self.journal_path) > 0):
+            # Also drops any entry that was only partly written, which new entries would otherwise be appended to
+            self._compact()
+        else:
+            self._file = open(self.journal_path, "ab")
+        self._ids = itertools.count(max(self._tasks, default=-1) + 1)
+
+    def _apply(self, entry: dict):
+        """
+        Applies a journal entry to the stored tasks
+        :param entry: The entry to apply
+        """
+        if entry["op"] == "add":
+            self._tasks[entry["row"]["id"]] = entry["row"]
+        elif entry["op"] == "deadline":
+            if entry["id"] in self._tasks:
+                self._tasks[entry["id"]]["deadline"] = entry["deadline"]
+        elif entry["op"] == "remove":
+            self._tasks.pop(entry["id"], None)
+
+    def _append(self, entry: dict):
+        """
+        Applies an entry to the stored tasks and writes it to the journal, compacting the journal if it has grown too
+        large
+        :param entry: The entry to write
+        """
+        self._apply(entry)
+        self._file.write(self._codec.encode(entry) + b"\n")
+        self._file.flush()
+        self._entries += 1
+        if self._entries > max(COMPACT_AFTER, len(self._tasks)):
+            self._compact()
+
+    def _compact(self):
+        """
+        Writes every stored task to the task file and empties the journal
+        """
+        if self._file is not None:
+            self._file.close()
+        write_json_atomic(self.path, list(self._tasks.values()), self._codec)
+        self._file = open(self.journal_path, "wb")
+        self._entries = 0
+
+    def add(self, task: ScheduledTask, plugin: BasePlugin, deadline: float) -> int:
+        """
+        Stores a task
+        :param task: The task to store, which must be one of the types in TASK_TYPES, with a schedule from
+        SCHEDULE_TYPES if it has one
+        :param plugin: The plugin that added the task
+        :param deadline: The wall clock time the task is due at
+        :return: The id of the stored task
+        """
+        task_id = next(self._ids)
+        schedule = None
+        if task.schedule is not None:
+            schedule = {"type": type(task.schedule).__name__, "data": task.schedule.to_dict()}
+        self._append({"op": "add",
+                      "row": {"id": task_id,
+                              "type": type(task).__name__,
+                              "plugin": plugin.manifest["name"],
+                              "deadline": deadline,
+                              "schedule": schedule,
+                              "data": task.to_dict()}})
+        return task_id
+
+    def set_deadline(self, task_id: int, deadline: float):
+        """
+        Changes the time a stored task is due at, after a recurring task has been executed
+        :param task_id: The id of the task
+        :param deadline: The wall clock time the task is next due at
+        """
+        if task_id in self._tasks:
+            self._append({"op": "deadline", "id": task_id, "deadline": deadline})
+
+    def remove(self, task_id: int):
+        """
+        Removes a stored task
+        :param task_id: The id of the task
+        """
+        if task_id in self._tasks:
+            self._append({"op": "remove", "id": task_id})
+
+    def get_tasks(self) -> List[dict]:
+        """
+        :return: The stored tasks, as dicts containing the task's id, type name, plugin name, deadline, schedule and
+        arguments, ordered by deadline
+        """
+        return sorted(self._tasks.values(), key=lambda row: row["deadline"])
+
+    def close(self):
+        """
+        Closes the journal. Every change has already been written to disk.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "TaskStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,3 +1,7 @@
+import json
+import os
+from typing import Optional
+
 import discord
 
 from .Types import DiscordChannel
@@ -5,3 +9,21 @@ from .Types import DiscordChannel
 
 def channel_is_private(channel: DiscordChannel) -> bool:
     return isinstance(channel, discord.abc.PrivateChannel)
+
+
+def get_channel_server(channel: DiscordChannel) -> Optional[discord.Guild]:
+    return None if channel_is_private(channel) else channel.guild
+
+
+def write_json_atomic(path: str, data):
+    """
+    Writes data to a JSON file, replacing the file in one step so a crash part way through can't leave it corrupted
+    :param path: The path of the file to write
+    :param data: The data to write
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
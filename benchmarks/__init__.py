@@ -0,0 +1 @@
+__author__ = 'Riley Flynn (nint8835)'
@@ -0,0 +1,69 @@
+"""
+Benchmarks finding the commands matching a message in CommandRegistry, which used to check every registered command and
+now looks them up by name.
+Run from the root of the repository with: python -m benchmarks.command_lookup
+"""
+import argparse
+import types
+
+# The bot's modules import each other, and can only be imported starting from Bot, as the bot itself does
+import NintbotForDiscord.Bot
+from NintbotForDiscord.CommandRegistry import CommandRegistry
+
+from .common import format_time, measure
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+def scan_commands(commands: list, command_name: str) -> list:
+    """
+    Finds the classic commands with a name the way CommandRegistry used to, by checking every command
+    :param commands: Every registered classic command
+    :param command_name: The name to find
+    :return: The commands with that name
+    """
+    return [command for command in commands if command["command"] == command_name]
+
+
+def scan_modern_commands(commands: list, content: str) -> list:
+    """
+    Finds the modern commands matching a message the way CommandRegistry used to, by matching every command's regex
+    :param commands: Every registered modern command
+    :param content: The message content, with the prefix removed
+    :return: A list of tuples of each matching command and its arguments
+    """
+    return [(command, command["command"].findall(content)[0]) for command in commands
+            if command["command"].match(content)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000],
+                        help="The numbers of classic and of modern commands to register")
+    args = parser.parse_args()
+
+    plugin = types.SimpleNamespace(manifest={"name": "Benchmark"})
+    print("N classic and N modern commands registered, looking up the last one registered:")
+    for size in args.sizes:
+        registry = CommandRegistry(None)
+        for i in range(size):
+            registry.register_command("command{}".format(i), "", None, plugin)
+            registry.register_modern_command(r"^modern{} ([1-9]\d*)$".format(i), "", None, plugin, None)
+
+        name = "command{}".format(size - 1)
+        content = "modern{} 25".format(size - 1)
+        assert registry.get_info_for_command(name) == scan_commands(registry._commands, name)
+        assert registry.match_modern_commands(content) == scan_modern_commands(registry._modern_commands, content)
+
+        number = max(10, 100000 // size)
+        print("  N={}".format(size))
+        print("    classic  scan {:>10}  index {:>10}".format(
+            format_time(measure(lambda: scan_commands(registry._commands, name), number)),
+            format_time(measure(lambda: registry.get_info_for_command(name), number))))
+        print("    modern   scan {:>10}  index {:>10}".format(
+            format_time(measure(lambda: scan_modern_commands(registry._modern_commands, content), number)),
+            format_time(measure(lambda: registry.match_modern_commands(content), number))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Benchmarks splitting commands into arguments, which used to always use shlex and now only does for commands containing
+quotes, escapes or unusual whitespace.
+Run from the root of the repository with: python -m benchmarks.command_parsing
+"""
+import argparse
+import shlex
+
+from NintbotForDiscord.CommandParser import get_command_name, split_args
+
+from .common import format_time, measure
+
+__author__ = 'Riley Flynn (nint8835)'
+
+COMMANDS = ["roll 2d6",
+            "quote add something somebody said today Bob",
+            "quote add \"something somebody said\" Bob"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("commands", nargs="*", default=COMMANDS, help="The commands to split, without the prefix")
+    args = parser.parse_args()
+
+    for command in args.commands:
+        assert split_args(command) == shlex.split(command)
+        print(repr(command))
+        print("  shlex.split       {}".format(format_time(measure(lambda: shlex.split(command), 10000))))
+        print("  split_args        {}".format(format_time(measure(lambda: split_args(command), 10000))))
+        print("  get_command_name  {}".format(format_time(measure(lambda: get_command_name(command), 10000))))
+
+
+if __name__ == "__main__":
+    main()
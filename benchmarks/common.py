@@ -0,0 +1,72 @@
+import datetime
+import gc
+import random
+import time
+from typing import Callable, List
+
+__author__ = 'Riley Flynn (nint8835)'
+
+WORDS = ("the", "a", "bot", "server", "never", "always", "said", "why", "would", "you", "do", "that", "again", "game",
+         "tomorrow", "pizza", "music", "broke", "everything", "channel", "voice", "meme", "honestly", "probably")
+
+
+def measure(func: Callable, number: int=1, repeat: int=5) -> float:
+    """
+    Times a function, taking the best of several runs so that other activity on the machine affects the result less
+    :param func: The function to time, called with no arguments
+    :param number: The number of times to call the function in each run
+    :param repeat: The number of runs
+    :return: The time taken by a single call, in seconds
+    """
+    best = float("inf")
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best / number
+
+
+def measure_once(func: Callable):
+    """
+    Times a single call of a function, for operations too slow or too stateful to repeat
+    :param func: The function to time, called with no arguments
+    :return: A tuple of the time taken in seconds and the function's return value
+    """
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def format_time(seconds: float) -> str:
+    """
+    Formats a duration with a unit suited to its size
+    :param seconds: The duration, in seconds
+    :return: The formatted duration, such as "1.30us" or "23.1ms"
+    """
+    if seconds < 1e-3:
+        return "{:.2f}us".format(seconds * 1e6)
+    if seconds < 1:
+        return "{:.1f}ms".format(seconds * 1e3)
+    return "{:.2f}s".format(seconds)
+
+
+def make_quote_rows(count: int, rng: random.Random, authors: int=300) -> List[dict]:
+    """
+    Creates rows like the ones stored by the Quotes plugin
+    :param count: The number of rows to create
+    :param rng: The random number generator to use
+    :param authors: The number of different authors
+    :return: The rows
+    """
+    start = datetime.datetime(2017, 1, 1)
+    return [{"msg": " ".join(rng.choice(WORDS) for _ in range(rng.randrange(8, 20))),
+             "author": "Author {}".format(rng.randrange(authors)),
+             "added_at": (start + datetime.timedelta(seconds=rng.randrange(86400 * 365))).strftime("%x %X")}
+            for _ in range(count)]
@@ -0,0 +1,64 @@
+"""
+Benchmarks the memory used by a JSONDatabase with compact rows, and what they cost in speed.
+Run from the root of the repository with: python -m benchmarks.compact_rows
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+
+from libraries.JSONDB import JSONDatabase, SelectionMode
+
+from .common import format_time, make_quote_rows, measure, measure_once
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+def measure_memory(path: str, compact_rows: bool):
+    """
+    Measures the memory used by a database's rows
+    :param path: The path of the database file
+    :param compact_rows: Whether to open the database with compact rows
+    :return: A tuple of the memory allocated while loading that was still in use afterwards, and the most memory in use
+    at once while loading, in bytes
+    """
+    gc.collect()
+    tracemalloc.start()
+    db = JSONDatabase(path, compact_rows=compact_rows)
+    gc.collect()
+    resident, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del db
+    return resident, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000, help="The number of rows in the database")
+    parser.add_argument("--seed", type=int, default=0, help="The seed used to generate the rows")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quotes.json")
+        with open(path, "w") as f:
+            json.dump(make_quote_rows(args.rows, random.Random(args.seed)), f)
+
+        print("{} quote rows:".format(args.rows))
+        print("{:<14} {:>10} {:>10} {:>10} {:>10} {:>10}"
+              .format("", "resident", "peak", "load", "scan", "save"))
+        for name, compact_rows in (("dict rows", False), ("compact rows", True)):
+            resident, peak = measure_memory(path, compact_rows)
+            load_time, db = measure_once(lambda: JSONDatabase(path, compact_rows=compact_rows))
+            scan_time = measure(lambda: db.select(SelectionMode.VALUE_EQUALS, "author", "Author 7"), 3)
+            save_time, _ = measure_once(db.save_db)
+            print("{:<14} {:>8.1f}MB {:>8.1f}MB {:>10} {:>10} {:>10}"
+                  .format(name, resident / 2 ** 20, peak / 2 ** 20, format_time(load_time), format_time(scan_time),
+                          format_time(save_time)))
+            del db
+
+
+if __name__ == "__main__":
+    main()
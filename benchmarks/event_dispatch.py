@@ -0,0 +1,69 @@
+"""
+Benchmarks finding the handlers for an event in EventManager, which used to scan every registered handler and now
+looks them up by event type.
+Run from the root of the repository with: python -m benchmarks.event_dispatch
+"""
+import argparse
+import asyncio
+import logging
+import types
+
+# The bot's modules import each other, and can only be imported starting from Bot, as the bot itself does
+import NintbotForDiscord.Bot
+from NintbotForDiscord.Enums import EventTypes
+from NintbotForDiscord.EventManager import EventManager
+
+from .common import format_time, measure
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+def linear_scan(handlers: list, event_type: EventTypes) -> list:
+    """
+    Finds the handlers for an event the way EventManager used to, by checking every registered handler
+    :param handlers: Every registered handler
+    :param event_type: The type of event to find handlers for
+    :return: The handlers for that event type
+    """
+    return [handler for handler in handlers if handler["type"] == event_type]
+
+
+async def handler(args):
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plugins", type=int, default=50, help="The number of plugins registering handlers")
+    parser.add_argument("--handlers", type=int, default=500, help="The total number of handlers")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    bot = types.SimpleNamespace(config={}, is_closed=False, logger=logging.getLogger("benchmark"))
+    manager = EventManager(bot)
+
+    event_types = list(EventTypes)
+    plugins = [types.SimpleNamespace(manifest={"name": "Plugin {}".format(i)}) for i in range(args.plugins)]
+    handlers = []
+    for i in range(args.handlers):
+        event_type = event_types[i % len(event_types)]
+        plugin = plugins[i % len(plugins)]
+        manager.register_handler(event_type, handler, plugin)
+        handlers.append({"type": event_type, "handler": handler, "plugin": plugin})
+
+    event_type = EventTypes.MESSAGE_SENT
+    assert list(manager.get_handlers(event_type)) == linear_scan(handlers, event_type)
+    print("{} plugins, {} handlers over {} event types, finding the handlers for one event type:"
+          .format(args.plugins, args.handlers, len(event_types)))
+    print("  linear scan  {}".format(format_time(measure(lambda: linear_scan(handlers, event_type), 1000))))
+    print("  index        {}".format(format_time(measure(lambda: manager.get_handlers(event_type), 1000))))
+
+    for worker in manager._workers:
+        worker.cancel()
+    loop.run_until_complete(asyncio.gather(*manager._workers, return_exceptions=True))
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
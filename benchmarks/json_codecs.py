@@ -0,0 +1,51 @@
+"""
+Benchmarks opening, first using and saving a JSONDatabase with each installed codec, with and without lazy loading.
+Run from the root of the repository with: python -m benchmarks.json_codecs
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from libraries.JSONDB import JSONDatabase, SelectionMode
+from libraries.JSONDB.Codecs import CODECS
+
+from .common import format_time, make_quote_rows, measure_once
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[60000, 600000],
+                        help="The numbers of rows in the databases to test")
+    parser.add_argument("--seed", type=int, default=0, help="The seed used to generate the rows")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quotes.json")
+        for count in args.rows:
+            with open(path, "w") as f:
+                json.dump(make_quote_rows(count, random.Random(args.seed)), f)
+            print("{} quote rows, {:.1f} MB:".format(count, os.path.getsize(path) / 2 ** 20))
+            print("  {:<14} {:>10} {:>13} {:>10}".format("", "open", "first select", "save"))
+
+            selected = None
+            for lazy in (False, True):
+                for codec in CODECS:
+                    open_time, db = measure_once(lambda: JSONDatabase(path, codec=codec, lazy=lazy))
+                    select_time, selection = measure_once(
+                        lambda: db.select(SelectionMode.VALUE_EQUALS, "author", "Author 7"))
+                    # Every codec and mode has to load the same rows
+                    assert selected is None or selection.rows == selected
+                    selected = selection.rows
+                    save_time, _ = measure_once(db.save_db)
+                    print("  {:<14} {:>10} {:>13} {:>10}".format(codec + (" lazy" if lazy else ""),
+                                                                 format_time(open_time), format_time(select_time),
+                                                                 format_time(save_time)))
+                    del db, selection
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmarks JSONDatabase selections with and without hash and sorted indexes.
+Run from the root of the repository with: python -m benchmarks.json_indexes
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from libraries.JSONDB import IndexType, JSONDatabase, SelectionMode
+
+from .common import format_time, measure, measure_once
+
+__author__ = 'Riley Flynn (nint8835)'
+
+# Values of n are between 0 and this, so the range selections below each select about 0.5% of the rows
+N_RANGE = 1000000
+
+
+def make_rows(count: int, rng: random.Random) -> list:
+    """
+    Creates rows like the ones stored by CustomCommands
+    :param count: The number of rows to create
+    :param rng: The random number generator to use
+    :return: The rows
+    """
+    return [{"command": "command{}".format(rng.randrange(count // 2)),
+             "n": rng.randrange(N_RANGE),
+             "response": "A response to a custom command"} for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000, help="The number of rows in the database")
+    parser.add_argument("--inserts", type=int, default=10000, help="The number of rows to insert with indexes")
+    parser.add_argument("--seed", type=int, default=0, help="The seed used to generate the rows")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    selections = [("=  command", SelectionMode.VALUE_EQUALS, "command", "command{}".format(args.rows // 4)),
+                  ("<  n", SelectionMode.VALUE_LESS_THAN, "n", N_RANGE // 200),
+                  (">= n", SelectionMode.VALUE_GREATER_THAN_OR_EQUAL, "n", N_RANGE - N_RANGE // 200),
+                  ("!= missing", SelectionMode.VALUE_NOT_EQUAL, "command", "missing")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "db.json")
+        with open(path, "w") as f:
+            json.dump(make_rows(args.rows, rng), f)
+        db = JSONDatabase(path)
+
+        results = {}
+        scan_times = {}
+        for name, mode, key, value in selections:
+            results[name] = db.select(mode, key, value).rows
+            scan_times[name] = measure(lambda: db.select(mode, key, value), 3)
+
+        build_time = 0.0
+        for key, index_type in (("command", IndexType.HASH), ("n", IndexType.SORTED), ("command", IndexType.SORTED)):
+            elapsed, _ = measure_once(lambda: db.create_index(key, index_type))
+            build_time += elapsed
+
+        print("{} rows, per select call:".format(args.rows))
+        for name, mode, key, value in selections:
+            rows = db.select(mode, key, value).rows
+            assert rows == results[name]
+            print("  {:<10} {:>7} hits  scan {:>9}  index {:>9}".format(
+                name, len(rows), format_time(scan_times[name]),
+                format_time(measure(lambda: db.select(mode, key, value), 3))))
+        print("Building the hash index on command and sorted indexes on n and command took {}"
+              .format(format_time(build_time)))
+
+        new_rows = make_rows(args.inserts, rng)
+
+        def insert():
+            for row in new_rows:
+                db.insert(row, save_after=False)
+
+        print("Inserting {} rows with those indexes took {}".format(args.inserts, format_time(measure_once(insert)[0])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmarks the Scheduler with many pending tasks, against the old scheduler that checked every task once a second.
+Run from the root of the repository with: python -m benchmarks.scheduler
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+import types
+
+# The bot's modules import each other, and can only be imported starting from Bot, as the bot itself does
+import NintbotForDiscord.Bot
+from NintbotForDiscord.ScheduledTask import ScheduledTask
+from NintbotForDiscord.Scheduler import Scheduler
+
+from .common import format_time, measure_once
+
+__author__ = 'Riley Flynn (nint8835)'
+
+# The delay of the tasks that stay pending for the whole benchmark
+FAR_FUTURE = 10 ** 6
+
+
+class ProbeTask(ScheduledTask):
+
+    """A task that records how long after its deadline it was executed"""
+
+    def __init__(self, delay: float, lateness: list):
+        super(ProbeTask, self).__init__(delay)
+        self._lateness = lateness
+
+    async def execute_task(self):
+        self._lateness.append(time.monotonic() - self.get_deadline())
+
+
+class PollingScheduler:
+
+    """The scheduler as it was before deadlines were kept in a heap, waking every second to check every task"""
+
+    def __init__(self, bot_instance):
+        self.bot = bot_instance
+        self.tasks = []
+
+    async def handle_tasks(self):
+        while not self.bot.is_closed:
+            for task in self.tasks[:]:
+                if task["task"].check_task():
+                    self.tasks.remove(task)
+                    await task["task"].execute_task()
+            await asyncio.sleep(1)
+
+    def add_task(self, task_instance: ScheduledTask, plugin):
+        self.tasks.append({"task": task_instance, "plugin": plugin})
+
+
+def run(scheduler_class, pending: int, probes: int, duration: float, rng: random.Random) -> dict:
+    """
+    Runs a scheduler with many pending tasks, and probe tasks with random delays
+    :param scheduler_class: Scheduler or PollingScheduler
+    :param pending: The number of tasks that stay pending for the whole run
+    :param probes: The number of probe tasks
+    :param duration: How long to run the scheduler for, in seconds
+    :param rng: The random number generator used to pick the probes' delays
+    :return: A dict of the time taken to add the tasks, the CPU time used while running, and the probes' lateness
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    bot = types.SimpleNamespace(EventManager=types.SimpleNamespace(loop=loop),
+                                config={"scheduled_task_path": None},
+                                is_closed=False,
+                                logger=logging.getLogger("benchmark"))
+    plugin = types.SimpleNamespace(manifest={"name": "Benchmark"}, logger=logging.getLogger("benchmark"))
+    scheduler = scheduler_class(bot)
+    polling_task = None
+    if scheduler_class is PollingScheduler:
+        polling_task = loop.create_task(scheduler.handle_tasks())
+
+    def add_pending():
+        for _ in range(pending):
+            scheduler.add_task(ScheduledTask(FAR_FUTURE), plugin)
+
+    add_time, _ = measure_once(add_pending)
+    lateness = []
+    for _ in range(probes):
+        scheduler.add_task(ProbeTask(rng.uniform(0.05, duration - 0.5), lateness), plugin)
+
+    start = time.process_time()
+    loop.run_until_complete(asyncio.sleep(duration))
+    cpu_time = time.process_time() - start
+
+    bot.is_closed = True
+    if polling_task is not None:
+        loop.run_until_complete(polling_task)
+    else:
+        scheduler.remove_tasks_for_plugin(plugin)
+    loop.close()
+    return {"add": add_time, "cpu": cpu_time, "lateness": lateness}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pending", type=int, nargs="+", default=[1000, 100000],
+                        help="The numbers of pending tasks to test with")
+    parser.add_argument("--probes", type=int, default=200, help="The number of probe tasks")
+    parser.add_argument("--duration", type=float, default=10, help="How long to run each scheduler for, in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="The seed used to pick the probes' delays")
+    args = parser.parse_args()
+
+    print("N pending tasks and {} probe tasks with random delays, run for {}s:".format(args.probes, args.duration))
+    for pending in args.pending:
+        print("  N={}".format(pending))
+        for name, scheduler_class in (("polling", PollingScheduler), ("heap", Scheduler)):
+            result = run(scheduler_class, pending, args.probes, args.duration, random.Random(args.seed))
+            lateness = result["lateness"]
+            print("    {:<8} add {:>9}  CPU {:>9} ({:.1f}% of a core)  lateness mean {:>9} max {:>9}  {}/{} probes run"
+                  .format(name, format_time(result["add"]), format_time(result["cpu"]),
+                          result["cpu"] / args.duration * 100,
+                          format_time(sum(lateness) / len(lateness)) if lateness else "-",
+                          format_time(max(lateness)) if lateness else "-", len(lateness), args.probes))
+
+
+if __name__ == "__main__":
+    main()
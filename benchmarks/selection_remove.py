@@ -0,0 +1,70 @@
+"""
+Benchmarks removing and updating selected rows of a JSONDatabase. Removed rows used to be removed one at a time with
+list.remove, and are now removed in a single pass over the data.
+Run from the root of the repository with: python -m benchmarks.selection_remove
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from libraries.JSONDB import JSONDatabase, SelectionMode
+
+from .common import format_time, measure_once
+
+__author__ = 'Riley Flynn (nint8835)'
+
+# Rows are spread evenly over this many values of g, so selecting one value selects this fraction of the rows
+GROUPS = 10
+
+
+def remove_one_at_a_time(data: list, rows: list):
+    """
+    Removes rows the way DatabaseSelection.remove used to, searching the data for each row in turn
+    :param data: The rows of the database
+    :param rows: The rows to remove
+    """
+    for row in rows:
+        data.remove(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000, help="The number of rows in the database")
+    parser.add_argument("--skip-old", action="store_true",
+                        help="Don't time removing rows one at a time, which takes tens of seconds with the default size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        def open_database(journal: bool) -> JSONDatabase:
+            path = os.path.join(directory, "journal.json" if journal else "db.json")
+            with open(path, "w") as f:
+                json.dump([{"g": i % GROUPS, "v": i} for i in range(args.rows)], f)
+            return JSONDatabase(path, journal=journal)
+
+        print("Removing the {} of {} rows selected by an equality match on g:".format(args.rows // GROUPS, args.rows))
+        db = open_database(False)
+        rows = db.select(SelectionMode.VALUE_EQUALS, "g", 0).rows
+        expected = [row for row in db.data if row["g"] != 0]
+        if not args.skip_old:
+            data = db.data[:]
+            elapsed, _ = measure_once(lambda: remove_one_at_a_time(data, rows))
+            assert data == expected
+            print("  one row at a time with list.remove  {}".format(format_time(elapsed)))
+        elapsed, _ = measure_once(lambda: db._remove_rows(rows))
+        assert db.data == expected
+        print("  single pass                         {}".format(format_time(elapsed)))
+
+        db = open_database(True)
+        selection = db.select(SelectionMode.VALUE_EQUALS, "g", 0)
+        print("  single pass with journal entry      {}".format(format_time(measure_once(selection.remove)[0])))
+        assert db.data == expected
+
+        elapsed, _ = measure_once(lambda: db.select(SelectionMode.VALUE_EQUALS, "g", 1).update("v", -1))
+        print("Updating {} rows in journal mode, including the select, took {}"
+              .format(args.rows // GROUPS, format_time(elapsed)))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmarks the SQLite storage backend against JSONDatabase on a table of quotes.
+Run from the root of the repository with: python -m benchmarks.sqlite_backend
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+from collections import OrderedDict
+
+from libraries.JSONDB import IndexType, JSONDatabase, SelectionMode, SQLiteDatabase
+from libraries.JSONDB.Migrate import migrate_json_to_sqlite
+
+from .common import format_time, make_quote_rows, measure, measure_once
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+def run(db_class, path: str, inserts: int, rng: random.Random) -> OrderedDict:
+    """
+    Times the operations being compared on a database
+    :param db_class: The class of the database, JSONDatabase or SQLiteDatabase
+    :param path: The path of the database file
+    :param inserts: The number of rows to insert, one at a time, saving after each
+    :param rng: The random number generator used to create the inserted rows
+    :return: The time taken by each operation, in seconds, along with the number of rows selected by each selection
+    """
+    times = OrderedDict()
+    times["open"], db = measure_once(lambda: db_class(path))
+    times["select = (no index)"] = measure(lambda: db.select(SelectionMode.VALUE_EQUALS, "author", "Author 7"), 3)
+    # SQLite performs VALUE_IN selections in Python, on every row
+    times["select IN (Python)"] = measure(lambda: db.select(SelectionMode.VALUE_IN, "msg", "pizza meme"), 3)
+    db.create_index("author", IndexType.HASH)
+    times["select = (index)"] = measure(lambda: db.select(SelectionMode.VALUE_EQUALS, "author", "Author 7"), 3)
+
+    rows = make_quote_rows(inserts, rng)
+    elapsed, _ = measure_once(lambda: [db.insert(row) for row in rows])
+    times["insert + save, per row"] = elapsed / inserts
+    times["refine + update"], _ = measure_once(
+        lambda: db.select(SelectionMode.VALUE_EQUALS, "author", "Author 8")
+                  .select(SelectionMode.VALUE_IN, "msg", "pizza").update("added_at", "01/01/18 00:00:00"))
+
+    times["len(data), first use"], _ = measure_once(lambda: len(db.data))
+    times["len(data), later uses"] = measure(lambda: len(db.data), 10)
+    times["select IN, after data"] = measure(lambda: db.select(SelectionMode.VALUE_IN, "msg", "pizza meme"), 3)
+
+    times["rows selected by ="] = len(db.select(SelectionMode.VALUE_EQUALS, "author", "Author 7"))
+    times["rows selected by IN"] = len(db.select(SelectionMode.VALUE_IN, "msg", "pizza meme"))
+    db.close()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000, help="The number of rows in the database")
+    parser.add_argument("--inserts", type=int, default=20, help="The number of rows to insert one at a time")
+    parser.add_argument("--seed", type=int, default=0, help="The seed used to generate the rows")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "quotes.json")
+        sqlite_path = os.path.join(directory, "quotes.sqlite3")
+        with open(json_path, "w") as f:
+            json.dump(make_quote_rows(args.rows, random.Random(args.seed)), f)
+        migration_time, _ = measure_once(lambda: migrate_json_to_sqlite(json_path, sqlite_path))
+        print("{} quote rows, {:.1f} MB of JSON. Migrating them to SQLite took {}."
+              .format(args.rows, os.path.getsize(json_path) / 2 ** 20, format_time(migration_time)))
+
+        # Both databases insert the same rows
+        json_times = run(JSONDatabase, json_path, args.inserts, random.Random(args.seed + 1))
+        sqlite_times = run(SQLiteDatabase, sqlite_path, args.inserts, random.Random(args.seed + 1))
+
+    print("{:<24} {:>10} {:>10}".format("", "JSON", "SQLite"))
+    for name in json_times:
+        if name.startswith("rows"):
+            assert json_times[name] == sqlite_times[name]
+            continue
+        print("{:<24} {:>10} {:>10}".format(name, format_time(json_times[name]), format_time(sqlite_times[name])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+from .Enums import SelectionMode
+from . import Database
+__author__ = 'Riley Flynn (nint8835)'
+
+
+class ReadWriteLock:
+
+    """
+    An asyncio lock that can be held by many readers at once, or by a single writer.
+    Writers waiting for the lock stop new readers from acquiring it, so a steady stream of readers can't starve them.
+    """
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    async def acquire_read(self):
+        """
+        Waits until the lock can be held for reading, and acquires it
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writer and self._waiting_writers == 0)
+            self._readers += 1
+
+    async def release_read(self):
+        """
+        Releases the lock after reading
+        """
+        async with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    async def acquire_write(self):
+        """
+        Waits until the lock can be held for writing, and acquires it
+        """
+        async with self._condition:
+            self._waiting_writers += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writer and self._readers == 0)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+
+    async def release_write(self):
+        """
+        Releases the lock after writing
+        """
+        async with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+
+    def read(self) -> "LockContext":
+        """
+        :return: An async context manager holding the lock for reading
+        """
+        return LockContext(self.acquire_read, self.release_read)
+
+    def write(self) -> "LockContext":
+        """
+        :return: An async context manager holding the lock for writing
+        """
+        return LockContext(self.acquire_write, self.release_write)
+
+
+class LockContext:
+
+    """An async context manager acquiring a lock on entry and releasing it on exit"""
+
+    def __init__(self, acquire: Callable[[], Awaitable], release: Callable[[], Awaitable], value=None):
+        self._acquire = acquire
+        self._release = release
+        self._value = value
+
+    async def __aenter__(self):
+        await self._acquire()
+        return self._value
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._release()
+
+
+class AsyncDatabase:
+
+    """
+    An asyncio interface to a JSONDatabase or SQLiteDatabase, allowing coroutines that share a database to run
+    concurrently. Reads can happen at the same time as each other, while writes wait for the database to be free. Rows
+    returned by reads are copies, so they stay the same even if the database is changed while a coroutine is holding on
+    to them.
+    The database's own thread lock is also held during each operation, so threads using the database directly are
+    still safe.
+    """
+
+    def __init__(self, db: "Database.JSONDatabase"):
+        """
+        Creates a new AsyncDatabase
+        :param db: The database to wrap
+        """
+        self.db = db
+        self.lock = ReadWriteLock()
+
+    def read(self) -> LockContext:
+        """
+        Holds the database for reading, so several reads can be made without it changing in between.
+        Use as `async with db.read() as database:`, where database is the wrapped JSONDatabase.
+        :return: An async context manager holding the database for reading
+        """
+        return LockContext(self.lock.acquire_read, self.lock.release_read, self.db)
+
+    def transaction(self) -> "Transaction":
+        """
+        Holds the database for writing, so several changes can be made without other coroutines seeing the database in
+        between, and saves the database once they're all done.
+        Use as `async with db.transaction() as database:`, where database is the wrapped JSONDatabase.
+        Changes are not undone if an exception is raised during the transaction, but the database isn't saved.
+        :return: An async context manager holding the database for writing
+        """
+        return Transaction(self)
+
+    async def select(self, mode: SelectionMode, key="", selection_var="") -> List[dict]:
+        """
+        Selects rows from the database that match certain criteria
+        :param mode: The mode of selection used to perform the selection
+        :param key: The key to perform the selection on
+        :param selection_var: The variable to be used for the selection
+        :return: Copies of the selected rows
+        """
+        async with self.read():
+            return [dict(row) for row in self.db.select(mode, key, selection_var).rows]
+
+    async def snapshot(self) -> List[dict]:
+        """
+        :return: Copies of every row in the database
+        """
+        async with self.read():
+            with self.db.lock:
+                return [dict(row) for row in self.db.data]
+
+    async def insert(self, row: dict, save_after: bool=True):
+        """
+        Inserts a new row into the database
+        :param row: The row you wish to insert
+        :param save_after: Whether to write the database to disk after inserting the row
+        """
+        async with self.lock.write():
+            self.db.insert(row, save_after)
+
+    async def remove(self, mode: SelectionMode, key="", selection_var="") -> int:
+        """
+        Removes the rows from the database that match certain criteria
+        :param mode: The mode of selection used to select the rows to remove
+        :param key: The key to perform the selection on
+        :param selection_var: The variable to be used for the selection
+        :return: The number of rows removed
+        """
+        async with self.lock.write():
+            with self.db.lock:
+                selection = self.db.select(mode, key, selection_var)
+                count = len(selection)
+                selection.remove()
+                return count
+
+    async def update(self, mode: SelectionMode, key: str, selection_var, update_key: str, value) -> int:
+        """
+        Updates the value of a key in the rows of the database that match certain criteria
+        :param mode: The mode of selection used to select the rows to update
+        :param key: The key to perform the selection on
+        :param selection_var: The variable to be used for the selection
+        :param update_key: The key to update
+        :param value: The new value
+        :return: The number of rows updated
+        """
+        async with self.lock.write():
+            with self.db.lock:
+                selection = self.db.select(mode, key, selection_var)
+                count = len(selection)
+                selection.update(update_key, value)
+                return count
+
+
+class Transaction:
+
+    """
+    An async context manager holding an AsyncDatabase for writing, and saving it afterwards.
+    Saves are deferred during the transaction, so changes made inside it are written together once it ends.
+    """
+
+    def __init__(self, db: AsyncDatabase):
+        self._db = db
+
+    async def __aenter__(self) -> "Database.JSONDatabase":
+        await self._db.lock.acquire_write()
+        self._db.db.defer_saves()
+        return self._db.db
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self._db.db.resume_saves(exc_type is None)
+        finally:
+            await self._db.lock.release_write()
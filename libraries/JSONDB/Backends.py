@@ -0,0 +1,20 @@
+from .Database import JSONDatabase
+from .Enums import StorageBackend
+from .SQLite import SQLiteDatabase
+__author__ = 'Riley Flynn (nint8835)'
+
+BACKENDS = {
+    StorageBackend.JSON: JSONDatabase,
+    StorageBackend.SQLITE: SQLiteDatabase
+}
+
+
+def open_database(path: str, backend: StorageBackend=StorageBackend.JSON, **kwargs):
+    """
+    Opens a database using the chosen storage backend
+    :param path: The path of the database file
+    :param backend: The storage backend to use
+    :param kwargs: Extra arguments for the backend, such as journal for JSONDatabase
+    :return: The database
+    """
+    return BACKENDS[backend](path, **kwargs)
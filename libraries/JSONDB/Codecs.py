@@ -0,0 +1,82 @@
+import json
+from typing import Dict, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+__author__ = 'Riley Flynn (nint8835)'
+
+
+class Codec:
+
+    """Converts between Python objects and JSON. Rows that aren't dicts, such as CompactRows, are encoded as dicts."""
+
+    name = ""
+
+    def encode(self, obj) -> bytes:
+        """
+        Encodes an object as JSON
+        :param obj: The object to encode
+        :return: The UTF-8 encoded JSON
+        """
+        raise NotImplementedError()
+
+    def decode(self, data: Union[bytes, str]):
+        """
+        Decodes JSON
+        :param data: The JSON to decode
+        :return: The decoded object
+        """
+        raise NotImplementedError()
+
+
+class JSONCodec(Codec):
+
+    """A codec using the json module from the standard library"""
+
+    name = "json"
+
+    def encode(self, obj) -> bytes:
+        return json.dumps(obj, default=dict).encode()
+
+    def decode(self, data: Union[bytes, str]):
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+
+    """A codec using orjson, which is several times faster than the json module"""
+
+    name = "orjson"
+
+    def encode(self, obj) -> bytes:
+        try:
+            return orjson.dumps(obj, default=dict)
+        except TypeError:
+            # orjson is stricter than the json module, refusing things like non-string keys and very large integers
+            return json.dumps(obj, default=dict).encode()
+
+    def decode(self, data: Union[bytes, str]):
+        return orjson.loads(data)
+
+
+CODECS = {
+    "json": JSONCodec()
+}  # type: Dict[str, Codec]
+
+if orjson is not None:
+    CODECS["orjson"] = OrjsonCodec()
+
+
+def get_codec(name: str="json") -> Codec:
+    """
+    Gets a codec by name
+    :param name: The name of the codec, or "auto" for the fastest codec that is installed
+    :return: The codec
+    """
+    if name == "auto":
+        return CODECS.get("orjson", CODECS["json"])
+    if name not in CODECS:
+        raise ValueError("The codec '{}' is not available. Available codecs: {}".format(name, ", ".join(CODECS)))
+    return CODECS[name]
@@ -1,27 +1,276 @@
-import json
+import asyncio
+import functools
+import itertools
 import os
-import re
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Type
+
 from .Selection import DatabaseSelection
-from .Enums import SelectionMode
+from .Enums import IndexType, SelectionMode
+from .Index import HashIndex, Index, SortedIndex, TrigramIndex
+from .Codecs import Codec, get_codec
+from .Journal import Journal, load_json, write_json_atomic
+from .Query import Query
+from .Regex import REGEX_METHODS, get_matcher
+from .Rows import CompactRow, get_row_class
 __author__ = 'Riley Flynn (nint8835)'
 
 
+INDEX_TYPES = {
+    IndexType.HASH: HashIndex,
+    IndexType.SORTED: SortedIndex,
+    IndexType.TRIGRAM: TrigramIndex
+}
+
+
+def locked(method: Callable) -> Callable:
+    """
+    Decorates a JSONDatabase method so that it holds the database's lock while it runs
+    :param method: The method to decorate
+    :return: The decorated method
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class JSONDatabase:
 
-    def __init__(self, path):
+    def __init__(self,
+                 path,
+                 journal: bool=False,
+                 compact_after: int=1000,
+                 flush_interval: float=None,
+                 loop: asyncio.AbstractEventLoop=None,
+                 compact_rows: bool=False,
+                 codec: str="json",
+                 lazy: bool=False):
+        """
+        Creates a new JSONDatabase
+        :param path: The path of the database file
+        :param journal: Whether to append changes to a journal instead of rewriting the whole file on every save
+        :param compact_after: The number of journal entries after which the journal is compacted into the database file
+        :param flush_interval: If set, saves are batched and written at most once per this many seconds, in a
+        background thread, instead of being written immediately
+        :param loop: The event loop used to schedule batched writes
+        :param compact_rows: Whether to store rows as CompactRows, which use much less memory than dicts for tables where
+        every row has the same keys, at the cost of slower access
+        :param codec: The name of the codec used to read and write the database, such as "json", "orjson", or "auto"
+        for the fastest one installed
+        :param lazy: Whether to wait until the rows are first used to load the database, so that opening a large
+        database doesn't slow down startup
+        """
         self.path = path
-        if os.path.isfile(path):
-            with open(path) as f:
-                self.data = json.load(f)
+        # Held while the data is read or changed, so the database can be used from multiple threads
+        self.lock = threading.RLock()
+        # Indexes for each indexed key
+        self._indexes = {}  # type: Dict[str, List[Index]]
+        # Rows are identified by id(row), and given increasing sequence numbers so index results can be put back into
+        # the order of the data
+        self._sequences = {}  # type: Dict[int, int]
+        self._sequence_counter = itertools.count()
+
+        self._codec = get_codec(codec)  # type: Codec
+        self._journal = None  # type: Journal
+        if journal:
+            self._journal = Journal(path, compact_after, self._codec)
+        self._compact_rows = compact_rows
+        self._row_class = None  # type: Type[CompactRow]
+
+        self._data = None  # type: list
+        if not lazy:
+            self._load()
+
+        self._flush_interval = flush_interval
+        self._loop = None  # type: asyncio.AbstractEventLoop
+        self._executor = None  # type: ThreadPoolExecutor
+        self._flush_handle = None  # type: asyncio.Handle
+        # Whether a batched write has been scheduled, including one whose timer hasn't been started on the loop yet
+        self._flush_scheduled = False
+        self._dirty = False
+        # The most recent write sent to the executor
+        self._write_future = None  # type: Future
+        # Greater than 0 while saves are deferred by defer_saves
+        self._saves_deferred = 0
+        if flush_interval is not None:
+            self._loop = loop or asyncio.get_event_loop()
+            # A single thread, so writes happen in the order they were scheduled
+            self._executor = ThreadPoolExecutor(max_workers=1)
+
+    @locked
+    def save_db(self):
+        """
+        Writes the database to disk.
+        In journal mode, this flushes the journal and starts a background compaction if the journal has grown too large.
+        If a flush interval is set, the write is scheduled to happen once the interval has passed, and any saves in the
+        meantime are written along with it. Full writes of the database happen in a background thread, while journal
+        entries are written by the thread holding the database's lock.
+        Nothing is written while saves are deferred.
+        """
+        if self._saves_deferred:
+            return
+        if self._flush_interval is None:
+            self._write()
+            return
+        self._dirty = True
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            # The database may be saved from threads other than the loop's, where call_later isn't safe to use
+            self._loop.call_soon_threadsafe(self._schedule_flush)
+
+    @locked
+    def _schedule_flush(self):
+        """
+        Starts the timer of a batched write, on the event loop's thread
+        """
+        # flush may have written the changes since the write was scheduled
+        if self._flush_scheduled and self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self._flush_interval, self._start_flush)
+
+    @property
+    def data(self) -> list:
+        """
+        :return: The rows of the database, which are loaded first if the database was opened lazily and hasn't been
+        used yet
+        """
+        if self._data is None:
+            self._load()
+        return self._data
+
+    @locked
+    def _load(self):
+        """
+        Loads the rows of the database
+        """
+        if self._data is not None:
+            return
+
+        if self._journal is not None:
+            data = self._journal.load()
+        elif os.path.isfile(self.path):
+            data = load_json(self.path, self._codec)
         else:
             # If the file doesn't exist, write blank data to the file.
-            self.data = []
+            data = []
+            write_json_atomic(self.path, data, self._codec)
+
+        if self._compact_rows:
+            self._row_class = get_row_class(tuple(dict.fromkeys(key for row in data for key in row)))
+            data = [self._row_class(row) for row in data]
+
+        for row in data:
+            self._sequences[id(row)] = next(self._sequence_counter)
+        self._data = data
+
+    @locked
+    def _write(self):
+        """
+        Writes the database to disk immediately
+        """
+        if self._data is None:
+            # The database hasn't been loaded, so there's nothing new to write
+            return
+        if self._journal is None:
+            write_json_atomic(self.path, self.data, self._codec)
+            return
+        self._journal.flush()
+        if self._journal.needs_compaction():
+            self._journal.compact(self.data)
+
+    @locked
+    def _start_flush(self):
+        """
+        Starts writing the changes made since the last batched write in the background
+        """
+        self._flush_handle = None
+        self._flush_scheduled = False
+        if not self._dirty:
+            return
+        self._dirty = False
+        if self._journal is not None:
+            # The journal is appended to while the lock is held, so it is flushed here rather than in the executor,
+            # where the same file would be written from two threads at once. This only writes the buffered entries.
+            self._write()
+            return
+        # Rows are copied, as they may be changed while they are being written
+        self._write_future = self._executor.submit(write_json_atomic,
+                                                   self.path,
+                                                   [dict(row) for row in self.data],
+                                                   self._codec)
+        self._write_future.add_done_callback(self._flush_done)
+
+    def _flush_done(self, future: Future):
+        """
+        Reports a failed batched write and schedules it to be retried
+        :param future: The future of the write
+        """
+        if future.exception() is not None:
+            exception = future.exception()
+            traceback.print_exception(type(exception), exception, exception.__traceback__)
+            if not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self.save_db)
+
+    @locked
+    def flush(self):
+        """
+        Writes any pending changes to disk immediately, waiting for batched writes that are already in progress
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._flush_scheduled = False
+        self._dirty = False
+        if self._write_future is not None:
+            # Writes in the executor never take the lock, so they can be waited for while holding it. The write is
+            # then done in this thread, as a write sent to the executor now would be stuck waiting for the lock.
+            wait([self._write_future])
+            self._write_future = None
+        self._write()
+
+    @locked
+    def defer_saves(self):
+        """
+        Stops save_db from writing anything until resume_saves is called, so several changes can be saved at once.
+        Calls can be nested, and saves resume once every call has been matched by a call to resume_saves.
+        """
+        self._saves_deferred += 1
+
+    @locked
+    def resume_saves(self, save: bool=True):
+        """
+        Undoes a call to defer_saves
+        :param save: Whether to save the changes made while saves were deferred, if saves are no longer deferred
+        """
+        self._saves_deferred -= 1
+        if save and not self._saves_deferred:
             self.save_db()
 
-    def save_db(self):
-        with open(self.path, "w") as f:
-            json.dump(self.data, f)
+    @locked
+    def compact(self):
+        """
+        Writes the full database to disk, emptying the journal if journal mode is enabled
+        """
+        if self._journal is None:
+            self.flush()
+        else:
+            self._journal.compact(self.data, background=False)
 
+    def close(self):
+        """
+        Writes any pending changes to disk and stops the background writers
+        """
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown()
+        if self._journal is not None:
+            self._journal.close()
+
+    @locked
     def select(self, mode: SelectionMode, key="", selection_var=""):
         """
         Selects rows from the database that match certain criteria
@@ -30,6 +279,18 @@ class JSONDatabase:
         :param selection_var: The variable to be used for the selection
         :return: A DatabaseSelection object containing the selection
         """
+        if mode == SelectionMode.VALUE_NOT_EQUAL:
+            # Nearly every row usually matches, so an index can't beat a scan of the data, but it can tell when every
+            # row matches and the data can just be copied
+            for index in self._indexes.get(key, []):
+                if mode in index.modes and len(index) == len(self.data) and \
+                        not index.select(SelectionMode.VALUE_EQUALS, selection_var):
+                    return DatabaseSelection(self.data[:], self)
+
+        rows = self._select_from_index(mode, key, selection_var)
+        if rows is not None:
+            return DatabaseSelection(rows, self)
+
         if mode == SelectionMode.VALUE_LESS_THAN:
             return DatabaseSelection([row for row in self.data if row[key] < selection_var], self)
 
@@ -51,19 +312,153 @@ class JSONDatabase:
         if mode == SelectionMode.VALUE_IN:
             return DatabaseSelection([row for row in self.data if selection_var in row[key]], self)
 
-        if mode == SelectionMode.REGEX_MATCH:
-            regex = re.compile(selection_var)
-            return DatabaseSelection([row for row in self.data if regex.match(row[key])], self)
+        if mode in REGEX_METHODS:
+            matcher = get_matcher(mode, selection_var)
+            return DatabaseSelection([row for row in self.data if matcher(row[key])], self)
 
         if mode == SelectionMode.ALL:
             return DatabaseSelection(self.data[:], self)
 
+    def _select_from_index(self, mode: SelectionMode, key: str, selection_var) -> Optional[List[dict]]:
+        """
+        Selects rows using an index, if there is one on the key that can perform the selection efficiently
+        :param mode: The mode of selection
+        :param key: The key to perform the selection on
+        :param selection_var: The variable to be used for the selection
+        :return: The selected rows in the order of the data, or None if no index can be used
+        """
+        if mode == SelectionMode.VALUE_NOT_EQUAL:
+            return None
+        for index in self._indexes.get(key, []):
+            if mode in index.modes:
+                rows = index.select(mode, selection_var)
+                rows.sort(key=itemgetter(0))
+                return [row for _, row in rows]
+        return None
+
+    def _scan(self) -> List[dict]:
+        """
+        :return: The rows a query has to check when no index can be used
+        """
+        return self.data
+
+    def query(self) -> Query:
+        """
+        Starts a lazily evaluated query on the database
+        :return: A Query matching every row, to be narrowed with Query.filter
+        """
+        return Query(self)
+
+    @locked
     def insert(self, row: dict, save_after: bool=True):
         """
         Inserts a new row into the database
         :param row: The row you wish to insert
         :param save_after: Whether to write the database to disk after inserting the row
         """
+        self._load()
+        if self._row_class is not None:
+            # A database that was empty when loaded takes its keys from the first row
+            if not self._row_class._slots:
+                self._row_class = get_row_class(tuple(row))
+            row = self._row_class(row)
+        sequence = next(self._sequence_counter)
+        for indexes in self._indexes.values():
+            for index in indexes:
+                index.add(row, sequence)
+        self._sequences[id(row)] = sequence
         self.data.append(row)
+        if self._journal is not None:
+            self._journal.append({"op": "insert", "row": row}, flush=False)
         if save_after:
             self.save_db()
+
+    @locked
+    def create_index(self, key: str, index_type: IndexType=IndexType.HASH):
+        """
+        Creates an index on a key, which is used by select when the selection mode is one the index supports.
+        Indexes are kept up to date as rows are inserted, removed and updated through the database. Rows that are
+        changed directly must be removed and inserted again to be indexed correctly.
+        Sorted indexes require all values of the key to be comparable with each other.
+        :param key: The key to index
+        :param index_type: The type of index to create
+        """
+        if any(isinstance(index, INDEX_TYPES[index_type]) for index in self._indexes.get(key, [])):
+            return
+        index = INDEX_TYPES[index_type](key)
+        index.build([(self._sequences[id(row)], row) for row in self.data])
+        self._indexes.setdefault(key, []).append(index)
+
+    @locked
+    def drop_index(self, key: str, index_type: IndexType=None):
+        """
+        Removes the indexes on a key
+        :param key: The key to remove the indexes from
+        :param index_type: The type of index to remove, or None to remove all indexes on the key
+        """
+        if index_type is None:
+            self._indexes.pop(key, None)
+            return
+        indexes = [index for index in self._indexes.get(key, []) if not isinstance(index, INDEX_TYPES[index_type])]
+        if indexes:
+            self._indexes[key] = indexes
+        else:
+            self._indexes.pop(key, None)
+
+    @locked
+    def _remove_rows(self, rows: List[dict]):
+        """
+        Removes rows from the database in a single pass over the data, without saving the database
+        :param rows: The rows to remove
+        """
+        ids = set()
+        for row in rows:
+            sequence = self._sequences.pop(id(row))
+            for indexes in self._indexes.values():
+                for index in indexes:
+                    index.remove(row, sequence)
+            ids.add(id(row))
+
+        positions = []
+        kept = []
+        for i, row in enumerate(self.data):
+            if id(row) in ids:
+                positions.append(i)
+            else:
+                kept.append(row)
+        self.data[:] = kept
+
+        if self._journal is not None:
+            # Journal positions are applied one after another, so each is shifted by the rows removed before it
+            self._journal.append({"op": "remove", "positions": [position - i for i, position in enumerate(positions)]},
+                                 flush=False)
+
+    def _update_row(self, row: dict, key: str, value):
+        """
+        Sets the value of a key in a row, updating the indexes on that key, without saving the database
+        :param row: The row to update
+        :param key: The key to set
+        :param value: The new value
+        """
+        sequence = self._sequences[id(row)]
+        indexes = self._indexes.get(key, [])
+        for index in indexes:
+            index.remove(row, sequence)
+        row[key] = value
+        for index in indexes:
+            index.add(row, sequence)
+
+    @locked
+    def _update_rows(self, rows: List[dict], key: str, value):
+        """
+        Sets the value of a key in rows of the database, without saving the database
+        :param rows: The rows to update
+        :param key: The key to set
+        :param value: The new value
+        """
+        for row in rows:
+            self._update_row(row, key, value)
+        if self._journal is not None:
+            ids = {id(row) for row in rows}
+            positions = [i for i, row in enumerate(self.data) if id(row) in ids]
+            self._journal.append({"op": "update", "positions": positions, "key": key, "value": value}, flush=False)
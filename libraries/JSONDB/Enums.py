@@ -12,5 +12,31 @@ class SelectionMode(Enum):
     VALUE_LESS_THAN_OR_EQUAL = "<="
     VALUE_NOT_EQUAL = "!="
     VALUE_IN = "IN"
+    # The selection variable of the regex modes can be a regex, a tuple of a regex and its flags, or a compiled regex
     REGEX_MATCH = "RE_MATCH"
+    REGEX_SEARCH = "RE_SEARCH"
+    REGEX_FULLMATCH = "RE_FULLMATCH"
     ALL = "*"
+
+
+class IndexType(Enum):
+    """An enum containing all of the types of index that can be created on a key"""
+
+    # Serves VALUE_EQUALS and VALUE_NOT_EQUAL selections
+    HASH = "hash"
+
+    # Serves VALUE_EQUALS and the range selections (<, <=, >, >=)
+    SORTED = "sorted"
+
+    # Serves the regex selections, on keys with string values
+    TRIGRAM = "trigram"
+
+
+class StorageBackend(Enum):
+    """An enum containing all of the ways a database can be stored"""
+
+    # The whole database is kept in memory and stored in a JSON file
+    JSON = "json"
+
+    # Rows are stored as JSON documents in an SQLite table, and loaded when selected
+    SQLITE = "sqlite"
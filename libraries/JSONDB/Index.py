@@ -0,0 +1,291 @@
+import bisect
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+from .Enums import SelectionMode
+from .Regex import REGEX_METHODS, get_literals, get_regex
+__author__ = 'Riley Flynn (nint8835)'
+
+# Sorts after every sequence number, so (value, END) comes after every entry with that value in a SortedIndex
+END = float("inf")
+
+_MISSING = object()
+
+
+def get_trigrams(text: str) -> Set[str]:
+    """
+    Gets the three character substrings of a string, casefolded
+    :param text: The string
+    :return: The set of substrings
+    """
+    text = text.casefold()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Index:
+
+    """
+    Base class for indexes on a key of a JSONDatabase.
+    Indexes keep track of rows by their sequence number, which the database gives each row when it is added and which
+    reflects the row's position in the database.
+    """
+
+    # The selection modes this index can serve
+    modes = ()
+
+    def __init__(self, key: str):
+        """
+        Creates a new index
+        :param key: The key to index
+        """
+        self.key = key
+        # The value each row was indexed under, in case the row is changed before it is removed
+        self._values = {}  # type: Dict[int, object]
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, row: dict, sequence: int):
+        """
+        Adds a row to the index
+        :param row: The row to add
+        :param sequence: The row's sequence number
+        """
+        pass
+
+    def build(self, rows: List[Tuple[int, dict]]):
+        """
+        Adds many rows to the index at once
+        :param rows: A list of tuples of the sequence number and row of each row to add
+        """
+        for sequence, row in rows:
+            self.add(row, sequence)
+
+    def remove(self, row: dict, sequence: int):
+        """
+        Removes a row from the index
+        :param row: The row to remove
+        :param sequence: The row's sequence number
+        """
+        pass
+
+    def select(self, mode: SelectionMode, selection_var) -> List[Tuple[int, dict]]:
+        """
+        Selects rows from the index
+        :param mode: The mode of selection, which must be one of the modes in this index's modes
+        :param selection_var: The variable to be used for the selection
+        :return: A list of tuples of the sequence number and row of each matching row, in no particular order
+        """
+        return []
+
+
+class HashIndex(Index):
+
+    """An index grouping rows by the value of a key, for equality selections"""
+
+    modes = (SelectionMode.VALUE_EQUALS, SelectionMode.VALUE_NOT_EQUAL)
+
+    def __init__(self, key: str):
+        super(HashIndex, self).__init__(key)
+        self._buckets = {}  # type: Dict[object, Dict[int, dict]]
+        # Rows with values that can't be hashed, such as lists, are checked individually
+        self._unhashable = {}  # type: Dict[int, dict]
+
+    def add(self, row: dict, sequence: int):
+        value = row.get(self.key, _MISSING)
+        if value is _MISSING:
+            return
+        self._values[sequence] = value
+        try:
+            self._buckets.setdefault(value, {})[sequence] = row
+        except TypeError:
+            self._unhashable[sequence] = row
+
+    def remove(self, row: dict, sequence: int):
+        value = self._values.pop(sequence, _MISSING)
+        if value is _MISSING:
+            return
+        if sequence in self._unhashable:
+            del self._unhashable[sequence]
+            return
+        bucket = self._buckets[value]
+        del bucket[sequence]
+        if not bucket:
+            del self._buckets[value]
+
+    def select(self, mode: SelectionMode, selection_var) -> List[Tuple[int, dict]]:
+        if mode == SelectionMode.VALUE_EQUALS:
+            try:
+                rows = list(self._buckets.get(selection_var, {}).items())
+            except TypeError:
+                rows = []
+            return rows + [(sequence, row) for sequence, row in self._unhashable.items()
+                           if row[self.key] == selection_var]
+
+        if mode == SelectionMode.VALUE_NOT_EQUAL:
+            rows = []
+            for value, bucket in self._buckets.items():
+                if value != selection_var:
+                    rows += bucket.items()
+            return rows + [(sequence, row) for sequence, row in self._unhashable.items()
+                           if row[self.key] != selection_var]
+
+        return []
+
+
+class SortedIndex(Index):
+
+    """An index keeping rows sorted by the value of a key, for equality and range selections"""
+
+    modes = (SelectionMode.VALUE_EQUALS,
+             SelectionMode.VALUE_LESS_THAN,
+             SelectionMode.VALUE_LESS_THAN_OR_EQUAL,
+             SelectionMode.VALUE_GREATER_THAN,
+             SelectionMode.VALUE_GREATER_THAN_OR_EQUAL)
+
+    def __init__(self, key: str):
+        super(SortedIndex, self).__init__(key)
+        # Sorted (value, sequence) pairs, with the matching rows at the same positions in _rows
+        self._keys = []  # type: List[Tuple[object, int]]
+        self._rows = []  # type: List[dict]
+
+    def add(self, row: dict, sequence: int):
+        value = row.get(self.key, _MISSING)
+        if value is _MISSING:
+            return
+        position = bisect.bisect_left(self._keys, (value, sequence))
+        self._keys.insert(position, (value, sequence))
+        self._rows.insert(position, row)
+        self._values[sequence] = value
+
+    def build(self, rows: List[Tuple[int, dict]]):
+        # Sorting everything at once is much faster than inserting rows one at a time
+        entries = [(row[self.key], sequence, row) for sequence, row in rows if self.key in row]
+        entries += [(key[0], key[1], row) for key, row in zip(self._keys, self._rows)]
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        self._keys = [(value, sequence) for value, sequence, _ in entries]
+        self._rows = [row for _, _, row in entries]
+        self._values.update((sequence, value) for value, sequence in self._keys)
+
+    def remove(self, row: dict, sequence: int):
+        value = self._values.pop(sequence, _MISSING)
+        if value is _MISSING:
+            return
+        position = bisect.bisect_left(self._keys, (value, sequence))
+        del self._keys[position]
+        del self._rows[position]
+
+    def _range(self, start: Optional[int], end: Optional[int]) -> List[Tuple[int, dict]]:
+        return [(key[1], row) for key, row in zip(self._keys[start:end], self._rows[start:end])]
+
+    def select(self, mode: SelectionMode, selection_var) -> List[Tuple[int, dict]]:
+        # (value,) sorts before every entry with that value, and (value, END) after them
+        if mode == SelectionMode.VALUE_EQUALS:
+            return self._range(bisect.bisect_left(self._keys, (selection_var,)),
+                               bisect.bisect_left(self._keys, (selection_var, END)))
+
+        if mode == SelectionMode.VALUE_LESS_THAN:
+            return self._range(None, bisect.bisect_left(self._keys, (selection_var,)))
+
+        if mode == SelectionMode.VALUE_LESS_THAN_OR_EQUAL:
+            return self._range(None, bisect.bisect_left(self._keys, (selection_var, END)))
+
+        if mode == SelectionMode.VALUE_GREATER_THAN:
+            return self._range(bisect.bisect_left(self._keys, (selection_var, END)), None)
+
+        if mode == SelectionMode.VALUE_GREATER_THAN_OR_EQUAL:
+            return self._range(bisect.bisect_left(self._keys, (selection_var,)), None)
+
+        return []
+
+
+class TrigramIndex(Index):
+
+    """
+    An index of the three character substrings of string values, for regex selections on long text.
+    Only the rows containing every substring that the regex requires are checked with the regex, rather than every row.
+    Regexes without three required characters in a row, such as ones made of alternatives, still check every row.
+    Removed rows are left in the lists of rows containing each substring, and skipped when selecting, as removing them
+    would mean searching each list. The lists are rebuilt once more than half of their entries are for removed rows.
+    """
+
+    modes = tuple(REGEX_METHODS)
+
+    def __init__(self, key: str):
+        super(TrigramIndex, self).__init__(key)
+        # The sequence numbers of the rows containing each substring. Arrays take a fraction of the memory of sets,
+        # which matters as there is an entry for nearly every character of every value.
+        self._trigrams = {}  # type: Dict[str, array]
+        self._rows = {}  # type: Dict[int, dict]
+        # The number of entries in the lists in _trigrams, and how many of them are for removed rows
+        self._entries = 0
+        self._removed_entries = 0
+
+    def _add_trigrams(self, value: str, sequence: int):
+        """
+        Adds a row's sequence number to the lists of rows containing each substring of its value
+        :param value: The row's value
+        :param sequence: The row's sequence number
+        """
+        trigrams = get_trigrams(value)
+        for trigram in trigrams:
+            sequences = self._trigrams.get(trigram)
+            if sequences is None:
+                # Sequence numbers only outgrow 32 bits after billions of inserts
+                sequences = self._trigrams[trigram] = array("I")
+            sequences.append(sequence)
+        self._entries += len(trigrams)
+
+    def add(self, row: dict, sequence: int):
+        value = row.get(self.key)
+        if not isinstance(value, str):
+            return
+        self._values[sequence] = value
+        self._rows[sequence] = row
+        self._add_trigrams(value, sequence)
+
+    def remove(self, row: dict, sequence: int):
+        value = self._values.pop(sequence, _MISSING)
+        if value is _MISSING:
+            return
+        del self._rows[sequence]
+        self._removed_entries += len(get_trigrams(value))
+        if self._removed_entries * 2 > self._entries:
+            self._rebuild()
+
+    def _rebuild(self):
+        """
+        Rebuilds the lists of rows containing each substring, leaving out removed rows
+        """
+        self._trigrams = {}
+        self._entries = 0
+        self._removed_entries = 0
+        for sequence, value in self._values.items():
+            self._add_trigrams(value, sequence)
+
+    def select(self, mode: SelectionMode, selection_var) -> List[Tuple[int, dict]]:
+        if mode not in REGEX_METHODS:
+            return []
+        regex = get_regex(selection_var)
+        matcher = getattr(regex, REGEX_METHODS[mode])
+        trigrams = set()
+        for literal in get_literals(regex):
+            trigrams |= get_trigrams(literal)
+        if not trigrams:
+            return [(sequence, self._rows[sequence]) for sequence, value in self._values.items() if matcher(value)]
+
+        # Starting from the rarest substring keeps the set of candidates small
+        sequences = sorted((self._trigrams.get(trigram, ()) for trigram in trigrams), key=len)
+        candidates = set(sequences[0])
+        for other in sequences[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(other)
+        # Candidates can include removed rows, and rows whose value was changed after they were added, so every
+        # candidate is checked against its current value
+        rows = []
+        for sequence in candidates:
+            value = self._values.get(sequence)
+            if value is not None and matcher(value):
+                rows.append((sequence, self._rows[sequence]))
+        return rows
@@ -0,0 +1,229 @@
+import os
+import threading
+from typing import List, Optional
+
+from .Codecs import Codec, get_codec
+__author__ = 'Riley Flynn (nint8835)'
+
+
+def write_json_atomic(path: str, data, codec: Codec=None):
+    """
+    Writes data to a JSON file without ever leaving a partially written file at the path
+    :param path: The path of the file to write
+    :param data: The data to write
+    :param codec: The codec to encode the data with
+    """
+    codec = codec or get_codec()
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(codec.encode(data))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def load_json(path: str, codec: Codec=None):
+    """
+    Loads data from a JSON file
+    :param path: The path of the file to load
+    :param codec: The codec to decode the data with
+    :return: The data
+    """
+    codec = codec or get_codec()
+    with open(path, "rb") as f:
+        return codec.decode(f.read())
+
+
+def read_entries(path: str, codec: Codec=None) -> List[dict]:
+    """
+    Reads the entries of a journal file
+    :param path: The path of the journal file
+    :param codec: The codec to decode the entries with
+    :return: The list of entries, stopping at the first entry that was not completely written
+    """
+    codec = codec or get_codec()
+    entries = []
+    if not os.path.isfile(path):
+        return entries
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entries.append(codec.decode(line))
+            except ValueError:
+                break
+    return entries
+
+
+def apply_entry(data: list, entry: dict):
+    """
+    Applies a journal entry to the rows of a database
+    :param data: The rows of the database
+    :param entry: The entry to apply
+    """
+    if entry["op"] == "insert":
+        data.append(entry["row"])
+
+    elif entry["op"] == "remove":
+        positions = entry["positions"]
+        if all(positions[i] <= positions[i + 1] for i in range(len(positions) - 1)):
+            # Positions in order are the original positions of the rows shifted by the number of rows removed before
+            # them, so they can all be removed in one pass
+            removed = {position + i for i, position in enumerate(positions)}
+            data[:] = [row for i, row in enumerate(data) if i not in removed]
+        else:
+            for position in positions:
+                del data[position]
+
+    elif entry["op"] == "update":
+        for position in entry["positions"]:
+            data[position][entry["key"]] = entry["value"]
+
+
+class Journal:
+
+    """
+    An append-only log of the changes made to a JSONDatabase since its file was last written.
+    Each change is written as one line of JSON, and the journal is periodically compacted by writing the full database
+    to a new file that replaces the old one.
+    Compaction first moves the journal aside, so the database can keep writing to a fresh journal while the snapshot is
+    written in the background. The snapshot is written to a separate file, the old journal is removed, and the snapshot
+    is then renamed over the database file, so a crash at any point can be recovered from when the database is loaded.
+    """
+
+    def __init__(self, path: str, compact_after: int=1000, codec: Codec=None):
+        """
+        Creates a new Journal
+        :param path: The path of the database file
+        :param compact_after: The number of entries after which the journal should be compacted
+        :param codec: The codec used to encode and decode the database and journal
+        """
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.old_journal_path = path + ".journal.old"
+        self.compact_path = path + ".compact"
+        self.compact_after = compact_after
+        self.codec = codec or get_codec()
+
+        self.entries = 0
+        self._file = None
+        self._thread = None  # type: Optional[threading.Thread]
+        # Rows of a snapshot that hasn't been written yet
+        self._pending = None  # type: Optional[list]
+
+    def load(self) -> list:
+        """
+        Loads the database, recovering from any interrupted compaction and applying the changes in the journal
+        :return: The rows of the database
+        """
+        # A finished snapshot includes the changes in the old journal, so only the rename is left to do
+        if os.path.isfile(self.compact_path):
+            if os.path.isfile(self.old_journal_path):
+                os.remove(self.old_journal_path)
+            os.replace(self.compact_path, self.path)
+
+        if os.path.isfile(self.path):
+            data = load_json(self.path, self.codec)
+        else:
+            data = []
+
+        if os.path.isfile(self.old_journal_path):
+            for entry in read_entries(self.old_journal_path, self.codec):
+                apply_entry(data, entry)
+            self._write_snapshot(data)
+
+        for entry in read_entries(self.journal_path, self.codec):
+            apply_entry(data, entry)
+        if not os.path.isfile(self.path) or (os.path.isfile(self.journal_path) and
+                                             os.path.getsize(self.journal_path) > 0):
+            self._rotate()
+            self._write_snapshot(data)
+        else:
+            self._file = open(self.journal_path, "ab")
+
+        return data
+
+    def append(self, entry: dict, flush: bool=True):
+        """
+        Writes an entry to the journal
+        :param entry: The entry to write
+        :param flush: Whether to flush the journal to disk after writing the entry
+        """
+        self._file.write(self.codec.encode(entry) + b"\n")
+        self.entries += 1
+        if flush:
+            self._file.flush()
+
+    def flush(self):
+        """
+        Flushes the journal to disk
+        """
+        if self._file is not None:
+            self._file.flush()
+
+    def needs_compaction(self) -> bool:
+        """
+        :return: Whether the journal has grown large enough to be compacted, and no compaction is already running
+        """
+        return self.entries >= self.compact_after and (self._thread is None or not self._thread.is_alive())
+
+    def compact(self, data: list, background: bool=True):
+        """
+        Writes the full database to disk and empties the journal
+        :param data: The rows of the database
+        :param background: Whether to write the snapshot in a background thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            if background:
+                return
+            self._thread.join()
+
+        # A previous compaction failed, so its snapshot must be written before the journal is moved aside again
+        if self._pending is not None:
+            self._write_snapshot(self._pending)
+
+        self._rotate()
+        if background:
+            # Rows are copied, as they may be updated while the snapshot is being written
+            self._pending = [dict(row) for row in data]
+            self._thread = threading.Thread(target=self._write_snapshot, args=(self._pending,), daemon=True)
+            self._thread.start()
+        else:
+            try:
+                self._write_snapshot(data)
+            except OSError:
+                self._pending = [dict(row) for row in data]
+                raise
+
+    def close(self):
+        """
+        Waits for any running compaction to finish and closes the journal
+        """
+        if self._thread is not None:
+            self._thread.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        """
+        Moves the journal aside, to be removed once a snapshot including its changes has been written
+        """
+        if self._file is not None:
+            self._file.close()
+        if os.path.isfile(self.journal_path):
+            os.replace(self.journal_path, self.old_journal_path)
+        self._file = open(self.journal_path, "ab")
+        self.entries = 0
+
+    def _write_snapshot(self, data: list):
+        """
+        Writes a snapshot of the database, replacing the database file and removing the old journal
+        :param data: The rows to write
+        """
+        write_json_atomic(self.compact_path, data, self.codec)
+        if os.path.isfile(self.old_journal_path):
+            os.remove(self.old_journal_path)
+        os.replace(self.compact_path, self.path)
+        self._pending = None
@@ -0,0 +1,56 @@
+import argparse
+import os
+
+from .Database import JSONDatabase
+from .Enums import SelectionMode
+from .SQLite import SQLiteDatabase
+__author__ = 'Riley Flynn (nint8835)'
+
+
+def migrate_json_to_sqlite(json_path: str, sqlite_path: str, replace: bool=False) -> int:
+    """
+    Imports the rows of a JSONDatabase file into an SQLiteDatabase.
+    The JSON database is loaded as JSONDatabase would load it, including any changes in its journal.
+    :param json_path: The path of the JSON database file
+    :param sqlite_path: The path of the SQLite database file, which is created if it doesn't exist
+    :param replace: Whether to replace the rows of an SQLite database that already has rows, instead of refusing to
+    import into it, so that running the migration again doesn't import every row twice
+    :return: The number of rows imported
+    """
+    # Only open the database in journal mode if it was used in journal mode, as it creates an empty journal otherwise
+    journal = any(os.path.isfile(json_path + suffix) for suffix in (".journal", ".journal.old", ".compact"))
+    if not journal and not os.path.isfile(json_path):
+        # JSONDatabase would create an empty database instead
+        raise FileNotFoundError("The JSON database '{}' doesn't exist.".format(json_path))
+    json_db = JSONDatabase(json_path, journal=journal)
+    try:
+        data = json_db.data
+    finally:
+        json_db.close()
+
+    db = SQLiteDatabase(sqlite_path)
+    try:
+        db.defer_saves()
+        if db.data:
+            if not replace:
+                db.resume_saves(False)
+                raise ValueError("The SQLite database '{}' already has rows. Use replace to replace them."
+                                 .format(sqlite_path))
+            db.select(SelectionMode.ALL).remove()
+        for row in data:
+            db.insert(dict(row), save_after=False)
+        # Everything is committed together, so a crash part way through doesn't leave only some of the rows behind
+        db.resume_saves()
+    finally:
+        db.close()
+    return len(data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Imports a JSONDB .json file into an SQLite database.")
+    parser.add_argument("json_path", help="The path of the .json database file")
+    parser.add_argument("sqlite_path", help="The path of the SQLite database to create")
+    parser.add_argument("--replace", action="store_true", help="Replace the rows of an SQLite database that already "
+                                                               "has rows")
+    args = parser.parse_args()
+    print("Imported {} rows.".format(migrate_json_to_sqlite(args.json_path, args.sqlite_path, args.replace)))
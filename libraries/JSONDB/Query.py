@@ -0,0 +1,211 @@
+import functools
+import heapq
+import itertools
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .Enums import SelectionMode
+from .Regex import REGEX_METHODS, get_matcher
+from .Selection import DatabaseSelection
+from . import Database
+__author__ = 'Riley Flynn (nint8835)'
+
+# A selection mode, key and selection variable, as passed to JSONDatabase.select
+Condition = Tuple[SelectionMode, str, object]
+
+
+def get_predicate(mode: SelectionMode, key: str="", selection_var="") -> Callable[[dict], bool]:
+    """
+    Creates a function checking whether a row matches a selection
+    :param mode: The mode of selection
+    :param key: The key to perform the selection on
+    :param selection_var: The variable to be used for the selection
+    :return: A function taking a row and returning whether it matches
+    """
+    if mode == SelectionMode.VALUE_LESS_THAN:
+        return lambda row: row[key] < selection_var
+
+    if mode == SelectionMode.VALUE_GREATER_THAN:
+        return lambda row: row[key] > selection_var
+
+    if mode == SelectionMode.VALUE_EQUALS:
+        return lambda row: row[key] == selection_var
+
+    if mode == SelectionMode.VALUE_GREATER_THAN_OR_EQUAL:
+        return lambda row: row[key] >= selection_var
+
+    if mode == SelectionMode.VALUE_LESS_THAN_OR_EQUAL:
+        return lambda row: row[key] <= selection_var
+
+    if mode == SelectionMode.VALUE_NOT_EQUAL:
+        return lambda row: row[key] != selection_var
+
+    if mode == SelectionMode.VALUE_IN:
+        return lambda row: selection_var in row[key]
+
+    if mode in REGEX_METHODS:
+        matcher = get_matcher(mode, selection_var)
+        return lambda row: matcher(row[key]) is not None
+
+    if mode == SelectionMode.ALL:
+        return lambda row: True
+
+
+def match_any(predicates: List[Callable[[dict], bool]]) -> Callable[[dict], bool]:
+    """
+    Combines predicates into one that matches rows matching at least one of them
+    :param predicates: The predicates to combine
+    :return: The combined predicate
+    """
+    return functools.reduce(lambda first, second: lambda row: first(row) or second(row), predicates)
+
+
+class Query:
+
+    """
+    A lazily evaluated query on a JSONDatabase.
+    Queries are built by chaining calls, each returning a new query, and are only run when they are iterated over or
+    one of the methods returning results is called. Rows are streamed from the database as they are found, so methods
+    like first and exists stop as soon as they have their answer.
+    When one of the conditions can be answered by an index, the query starts from the index's rows instead of scanning
+    the whole database.
+    The database shouldn't be modified while a query is being iterated over.
+    """
+
+    def __init__(self,
+                 db: "Database.JSONDatabase",
+                 conditions: Tuple[Condition, ...]=(),
+                 any_conditions: Tuple[Tuple[Condition, ...], ...]=(),
+                 order: Tuple[str, bool]=None,
+                 limit: int=None):
+        """
+        Creates a new query. Queries are normally created by calling JSONDatabase.query.
+        :param db: The database to query
+        :param conditions: Conditions that all rows must match
+        :param any_conditions: Groups of conditions, where rows must match at least one condition from each group
+        :param order: The key to order the results by and whether to reverse the order, or None to keep the order of
+        the database
+        :param limit: The maximum number of results, or None for no limit
+        """
+        self.db = db
+        self._conditions = conditions
+        self._any_conditions = any_conditions
+        self._order = order
+        self._limit = limit
+
+    def _copy(self, **kwargs) -> "Query":
+        args = {
+            "conditions": self._conditions,
+            "any_conditions": self._any_conditions,
+            "order": self._order,
+            "limit": self._limit
+        }
+        args.update(kwargs)
+        return Query(self.db, **args)
+
+    def filter(self, mode: SelectionMode, key="", selection_var="") -> "Query":
+        """
+        Narrows the query to rows matching a selection
+        :param mode: The mode of selection
+        :param key: The key to perform the selection on
+        :param selection_var: The variable to be used for the selection
+        :return: The narrowed query
+        """
+        return self._copy(conditions=self._conditions + ((mode, key, selection_var),))
+
+    def filter_any(self, *conditions: Condition) -> "Query":
+        """
+        Narrows the query to rows matching at least one of several selections
+        :param conditions: Tuples of the mode, key and selection variable of each selection
+        :return: The narrowed query
+        """
+        return self._copy(any_conditions=self._any_conditions + (tuple(conditions),))
+
+    def order_by(self, key: str, reverse: bool=False) -> "Query":
+        """
+        Orders the results of the query by the value of a key
+        :param key: The key to order by
+        :param reverse: Whether to order from highest to lowest
+        :return: The ordered query
+        """
+        return self._copy(order=(key, reverse))
+
+    def limit(self, count: int) -> "Query":
+        """
+        Limits the number of results of the query
+        :param count: The maximum number of results
+        :return: The limited query
+        """
+        if self._limit is not None:
+            count = min(count, self._limit)
+        return self._copy(limit=count)
+
+    def _get_candidates(self) -> Tuple[Iterable[dict], Tuple[Condition, ...]]:
+        """
+        Picks the rows the query has to check, using an index if one can answer one of the conditions
+        :return: The rows to check, and the conditions that still need to be checked
+        """
+        # Equality conditions usually match the fewest rows, so they're tried first
+        conditions = sorted(self._conditions, key=lambda condition: condition[0] != SelectionMode.VALUE_EQUALS)
+        for i, (mode, key, selection_var) in enumerate(conditions):
+            rows = self.db._select_from_index(mode, key, selection_var)
+            if rows is not None:
+                return rows, tuple(conditions[:i] + conditions[i + 1:])
+        return self.db._scan(), self._conditions
+
+    def __iter__(self) -> Iterator[dict]:
+        rows, conditions = self._get_candidates()
+        # Equality conditions usually match the fewest rows, so they're checked first
+        conditions = sorted(conditions, key=lambda condition: condition[0] != SelectionMode.VALUE_EQUALS)
+        predicates = [get_predicate(*condition) for condition in conditions]
+        predicates += [match_any([get_predicate(*condition) for condition in group])
+                       for group in self._any_conditions if group]
+
+        # Chained filters only pass rows matching one condition on to the next, without any Python-level glue
+        results = iter(rows)
+        for predicate in predicates:
+            results = filter(predicate, results)
+
+        if self._order is not None:
+            key, reverse = self._order
+            if self._limit is not None:
+                # Only the top rows need to be kept, rather than sorting every result
+                pick = heapq.nlargest if reverse else heapq.nsmallest
+                results = iter(pick(self._limit, results, key=itemgetter(key)))
+            else:
+                results = iter(sorted(results, key=itemgetter(key), reverse=reverse))
+
+        if self._limit is not None:
+            results = itertools.islice(results, self._limit)
+
+        return results
+
+    def all(self) -> List[dict]:
+        """
+        :return: A list of all results of the query
+        """
+        return list(self)
+
+    def first(self) -> Optional[dict]:
+        """
+        :return: The first result of the query, or None if there are no results
+        """
+        return next(iter(self.limit(1)), None)
+
+    def count(self) -> int:
+        """
+        :return: The number of results of the query
+        """
+        return sum(1 for _ in self)
+
+    def exists(self) -> bool:
+        """
+        :return: Whether the query has any results
+        """
+        return self.first() is not None
+
+    def selection(self) -> DatabaseSelection:
+        """
+        :return: A DatabaseSelection containing the results of the query, which can be used to modify them
+        """
+        return DatabaseSelection(self.all(), self.db)
@@ -0,0 +1,144 @@
+import functools
+import re
+from typing import Callable, List, Optional, Pattern
+
+from .Enums import SelectionMode
+__author__ = 'Riley Flynn (nint8835)'
+
+# The number of compiled patterns kept by compile_regex. The cache is shared by every database.
+REGEX_CACHE_SIZE = 256
+
+# The method of a compiled pattern used by each regex selection mode
+REGEX_METHODS = {
+    SelectionMode.REGEX_MATCH: "match",
+    SelectionMode.REGEX_SEARCH: "search",
+    SelectionMode.REGEX_FULLMATCH: "fullmatch"
+}
+
+REGEX_QUANTIFIER = re.compile(r"\{\d*(,\d*)?\}")
+
+# The number of hex digits following each escape for a character code
+HEX_ESCAPES = {"x": 2, "u": 4, "U": 8}
+
+
+@functools.lru_cache(maxsize=REGEX_CACHE_SIZE)
+def compile_regex(pattern, flags: int=0) -> Pattern:
+    """
+    Compiles a regex, reusing the compiled pattern if it was used recently
+    :param pattern: The regex to compile
+    :param flags: The flags to compile the regex with, such as re.IGNORECASE
+    :return: The compiled pattern
+    """
+    return re.compile(pattern, flags)
+
+
+def get_regex(selection_var) -> Pattern:
+    """
+    Gets the compiled pattern for the selection variable of a regex selection
+    :param selection_var: A regex, a tuple of a regex and its flags, or a compiled pattern
+    :return: The compiled pattern
+    """
+    if isinstance(selection_var, tuple):
+        return compile_regex(*selection_var)
+    return compile_regex(selection_var)
+
+
+def get_matcher(mode: SelectionMode, selection_var) -> Callable[[str], Optional[object]]:
+    """
+    Gets the function performing a regex selection on a value
+    :param mode: The regex selection mode
+    :param selection_var: A regex, a tuple of a regex and its flags, or a compiled pattern
+    :return: A function taking a value and returning a match object, or None if the value doesn't match
+    """
+    return getattr(get_regex(selection_var), REGEX_METHODS[mode])
+
+
+def is_literal(char: str, ignore_case: bool) -> bool:
+    """
+    Checks whether a character in a regex only matches characters that casefold to the same thing it does
+    :param char: The character
+    :param ignore_case: Whether the regex is case-insensitive
+    :return: Whether the character can be part of a run of literal characters
+    """
+    # Case-insensitive matching of non-ASCII characters doesn't always agree with casefolding, and i also matches the
+    # dotted and dotless Turkish i
+    return not ignore_case or (ord(char) < 128 and char not in "iI")
+
+
+def get_literals(regex: Pattern) -> List[str]:
+    """
+    Finds runs of characters that every string matched by a regex has to contain.
+    Only the parts of the pattern outside of groups are checked, and anything that could make a character optional ends
+    the run it is in, so some required characters may be missed, but characters that aren't required never are.
+    :param regex: The compiled regex
+    :return: The runs of characters, casefolded
+    """
+    pattern = regex.pattern
+    if not isinstance(pattern, str) or regex.flags & re.VERBOSE:
+        return []
+    ignore_case = bool(regex.flags & re.IGNORECASE)
+
+    literals = []
+    run = []
+    depth = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        index += 1
+
+        if char == "\\" and index < len(pattern):
+            escaped = pattern[index]
+            index += 1
+            if not escaped.isalnum():
+                if depth == 0 and is_literal(escaped, ignore_case):
+                    run.append(escaped)
+                    continue
+            # Other escapes are character classes, anchors, backreferences or character codes
+            elif escaped in HEX_ESCAPES:
+                index += HEX_ESCAPES[escaped]
+            elif escaped == "N":
+                index = pattern.find("}", index) + 1 or len(pattern)
+            elif escaped.isdigit():
+                while index < len(pattern) and pattern[index].isdigit():
+                    index += 1
+
+        elif char == "[":
+            if pattern.startswith("^", index):
+                index += 1
+            # A ] at the start of the class is part of the class
+            if pattern.startswith("]", index):
+                index += 1
+            while index < len(pattern) and pattern[index] != "]":
+                index += 2 if pattern[index] == "\\" else 1
+            index += 1
+
+        elif char == "(":
+            depth += 1
+
+        elif char == ")":
+            depth -= 1
+
+        elif char == "|":
+            if depth == 0:
+                return []
+
+        elif char in "*?{":
+            quantifier = REGEX_QUANTIFIER.match(pattern, index - 1)
+            if char != "{" or quantifier is not None:
+                # The character before the quantifier is optional
+                if depth == 0 and run:
+                    run.pop()
+                if quantifier is not None:
+                    index = quantifier.end()
+
+        elif char not in ".^$+}]" and depth == 0 and is_literal(char, ignore_case):
+            run.append(char)
+            continue
+
+        if run:
+            literals.append("".join(run).casefold())
+            run = []
+
+    if run:
+        literals.append("".join(run).casefold())
+    return literals
@@ -0,0 +1,106 @@
+import sys
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Tuple, Type
+__author__ = 'Riley Flynn (nint8835)'
+
+# Strings up to this length are interned, so values repeated across rows (names, dates, commands) are only stored once.
+# Longer strings are usually unique, and interning them would only add overhead.
+INTERN_MAX_LENGTH = 64
+
+_row_classes = {}  # type: Dict[Tuple[str, ...], Type[CompactRow]]
+
+
+def compact_value(value):
+    """
+    Interns a value if it is a short string
+    :param value: The value
+    :return: The interned value, or the value itself if it isn't a short string
+    """
+    if type(value) is str and len(value) <= INTERN_MAX_LENGTH:
+        return sys.intern(value)
+    return value
+
+
+class CompactRow(MutableMapping):
+
+    """
+    A memory-compact row, storing the values of a fixed set of keys in slots instead of a dict.
+    Rows behave like dicts, and can have keys outside of their set of keys, which are stored in a small dict of their
+    own. Subclasses for each set of keys are created by get_row_class.
+    """
+
+    __slots__ = ("_extra",)
+
+    # Maps each key in the row's set of keys to the slot storing its value
+    _slots = {}  # type: Dict[str, object]
+
+    def __init__(self, data: dict=None):
+        self._extra = None
+        if data is not None:
+            for key, value in data.items():
+                self[key] = value
+
+    def __getitem__(self, key):
+        slot = self._slots.get(key)
+        if slot is not None:
+            try:
+                return slot.__get__(self)
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        value = compact_value(value)
+        slot = self._slots.get(key)
+        if slot is not None:
+            slot.__set__(self, value)
+            return
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        slot = self._slots.get(key)
+        if slot is not None:
+            try:
+                slot.__delete__(self)
+                return
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra is not None and key in self._extra:
+            del self._extra[key]
+            return
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key, slot in self._slots.items():
+            try:
+                slot.__get__(self)
+            except AttributeError:
+                continue
+            yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def get_row_class(keys: Tuple[str, ...]) -> Type[CompactRow]:
+    """
+    Gets the CompactRow subclass storing a set of keys in slots
+    :param keys: The keys to store in slots
+    :return: The row class
+    """
+    if keys not in _row_classes:
+        # Slots are named by position, as keys don't have to be valid identifiers
+        slot_names = tuple("_{}".format(i) for i in range(len(keys)))
+        row_class = type("CompactRow", (CompactRow,), {"__slots__": slot_names})
+        row_class._slots = {key: getattr(row_class, name) for key, name in zip(keys, slot_names)}
+        _row_classes[keys] = row_class
+    return _row_classes[keys]
@@ -0,0 +1,282 @@
+import json
+import sqlite3
+import threading
+from typing import Iterator, List, Optional
+
+from .Database import locked
+from .Enums import IndexType, SelectionMode
+from .Query import Query, get_predicate
+from .Regex import REGEX_METHODS, compile_regex, get_regex
+from .Selection import DatabaseSelection
+__author__ = 'Riley Flynn (nint8835)'
+
+# Selection modes that can be performed with an SQL comparison operator.
+# Not equal uses IS NOT, as != never matches rows where the key is null, while None != value in Python.
+SQL_OPERATORS = {
+    SelectionMode.VALUE_LESS_THAN: "<",
+    SelectionMode.VALUE_GREATER_THAN: ">",
+    SelectionMode.VALUE_EQUALS: "=",
+    SelectionMode.VALUE_GREATER_THAN_OR_EQUAL: ">=",
+    SelectionMode.VALUE_LESS_THAN_OR_EQUAL: "<=",
+    SelectionMode.VALUE_NOT_EQUAL: "IS NOT"
+}
+
+
+def get_json_path(key: str) -> str:
+    """
+    Creates an SQL string literal containing the JSON path of a key, for use with json_extract.
+    The path is written into the SQL rather than passed as a parameter, so that expression indexes on it can be used.
+    :param key: The key to create the path for
+    :return: The SQL string literal
+    """
+    return "'$.{}'".format(json.dumps(key, ensure_ascii=False).replace("'", "''"))
+
+
+def regex_select(method: str, pattern: str, flags: int, value) -> bool:
+    """
+    Implements the regex selections as an SQL function, with the same behaviour as the regex selection modes
+    :param method: The method of the compiled regex to use, such as "match" or "search"
+    :param pattern: The regex
+    :param flags: The flags to compile the regex with
+    :param value: The value to match the regex against
+    :return: Whether the value matches the regex
+    """
+    return isinstance(value, str) and getattr(compile_regex(pattern, flags), method)(value) is not None
+
+
+class SQLiteRow(dict):
+
+    """A row loaded from an SQLiteDatabase, remembering which database row it came from"""
+
+    __slots__ = ("rowid",)
+
+    def __init__(self, rowid: int, data: dict):
+        super(SQLiteRow, self).__init__(data)
+        self.rowid = rowid
+
+
+class SQLiteDatabase:
+
+    """
+    A database with the same interface as JSONDatabase, storing each row as a JSON document in an SQLite table.
+    Rows are only loaded when they are selected, so large tables don't need to be kept in memory or written out in full
+    on every save. Selections on comparable values (numbers, strings and booleans) are performed by SQLite, and can use
+    indexes created with create_index. Other selections, such as VALUE_IN, are performed in Python.
+    Unlike JSONDatabase, rows that don't have the selected key are never selected, rather than raising a KeyError.
+    As with JSONDatabase, the database can be used from several threads, as each method holds the database's lock.
+    """
+
+    def __init__(self, path: str):
+        """
+        Creates a new SQLiteDatabase
+        :param path: The path of the SQLite database file
+        """
+        self.path = path
+        # Held while the database is read or changed, so the database can be used from multiple threads
+        self.lock = threading.RLock()
+        # The connection is shared by every thread using the database, which the lock makes safe
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.create_function("regex_select", 4, regex_select)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, this only risks losing the most recent commits if the OS crashes, never corrupting the database
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS rows (id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL)")
+        self._connection.commit()
+        # Every row, decoded, loaded when data is first used and kept up to date by insert, remove and update, so code
+        # reading data repeatedly doesn't decode the whole table each time. Changes made through other connections to
+        # the same file aren't seen by it.
+        self._data = None  # type: Optional[List[SQLiteRow]]
+        # Greater than 0 while saves are deferred by defer_saves
+        self._saves_deferred = 0
+
+    @property
+    @locked
+    def data(self) -> List[SQLiteRow]:
+        """
+        :return: A list of every row in the database. The list is a copy, so changing it doesn't change the database,
+        but as with JSONDatabase the rows in it are shared, and should only be changed through DatabaseSelection.update.
+        """
+        if self._data is None:
+            self._data = list(self._rows("SELECT id, data FROM rows ORDER BY id"))
+        return self._data[:]
+
+    def _rows(self, sql: str, params=()) -> Iterator[SQLiteRow]:
+        for rowid, data in self._connection.execute(sql, params):
+            yield SQLiteRow(rowid, json.loads(data))
+
+    @locked
+    def _scan(self) -> Iterator[SQLiteRow]:
+        """
+        :return: An iterator over every row in the database
+        """
+        if self._data is not None:
+            return iter(self._data)
+        return self._rows("SELECT id, data FROM rows ORDER BY id")
+
+    @locked
+    def save_db(self):
+        """
+        Commits any changes to the database, unless saves are deferred
+        """
+        if not self._saves_deferred:
+            self._connection.commit()
+
+    @locked
+    def flush(self):
+        """
+        Commits any changes to the database
+        """
+        self._connection.commit()
+
+    @locked
+    def defer_saves(self):
+        """
+        Stops save_db from committing anything until resume_saves is called, so several changes are committed at once.
+        Calls can be nested, and saves resume once every call has been matched by a call to resume_saves.
+        """
+        self._saves_deferred += 1
+
+    @locked
+    def resume_saves(self, save: bool=True):
+        """
+        Undoes a call to defer_saves
+        :param save: Whether to commit the changes made while saves were deferred, if saves are no longer deferred.
+        As with JSONDatabase, changes that aren't saved are kept, and committed by the next save.
+        """
+        self._saves_deferred -= 1
+        if save and not self._saves_deferred:
+            self.save_db()
+
+    @locked
+    def compact(self):
+        """
+        Commits any changes and moves them from the write-ahead log into the database file
+        """
+        self._connection.commit()
+        self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    @locked
+    def close(self):
+        """
+        Commits any changes and closes the database
+        """
+        self._connection.commit()
+        self._connection.close()
+
+    def _select_from_index(self, mode: SelectionMode, key: str, selection_var) -> Optional[List[SQLiteRow]]:
+        """
+        Selects rows using SQLite, if the selection can be performed in SQL
+        :param mode: The mode of selection
+        :param key: The key to perform the selection on
+        :param selection_var: The variable to be used for the selection
+        :return: The selected rows, or None if the selection has to be performed in Python
+        """
+        if mode == SelectionMode.ALL:
+            return self.data
+
+        if mode in REGEX_METHODS:
+            regex = get_regex(selection_var)
+            if isinstance(regex.pattern, str):
+                return list(self._rows("SELECT id, data FROM rows WHERE regex_select(?, ?, ?, json_extract(data, {})) "
+                                       "ORDER BY id".format(get_json_path(key)),
+                                       (REGEX_METHODS[mode], regex.pattern, regex.flags)))
+
+        # Other types, such as lists and None, don't compare the same way in SQL as they do in Python
+        if mode in SQL_OPERATORS and isinstance(selection_var, (int, float, str)):
+            # json_type is only null for rows missing the key, which IS NOT would otherwise select
+            return list(self._rows("SELECT id, data FROM rows WHERE json_type(data, {0}) IS NOT NULL AND "
+                                   "json_extract(data, {0}) {1} ? ORDER BY id"
+                                   .format(get_json_path(key), SQL_OPERATORS[mode]), (selection_var,)))
+
+        return None
+
+    @locked
+    def select(self, mode: SelectionMode, key="", selection_var="") -> DatabaseSelection:
+        """
+        Selects rows from the database that match certain criteria
+        :param mode: The mode of selection used to perform the selection
+        :param key: The key to perform the selection on
+        :param selection_var: The variable to be used for the selection
+        :return: A DatabaseSelection object containing the selection
+        """
+        rows = self._select_from_index(mode, key, selection_var)
+        if rows is None:
+            rows = list(filter(get_predicate(mode, key, selection_var), self._scan()))
+        return DatabaseSelection(rows, self)
+
+    def query(self) -> Query:
+        """
+        Starts a lazily evaluated query on the database
+        :return: A Query matching every row, to be narrowed with Query.filter
+        """
+        return Query(self)
+
+    @locked
+    def insert(self, row: dict, save_after: bool=True):
+        """
+        Inserts a new row into the database
+        :param row: The row you wish to insert
+        :param save_after: Whether to commit the database after inserting the row
+        """
+        data = json.dumps(row)
+        cursor = self._connection.execute("INSERT INTO rows (data) VALUES (?)", (data,))
+        if self._data is not None:
+            self._data.append(SQLiteRow(cursor.lastrowid, json.loads(data)))
+        if save_after:
+            self.save_db()
+
+    @locked
+    def create_index(self, key: str, index_type: IndexType=IndexType.HASH):
+        """
+        Creates an index on a key. SQLite's indexes serve both equality and range selections, so the index type is only
+        kept for compatibility with JSONDatabase. Trigram indexes aren't supported, and are ignored.
+        :param key: The key to index
+        :param index_type: The type of index to create
+        """
+        if index_type == IndexType.TRIGRAM:
+            return
+        self._connection.execute("CREATE INDEX IF NOT EXISTS \"index_{}\" ON rows (json_extract(data, {}))"
+                                 .format(key.encode().hex(), get_json_path(key)))
+        self._connection.commit()
+
+    @locked
+    def drop_index(self, key: str, index_type: IndexType=None):
+        """
+        Removes the index on a key
+        :param key: The key to remove the index from
+        :param index_type: Unused, kept for compatibility with JSONDatabase
+        """
+        self._connection.execute("DROP INDEX IF EXISTS \"index_{}\"".format(key.encode().hex()))
+        self._connection.commit()
+
+    @locked
+    def _remove_rows(self, rows: List[SQLiteRow]):
+        """
+        Removes rows from the database, without committing
+        :param rows: The rows to remove
+        """
+        self._connection.executemany("DELETE FROM rows WHERE id = ?", [(row.rowid,) for row in rows])
+        if self._data is not None:
+            rowids = {row.rowid for row in rows}
+            self._data = [row for row in self._data if row.rowid not in rowids]
+
+    @locked
+    def _update_rows(self, rows: List[SQLiteRow], key: str, value):
+        """
+        Sets the value of a key in rows of the database, without committing
+        :param rows: The rows to update
+        :param key: The key to set
+        :param value: The new value
+        """
+        value = json.dumps(value)
+        self._connection.executemany("UPDATE rows SET data = json_set(data, {}, json(?)) WHERE id = ?"
+                                     .format(get_json_path(key)),
+                                     [(value, row.rowid) for row in rows])
+        for row in rows:
+            row[key] = json.loads(value)
+        if self._data is not None:
+            # The rows being updated may have been loaded separately from the ones in _data
+            rowids = {row.rowid for row in rows}
+            for row in self._data:
+                if row.rowid in rowids:
+                    row[key] = json.loads(value)
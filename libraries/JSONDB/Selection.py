@@ -1,7 +1,6 @@
-import re
-
 from .Enums import SelectionMode
 from .Exceptions import SelectionReuseException
+from .Regex import REGEX_METHODS, get_matcher
 from . import Database
 __author__ = 'Riley Flynn (nint8835)'
 
@@ -53,8 +52,7 @@ class DatabaseSelection:
         Removes all rows contained in this selection from the DB
         """
         if not self._selection_modified:
-            for row in self.rows:
-                self.db.data.remove(row)
+            self.db._remove_rows(self.rows)
             self.db.save_db()
             self._selection_modified = True
             self.rows = []
@@ -68,8 +66,7 @@ class DatabaseSelection:
         :param value: The new value
         """
         if not self._selection_modified:
-            for row in self.rows:
-                self.db.data[self.db.data.index(row)][key] = value
+            self.db._update_rows(self.rows, key, value)
             self.db.save_db()
             self._selection_modified = True
             self.rows = []
@@ -103,9 +100,9 @@ class DatabaseSelection:
             if mode == SelectionMode.VALUE_NOT_EQUAL:
                 return DatabaseSelection([row for row in self.rows if row[key] != selection_var], self.db)
 
-            if mode == SelectionMode.REGEX_MATCH:
-                regex = re.compile(selection_var)
-                return DatabaseSelection([row for row in self.rows if regex.match(row["key"])], self.db)
+            if mode in REGEX_METHODS:
+                matcher = get_matcher(mode, selection_var)
+                return DatabaseSelection([row for row in self.rows if matcher(row[key])], self.db)
 
             if mode == SelectionMode.VALUE_IN:
                 return DatabaseSelection([row for row in self.rows if selection_var in row[key]], self.db)
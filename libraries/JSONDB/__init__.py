@@ -1,3 +1,7 @@
+from .Async import AsyncDatabase
+from .Backends import open_database
 from .Database import JSONDatabase
-from .Enums import SelectionMode
+from .Enums import IndexType, SelectionMode, StorageBackend
+from .Query import Query
+from .SQLite import SQLiteDatabase
 __author__ = 'Riley Flynn (nint8835)'
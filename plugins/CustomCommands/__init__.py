@@ -16,6 +16,7 @@ class Plugin(BasePlugin):
         super().__init__(manifest, bot_instance)
         self.manage_perm = create_match_any_permission_group([ManageMessages(), Owner(self.bot)])
         self.commands = JSONDatabase(os.path.join(self.manifest["path"], "commands.json"))
+        self.commands.create_index("command")
         self.refresh_custom_registry()
 
     def refresh_custom_registry(self):
@@ -56,6 +57,6 @@ class Plugin(BasePlugin):
                     await args.channel.send(":no_entry_sign: That command does not exist.")
 
     async def command_handle_customcommand(self, args):
-        sel = self.commands.select(SelectionMode.VALUE_EQUALS, "command", args["command_args"][0])
-        if len(sel) == 1:
-            await args.channel.send(sel[0]["message"])
+        command = self.commands.query().filter(SelectionMode.VALUE_EQUALS, "command", args["command_args"][0]).first()
+        if command is not None:
+            await args.channel.send(command["message"])
@@ -34,6 +34,13 @@ Created: {}
 Roles: {}
 ```"""
 
+QUEUE_STATS_STRING = """```Events queued: {}/{}
+Dropped when the queue was full:
+    {}
+Shed to make room for other events:
+    {}
+```"""
+
 SERVER_INFO_STRING = """```Server name: {}
 Roles:
     {}
@@ -117,6 +124,21 @@ class Plugin(BasePlugin):
                                                   Permission(),
                                                   self,
                                                   self.command_users)
+        self.bot.CommandRegistry.register_command("reloadservers",
+                                                  "Reloads the blacklisted and allowed servers from the config.",
+                                                  Owner(self.bot),
+                                                  self,
+                                                  self.command_reloadservers)
+        self.bot.CommandRegistry.register_command("queuestats",
+                                                  "Displays the size of the event queue and how many events were dropped.",
+                                                  Owner(self.bot),
+                                                  self,
+                                                  self.command_queuestats)
+        self.bot.CommandRegistry.register_command("prefix",
+                                                  "Views or changes the command prefixes for the server.",
+                                                  Permission(),
+                                                  self,
+                                                  self.command_prefix)
 
         with open(os.path.join(self.manifest["path"], "config.json")) as f:
             self.config = json.load(f)
@@ -187,7 +209,7 @@ class Plugin(BasePlugin):
     async def command_debug(self, args):
         if self.config["enable_debug"] and Owner(self.bot).has_permission(args["author"]):
             try:
-                results = eval(args["content"].split(self.bot.config["command_prefix"]+"debug ")[1])
+                results = eval(args["unsplit_args"].split("debug ", 1)[1])
             except:
                 results = traceback.format_exc(5)
             await args.channel.send("```python\n{}```".format(results))
@@ -217,14 +239,15 @@ class Plugin(BasePlugin):
         await args.channel.send("The bot has been up for {} days, {} hours, {} minutes, and {} seconds.".format(days, hours, minutes, seconds))
 
     async def command_commands(self, args):
+        prefix = self.bot.PrefixManager.get_prefixes(getattr(args["channel"], "guild", None))[0]
         message_str = ""
         for command in self.bot.CommandRegistry.get_available_commands_for_user(args["author"]):
             if message_str == "":
                 message_str += "```"
-            if len(message_str) + len("{}{}: {}\n".format(self.bot.config["command_prefix"], command["command"], command["description"])) >= 1997:
+            if len(message_str) + len("{}{}: {}\n".format(prefix, command["command"], command["description"])) >= 1997:
                 await args.author.send(message_str + "```")
                 message_str = "```"
-            message_str += "{}{}: {}\n".format(self.bot.config["command_prefix"], command["command"], command["description"])
+            message_str += "{}{}: {}\n".format(prefix, command["command"], command["description"])
         if message_str != "":
             await args.author.send(message_str + "```")
 
@@ -268,3 +291,39 @@ class Plugin(BasePlugin):
     async def command_users(self, args):
         if not args["channel"].is_private:
             await args.channel.send("There are {} members in this server.".format(args["channel"].server.member_count))
+
+    async def command_prefix(self, args):
+        server = getattr(args["channel"], "guild", None)
+        if len(args["command_args"]) == 1:
+            prefixes = self.bot.PrefixManager.get_prefixes(server)
+            await args.channel.send("Command prefixes: {}".format(", ".join("`{}`".format(prefix) for prefix in prefixes)))
+        elif server is None:
+            await args.channel.send(":no_entry_sign: Prefixes can only be changed in servers.")
+        elif not self.superadmin.has_permission(args["author"]):
+            await args.channel.send(":no_entry_sign: You do not have permission to change the prefixes for this server.")
+        elif args["command_args"][1] == "set" and len(args["command_args"]) > 2:
+            try:
+                self.bot.PrefixManager.set_prefixes(server, args["command_args"][2:])
+                await args.channel.send(":ballot_box_with_check: Command prefixes updated.")
+            except ValueError:
+                await args.channel.send(":no_entry_sign: Prefixes can not be empty.")
+        elif args["command_args"][1] == "reset":
+            self.bot.PrefixManager.reset_prefixes(server)
+            await args.channel.send(":ballot_box_with_check: Command prefixes reset.")
+        else:
+            await args.channel.send(":no_entry_sign: Usage: `{0}prefix`, `{0}prefix set <prefixes...>` or "
+                                    "`{0}prefix reset`".format(self.bot.PrefixManager.get_prefixes(server)[0]))
+
+    async def command_queuestats(self, args):
+        stats = self.bot.EventManager.get_queue_stats()
+        await args.channel.send(QUEUE_STATS_STRING.format(
+            stats["size"],
+            stats["max_size"] or "unlimited",
+            "\n    ".join("{}: {}".format(event_type.name, count) for event_type, count in stats["dropped"].items())
+            or "None",
+            "\n    ".join("{}: {}".format(event_type.name, count) for event_type, count in stats["shed"].items())
+            or "None"))
+
+    async def command_reloadservers(self, args):
+        self.bot.reload_server_filter()
+        await args.channel.send(":ballot_box_with_check: Server filter reloaded.")
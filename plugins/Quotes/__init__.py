@@ -24,10 +24,18 @@ class Plugin(BasePlugin):
                                                   Permission(),
                                                   self,
                                                   self.on_command)
-        self.quotes = JSONDatabase(os.path.join(self.manifest["path"], "quotes.json"))
+        self.quotes = JSONDatabase(os.path.join(self.manifest["path"], "quotes.json"),
+                                   journal=True,
+                                   flush_interval=1.0,
+                                   codec="auto",
+                                   loop=self.bot.loop)
         self.markov = MarkovChain()
         self.generate_chain()
 
+    def disable(self):
+        super(Plugin, self).disable()
+        self.quotes.close()
+
     def generate_chain(self):
         self.markov.generateDatabase("\n".join([i["msg"] for i in self.quotes.data]))
 
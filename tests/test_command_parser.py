@@ -0,0 +1,36 @@
+import shlex
+import unittest
+
+from NintbotForDiscord.CommandParser import get_command_name, split_args
+
+__author__ = 'Riley Flynn (nint8835)'
+
+# Commands that shlex can split, including ones using whitespace shlex doesn't split on
+COMMANDS = ["ping", "ping  5   10 ", "\tquote add  hello", "say \"hello world\" now", "say 'it''s' x", "say a\\ b",
+            "say a\u00a0b c", "say a\u3000b", "roll 2d6\n+3", "a\"b c\"d"]
+
+
+class CommandParserTests(unittest.TestCase):
+
+    def test_split_args_matches_shlex(self):
+        for command in COMMANDS:
+            with self.subTest(command=command):
+                self.assertEqual(split_args(command), shlex.split(command))
+
+    def test_quotes_group_arguments(self):
+        self.assertEqual(split_args("quote add \"a b\" 'c d'"), ["quote", "add", "a b", "c d"])
+
+    def test_unbalanced_quotes_fall_back_to_spaces(self):
+        with self.assertLogs("CommandParser"):
+            self.assertEqual(split_args("say it's  x"), ["say", "it's", "", "x"])
+        with self.assertLogs("CommandParser"):
+            self.assertEqual(get_command_name("say it's"), "say")
+
+    def test_command_name(self):
+        for command in COMMANDS:
+            with self.subTest(command=command):
+                self.assertEqual(get_command_name(command), split_args(command)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+# The bot's modules import each other, and can only be imported starting from Bot, as the bot itself does
+import NintbotForDiscord.Bot
+from NintbotForDiscord.CommandRegistry import CommandRegistry, get_command_name_from_pattern
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+class FakePlugin:
+
+    def __init__(self, name: str):
+        self.manifest = {"name": name}
+
+
+def scan_modern_commands(commands: list, content: str) -> list:
+    """
+    Finds the modern commands matching a message by matching every command's regex, as the registry used to
+    """
+    return [command for command in commands if command["command"].match(content)]
+
+
+class CommandNameTests(unittest.TestCase):
+
+    def test_name_followed_by_required_whitespace(self):
+        for pattern in (r"^ping$", r"ping\Z", r"^ping\s(.*)", r"^ping\s+(.*)", r"ping (\d+)", r"ping\s{1,3}x"):
+            with self.subTest(pattern=pattern):
+                self.assertEqual(get_command_name_from_pattern(pattern), "ping")
+
+    def test_name_followed_by_optional_whitespace(self):
+        for pattern in (r"ping\s*(.*)", r"ping\s?(.*)", r"ping\s{0,3}(.*)", r"ping\s{,3}(.*)", r"ping *x",
+                        r"ping ?x", r"ping\s*?x"):
+            with self.subTest(pattern=pattern):
+                self.assertIsNone(get_command_name_from_pattern(pattern))
+
+    def test_name_not_ending_the_word(self):
+        for pattern in (r"ping", r"ping(.*)", r"pings?", r"ping|pong", r"(?i)ping\s", r"\w+\s"):
+            with self.subTest(pattern=pattern):
+                self.assertIsNone(get_command_name_from_pattern(pattern))
+
+
+class ModernCommandTests(unittest.TestCase):
+
+    PATTERNS = [r"^ping\s*(.*)", r"^ping\s+(\d+)$", r"^ping$", r"^pong (\w+)", r"^(\w+) all$", r"roll (\d+)d(\d+)",
+                r"^help\s{0,2}(.*)", r"^ping (.*)", r"^(?P<count>\d+)(?:d(?P<sides>\d+))?", r"(?i)^ROLL (\d+)",
+                r"^(?P<count>\d+) (\w+)", r"^(\w)(\w)\2"]
+    MESSAGES = ["ping", "pingpong", "ping 5", "ping  hello", "pong x", "pong", "everything all", "roll 2d6",
+                "helpme", "help commands", "ping all", "", "2d6", "3 all", "roll 5", "abb"]
+
+    def setUp(self):
+        self.registry = CommandRegistry(None)
+        plugin = FakePlugin("Test")
+        for pattern in self.PATTERNS:
+            self.registry.register_modern_command(pattern, "", None, plugin, None)
+
+    def test_optional_whitespace_still_matches_longer_words(self):
+        self.assertEqual([command["command_string"] for command, _ in self.registry.match_modern_commands("pingpong")],
+                         [r"^ping\s*(.*)"])
+
+    def test_matches_same_commands_as_scan(self):
+        for message in self.MESSAGES:
+            with self.subTest(message=message):
+                self.assertEqual([command for command, _ in self.registry.match_modern_commands(message)],
+                                 scan_modern_commands(self.registry._modern_commands, message))
+
+    def test_arguments_match_findall(self):
+        for message in self.MESSAGES:
+            for command, args in self.registry.match_modern_commands(message):
+                with self.subTest(message=message, pattern=command["command_string"]):
+                    self.assertEqual(args, command["command"].findall(message)[0])
+
+    def test_many_groups(self):
+        registry = CommandRegistry(None)
+        plugin = FakePlugin("Test")
+        for i in range(100):
+            registry.register_modern_command(r"^(\w+) (\d*){} ?(.*)".format(i % 10), "", None, plugin, None)
+        for message in ("x 15", "x 123 abc", "x 5", "x"):
+            with self.subTest(message=message):
+                matches = registry.match_modern_commands(message)
+                self.assertEqual([command for command, _ in matches], scan_modern_commands(registry._modern_commands,
+                                                                                          message))
+                self.assertEqual([args for _, args in matches],
+                                 [command["command"].findall(message)[0] for command, _ in matches])
+
+    def test_unregister_plugin(self):
+        plugin = FakePlugin("Other")
+        self.registry.register_modern_command(r"^ping (.*)", "", None, plugin, None)
+        self.registry.register_command("ping", "", None, plugin)
+        self.registry.unregister_all_commands_for_plugin(plugin)
+        self.assertEqual(self.registry.get_info_for_command("ping"), [])
+        self.assertEqual(len(self.registry.match_modern_commands("ping x")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
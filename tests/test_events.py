@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import unittest
+
+# The bot's modules import each other, and can only be imported starting from Bot, as the bot itself does
+import NintbotForDiscord.Bot
+from NintbotForDiscord.Enums import EventTypes, ShedPolicy
+from NintbotForDiscord.EventManager import EventManager
+from NintbotForDiscord.EventQueue import EventQueue
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+class FakePlugin:
+
+    def __init__(self, name: str):
+        self.manifest = {"name": name}
+
+    def __repr__(self):
+        return self.manifest["name"]
+
+
+class FakeBot:
+
+    def __init__(self, config: dict):
+        self.is_closed = False
+        self.config = dict({"event_timeout": 5}, **config)
+        self.logger = logging.getLogger("bot")
+
+
+def make_item(event_type: EventTypes, plugin: FakePlugin, value=None) -> dict:
+    return {"type": event_type, "plugin": plugin, "handler": None, "args": value}
+
+
+class EventQueueTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.plugin = FakePlugin("Plugin")
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_priority_order(self):
+        queue = EventQueue(loop=self.loop)
+        for i, event_type in enumerate((EventTypes.MEMBER_TYPING, EventTypes.SERVER_JOINED, EventTypes.COMMAND_SENT,
+                                        EventTypes.SERVER_JOINED)):
+            queue.put_nowait(make_item(event_type, self.plugin, i))
+        self.assertEqual([queue.get_nowait()["args"] for _ in range(4)], [2, 1, 3, 0])
+
+    def test_shed_oldest_low_priority_event(self):
+        queue = EventQueue(2, loop=self.loop)
+        queue.put_nowait(make_item(EventTypes.MEMBER_TYPING, self.plugin, 0))
+        queue.put_nowait(make_item(EventTypes.MEMBER_TYPING, self.plugin, 1))
+        queue.put_nowait(make_item(EventTypes.COMMAND_SENT, self.plugin, 2))
+        self.assertEqual(queue.shed[EventTypes.MEMBER_TYPING], 1)
+        self.assertEqual([queue.get_nowait()["args"] for _ in range(2)], [2, 1])
+
+    def test_drop_incoming_event(self):
+        queue = EventQueue(1, loop=self.loop, policies={EventTypes.SERVER_JOINED: ShedPolicy.DROP_NEWEST})
+        queue.put_nowait(make_item(EventTypes.COMMAND_SENT, self.plugin, 0))
+        queue.put_nowait(make_item(EventTypes.SERVER_JOINED, self.plugin, 1))
+        self.assertEqual(queue.dropped[EventTypes.SERVER_JOINED], 1)
+        self.assertEqual(queue.qsize(), 1)
+
+    def test_held_plugin(self):
+        queue = EventQueue(loop=self.loop)
+        other = FakePlugin("Other")
+        queue.put_nowait(make_item(EventTypes.COMMAND_SENT, self.plugin, 0))
+        queue.put_nowait(make_item(EventTypes.MEMBER_TYPING, other, 1))
+        queue.hold(self.plugin)
+        self.assertEqual(queue.get_nowait()["args"], 1)
+        self.assertTrue(queue.empty())
+        self.assertEqual(queue.qsize(), 1)
+
+        getter = self.loop.create_task(queue.get())
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertFalse(getter.done())
+        queue.release(self.plugin)
+        self.assertEqual(self.loop.run_until_complete(getter)["args"], 0)
+
+    def test_held_events_count_towards_size(self):
+        queue = EventQueue(2, loop=self.loop)
+        queue.hold(self.plugin)
+        queue.put_nowait(make_item(EventTypes.MEMBER_TYPING, self.plugin, 0))
+        queue.put_nowait(make_item(EventTypes.MEMBER_TYPING, self.plugin, 1))
+        self.assertTrue(queue.full())
+        queue.put_nowait(make_item(EventTypes.MEMBER_TYPING, self.plugin, 2))
+        self.assertEqual(queue.shed[EventTypes.MEMBER_TYPING], 1)
+        queue.release(self.plugin)
+        self.assertEqual([queue.get_nowait()["args"] for _ in range(2)], [1, 2])
+
+    def test_remove_plugin(self):
+        queue = EventQueue(loop=self.loop)
+        other = FakePlugin("Other")
+        queue.hold(self.plugin)
+        queue.put_nowait(make_item(EventTypes.COMMAND_SENT, self.plugin, 0))
+        queue.put_nowait(make_item(EventTypes.COMMAND_SENT, other, 1))
+        queue.remove_plugin(self.plugin)
+        queue.release(self.plugin)
+        self.assertEqual(queue.qsize(), 1)
+        self.assertEqual(queue.get_nowait()["args"], 1)
+        self.assertTrue(queue.empty())
+
+
+class EventManagerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.handled = []
+
+    def tearDown(self):
+        self.bot.is_closed = True
+        for worker in self.manager._workers:
+            worker.cancel()
+        self.loop.run_until_complete(asyncio.gather(*self.manager._workers, return_exceptions=True))
+        self.loop.close()
+
+    def create_manager(self, **config):
+        self.bot = FakeBot(config)
+        self.manager = EventManager(self.bot)
+
+    def make_handler(self, name: str, gate: asyncio.Event = None):
+        async def handler(args):
+            self.handled.append((name, args["value"]))
+            if gate is not None:
+                await gate.wait()
+        return handler
+
+    def dispatch(self, event_type: EventTypes, value):
+        self.loop.run_until_complete(self.manager.dispatch_event(event_type, value=value))
+
+    def run_loop(self):
+        for _ in range(10):
+            self.loop.run_until_complete(asyncio.sleep(0))
+
+    def test_slow_plugin_does_not_block_others(self):
+        self.create_manager(event_workers=2)
+        gate = asyncio.Event()
+        self.manager.register_handler(EventTypes.SERVER_JOINED, self.make_handler("slow", gate), FakePlugin("Slow"))
+        self.manager.register_handler(EventTypes.SERVER_JOINED, self.make_handler("fast"), FakePlugin("Fast"))
+        for i in range(3):
+            self.dispatch(EventTypes.SERVER_JOINED, i)
+        self.run_loop()
+        self.assertEqual([value for name, value in self.handled if name == "fast"], [0, 1, 2])
+        self.assertEqual([value for name, value in self.handled if name == "slow"], [0])
+
+        gate.set()
+        self.run_loop()
+        self.assertEqual([value for name, value in self.handled if name == "slow"], [0, 1, 2])
+
+    def test_busy_plugin_gets_high_priority_events_first(self):
+        self.create_manager(event_workers=2)
+        gate = asyncio.Event()
+        plugin = FakePlugin("Plugin")
+        self.manager.register_handler(EventTypes.MEMBER_TYPING, self.make_handler("typing", gate), plugin)
+        self.manager.register_handler(EventTypes.SERVER_JOINED, self.make_handler("joined"), plugin)
+        for i in range(3):
+            self.dispatch(EventTypes.MEMBER_TYPING, i)
+        self.run_loop()
+        self.dispatch(EventTypes.SERVER_JOINED, 3)
+        gate.set()
+        self.run_loop()
+        self.assertEqual(self.handled, [("typing", 0), ("joined", 3), ("typing", 1), ("typing", 2)])
+
+    def test_workers_limit_concurrency(self):
+        self.create_manager(event_workers=2)
+        gate = asyncio.Event()
+        for i in range(4):
+            self.manager.register_handler(EventTypes.SERVER_JOINED, self.make_handler(str(i), gate),
+                                          FakePlugin(str(i)))
+        self.dispatch(EventTypes.SERVER_JOINED, 0)
+        self.run_loop()
+        self.assertEqual(len(self.handled), 2)
+        gate.set()
+        self.run_loop()
+        self.assertEqual(len(self.handled), 4)
+
+    def test_unordered(self):
+        self.create_manager(event_workers=2, event_ordering=False)
+        gate = asyncio.Event()
+        self.manager.register_handler(EventTypes.SERVER_JOINED, self.make_handler("plugin", gate), FakePlugin("Plugin"))
+        self.dispatch(EventTypes.SERVER_JOINED, 0)
+        self.dispatch(EventTypes.SERVER_JOINED, 1)
+        self.run_loop()
+        self.assertEqual(self.handled, [("plugin", 0), ("plugin", 1)])
+        gate.set()
+
+    def test_remove_handlers_discards_queued_events(self):
+        self.create_manager(event_workers=2)
+        gate = asyncio.Event()
+        plugin = FakePlugin("Plugin")
+        self.manager.register_handler(EventTypes.SERVER_JOINED, self.make_handler("plugin", gate), plugin)
+        for i in range(3):
+            self.dispatch(EventTypes.SERVER_JOINED, i)
+        self.run_loop()
+        self.manager.remove_handlers(plugin)
+        gate.set()
+        self.run_loop()
+        self.assertEqual(self.handled, [("plugin", 0)])
+        self.assertEqual(self.manager.queue.qsize(), 0)
+
+    def test_handlers_by_event_type(self):
+        self.create_manager()
+        plugin = FakePlugin("Plugin")
+        self.manager.register_handler(EventTypes.SERVER_JOINED, self.make_handler("joined"), plugin)
+        self.manager.register_handler(EventTypes.SERVER_LEFT, self.make_handler("left"), plugin)
+        self.assertEqual(len(self.manager.get_handlers(EventTypes.SERVER_JOINED)), 1)
+        self.assertEqual(self.manager.get_handlers(EventTypes.MEMBER_TYPING), ())
+        self.manager.remove_handlers(plugin)
+        self.assertEqual(self.manager.get_handlers(EventTypes.SERVER_LEFT), ())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from libraries.JSONDB import JSONDatabase
+from libraries.JSONDB.Journal import load_json
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+class BatchedWriteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "db.json")
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.db = JSONDatabase(self.path, flush_interval=0.01, loop=self.loop)
+
+    def tearDown(self):
+        self.db.close()
+        self.loop.close()
+        shutil.rmtree(self.directory)
+
+    def wait_for_write(self):
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+        self.db._write_future.result()
+
+    def test_saves_are_batched(self):
+        self.db.insert({"k": 1})
+        self.db.insert({"k": 2})
+        self.assertEqual(load_json(self.path), [])
+        self.wait_for_write()
+        self.assertEqual(load_json(self.path), [{"k": 1}, {"k": 2}])
+
+    def test_save_from_another_thread(self):
+        # In debug mode, the loop raises if call_later is used from another thread
+        self.loop.set_debug(True)
+
+        async def insert_from_thread():
+            await self.loop.run_in_executor(None, self.db.insert, {"k": 1})
+
+        self.loop.run_until_complete(insert_from_thread())
+        self.assertIsNotNone(self.db._flush_handle)
+        self.wait_for_write()
+        self.assertEqual(load_json(self.path), [{"k": 1}])
+
+    def test_flush_cancels_scheduled_write(self):
+        thread = threading.Thread(target=self.db.insert, args=({"k": 1},))
+        thread.start()
+        thread.join()
+        self.db.flush()
+        self.assertEqual(load_json(self.path), [{"k": 1}])
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+        self.assertIsNone(self.db._flush_handle)
+        self.assertIsNone(self.db._write_future)
+
+
+if __name__ == "__main__":
+    unittest.main()
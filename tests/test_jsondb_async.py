@@ -0,0 +1,121 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from libraries.JSONDB import AsyncDatabase, JSONDatabase, SelectionMode, SQLiteDatabase
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+class AsyncDatabaseTests:
+
+    """Tests run against each storage backend, by the subclasses below"""
+
+    file_name = ""
+
+    def open_database(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, self.file_name)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.db = self.open_database()
+        self.async_db = AsyncDatabase(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        self.loop.close()
+        shutil.rmtree(self.directory)
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def reopen_rows(self) -> list:
+        """
+        :return: The rows saved to disk, as seen by a separate instance of the database
+        """
+        db = self.open_database()
+        try:
+            return [dict(row) for row in db.data]
+        finally:
+            db.close()
+
+    def test_select_returns_copies(self):
+        self.run_async(self.async_db.insert({"key": 1}))
+        rows = self.run_async(self.async_db.select(SelectionMode.VALUE_EQUALS, "key", 1))
+        rows[0]["key"] = 2
+        self.assertEqual(self.run_async(self.async_db.snapshot()), [{"key": 1}])
+
+    def test_update_and_remove(self):
+        for i in range(4):
+            self.run_async(self.async_db.insert({"key": i, "value": 0}))
+        self.assertEqual(self.run_async(self.async_db.update(SelectionMode.VALUE_LESS_THAN, "key", 2, "value", 1)), 2)
+        self.assertEqual(self.run_async(self.async_db.remove(SelectionMode.VALUE_EQUALS, "key", 3)), 1)
+        self.assertEqual(self.run_async(self.async_db.snapshot()),
+                         [{"key": 0, "value": 1}, {"key": 1, "value": 1}, {"key": 2, "value": 0}])
+        self.assertEqual(self.reopen_rows(), self.run_async(self.async_db.snapshot()))
+
+    def test_transaction_saves_once_done(self):
+        async def transaction():
+            async with self.async_db.transaction() as db:
+                db.insert({"key": 1})
+                db.insert({"key": 2})
+                self.assertEqual(self.reopen_rows(), [])
+
+        self.run_async(transaction())
+        self.assertEqual(self.reopen_rows(), [{"key": 1}, {"key": 2}])
+
+    def test_failed_transaction_is_not_saved(self):
+        async def transaction():
+            async with self.async_db.transaction() as db:
+                db.insert({"key": 1})
+                raise ValueError()
+
+        with self.assertRaises(ValueError):
+            self.run_async(transaction())
+        self.assertEqual(self.reopen_rows(), [])
+        # The change is kept, and saved by the next save
+        self.run_async(self.async_db.insert({"key": 2}))
+        self.assertEqual(self.reopen_rows(), [{"key": 1}, {"key": 2}])
+
+    def test_use_from_threads(self):
+        def insert(i):
+            self.db.insert({"key": i})
+            return len(self.db.select(SelectionMode.VALUE_EQUALS, "key", i))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertEqual(list(executor.map(insert, range(20))), [1] * 20)
+        self.assertEqual(sorted(row["key"] for row in self.run_async(self.async_db.snapshot())), list(range(20)))
+
+
+class JSONAsyncDatabaseTests(AsyncDatabaseTests, unittest.TestCase):
+
+    file_name = "db.json"
+
+    def open_database(self):
+        return JSONDatabase(self.path)
+
+
+class JournalAsyncDatabaseTests(AsyncDatabaseTests, unittest.TestCase):
+
+    file_name = "db.json"
+
+    def open_database(self):
+        return JSONDatabase(self.path, journal=True)
+
+
+class SQLiteAsyncDatabaseTests(AsyncDatabaseTests, unittest.TestCase):
+
+    file_name = "db.sqlite3"
+
+    def open_database(self):
+        return SQLiteDatabase(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
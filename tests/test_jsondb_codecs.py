@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from libraries.JSONDB import JSONDatabase
+from libraries.JSONDB.Codecs import CODECS, get_codec
+from libraries.JSONDB.Journal import load_json, write_json_atomic
+from libraries.JSONDB.Rows import get_row_class
+
+__author__ = 'Riley Flynn (nint8835)'
+
+ROWS = [{"name": "café", "count": 2 ** 70, "tags": ["a", "b"], "score": 1.5, "missing": None, "flag": True}]
+
+
+class CodecTests(unittest.TestCase):
+
+    def test_round_trip(self):
+        for name, codec in CODECS.items():
+            with self.subTest(codec=name):
+                self.assertEqual(codec.decode(codec.encode(ROWS)), ROWS)
+                self.assertEqual(codec.decode(codec.encode(ROWS).decode()), ROWS)
+
+    def test_compact_rows_are_encoded_as_dicts(self):
+        row_class = get_row_class(("a", "b"))
+        for name, codec in CODECS.items():
+            with self.subTest(codec=name):
+                self.assertEqual(codec.decode(codec.encode([row_class({"a": 1, "b": "x"})])), [{"a": 1, "b": "x"}])
+
+    def test_non_string_keys(self):
+        for name, codec in CODECS.items():
+            with self.subTest(codec=name):
+                self.assertEqual(codec.decode(codec.encode({1: "a"})), {"1": "a"})
+
+    def test_get_codec(self):
+        self.assertEqual(get_codec().name, "json")
+        self.assertIn(get_codec("auto").name, CODECS)
+        if "orjson" in CODECS:
+            self.assertEqual(get_codec("auto").name, "orjson")
+        with self.assertRaises(ValueError):
+            get_codec("missing")
+
+
+class LoadingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "db.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_codecs_read_each_others_files(self):
+        for writer in CODECS:
+            for reader in CODECS:
+                with self.subTest(writer=writer, reader=reader):
+                    db = JSONDatabase(self.path, codec=writer)
+                    db.insert(dict(ROWS[0]))
+                    db.close()
+                    db = JSONDatabase(self.path, codec=reader)
+                    self.assertEqual(db.data, ROWS)
+                    db.close()
+                    os.remove(self.path)
+
+    def test_lazy_loading(self):
+        write_json_atomic(self.path, ROWS)
+        db = JSONDatabase(self.path, lazy=True)
+        # Changes made before the rows are first used are still seen
+        write_json_atomic(self.path, ROWS + ROWS)
+        self.assertEqual(db.data, ROWS + ROWS)
+        db.close()
+
+    def test_lazy_database_is_not_written_until_used(self):
+        write_json_atomic(self.path, ROWS)
+        modified = os.path.getmtime(self.path)
+        db = JSONDatabase(self.path, lazy=True)
+        db.flush()
+        db.close()
+        self.assertEqual(os.path.getmtime(self.path), modified)
+        self.assertEqual(load_json(self.path), ROWS)
+
+    def test_insert_loads_lazy_database(self):
+        write_json_atomic(self.path, ROWS)
+        db = JSONDatabase(self.path, lazy=True)
+        db.insert({"name": "new"})
+        db.close()
+        self.assertEqual(load_json(self.path), ROWS + [{"name": "new"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import random
+import re
+import shutil
+import tempfile
+import unittest
+
+from libraries.JSONDB import IndexType, JSONDatabase, SelectionMode
+
+__author__ = 'Riley Flynn (nint8835)'
+
+WORDS = ["apple", "banana", "cherry", "date", "elderberry", "fig", "grape"]
+
+SELECTIONS = [
+    (SelectionMode.VALUE_EQUALS, "number", 3),
+    (SelectionMode.VALUE_NOT_EQUAL, "number", 3),
+    (SelectionMode.VALUE_NOT_EQUAL, "number", 100),
+    (SelectionMode.VALUE_LESS_THAN, "number", 4),
+    (SelectionMode.VALUE_LESS_THAN_OR_EQUAL, "number", 4),
+    (SelectionMode.VALUE_GREATER_THAN, "number", 6),
+    (SelectionMode.VALUE_GREATER_THAN_OR_EQUAL, "number", 6),
+    (SelectionMode.VALUE_EQUALS, "word", "fig"),
+    (SelectionMode.REGEX_SEARCH, "text", "erry gra"),
+    (SelectionMode.REGEX_MATCH, "text", ("APPLE", re.I)),
+    (SelectionMode.REGEX_FULLMATCH, "text", re.compile(".*date")),
+    (SelectionMode.REGEX_SEARCH, "text", "fig|date"),
+]
+
+
+class IndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.random = random.Random(1)
+        self.indexed = JSONDatabase(os.path.join(self.directory, "indexed.json"))
+        self.unindexed = JSONDatabase(os.path.join(self.directory, "unindexed.json"))
+        for key, index_type in (("number", IndexType.HASH), ("number", IndexType.SORTED), ("word", IndexType.HASH),
+                                ("text", IndexType.TRIGRAM)):
+            self.indexed.create_index(key, index_type)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_row(self) -> dict:
+        return {"number": self.random.randrange(10),
+                "word": self.random.choice(WORDS),
+                "text": " ".join(self.random.choice(WORDS) for _ in range(4))}
+
+    def insert(self, row: dict):
+        self.indexed.insert(dict(row), save_after=False)
+        self.unindexed.insert(dict(row), save_after=False)
+
+    def assertSameSelections(self):
+        for mode, key, selection_var in SELECTIONS:
+            with self.subTest(mode=mode, key=key, selection_var=selection_var):
+                self.assertEqual(self.indexed.select(mode, key, selection_var).rows,
+                                 self.unindexed.select(mode, key, selection_var).rows)
+
+    def test_selections_match_scan(self):
+        for _ in range(200):
+            self.insert(self.make_row())
+        self.assertSameSelections()
+
+    def test_index_created_after_inserts(self):
+        db = JSONDatabase(os.path.join(self.directory, "late.json"))
+        for _ in range(50):
+            row = self.make_row()
+            db.insert(dict(row), save_after=False)
+            self.unindexed.insert(dict(row), save_after=False)
+        db.create_index("number", IndexType.SORTED)
+        self.assertEqual(db.select(SelectionMode.VALUE_LESS_THAN, "number", 5).rows,
+                         self.unindexed.select(SelectionMode.VALUE_LESS_THAN, "number", 5).rows)
+
+    def test_indexes_follow_removes_and_updates(self):
+        for _ in range(200):
+            self.insert(self.make_row())
+        for db in (self.indexed, self.unindexed):
+            db.select(SelectionMode.VALUE_LESS_THAN, "number", 2).remove()
+            db.select(SelectionMode.VALUE_EQUALS, "word", "grape").update("number", 3)
+            db.select(SelectionMode.REGEX_SEARCH, "text", "banana").update("text", "fig date")
+            db.select(SelectionMode.VALUE_EQUALS, "number", 9).remove()
+        self.assertSameSelections()
+
+    def test_rows_without_string_values_are_not_trigram_indexed(self):
+        self.insert({"number": 1, "word": "fig", "text": None})
+        self.insert({"number": 2, "word": "fig", "text": "figs"})
+        self.assertEqual(self.indexed.select(SelectionMode.REGEX_SEARCH, "text", "fig").rows,
+                         [{"number": 2, "word": "fig", "text": "figs"}])
+
+    def test_drop_index(self):
+        for _ in range(20):
+            self.insert(self.make_row())
+        self.indexed.drop_index("number", IndexType.SORTED)
+        self.indexed.drop_index("text")
+        self.assertSameSelections()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from libraries.JSONDB import JSONDatabase, SelectionMode
+from libraries.JSONDB.Journal import Journal, load_json, read_entries, write_json_atomic
+
+__author__ = 'Riley Flynn (nint8835)'
+
+# The rows left by JournalTests.make_changes
+EXPECTED = [{"k": 0, "odd": False, "v": 0}, {"k": 2, "odd": False, "v": 0}, {"k": 4, "odd": False, "v": 1}]
+
+
+class JournalTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "db.json")
+        self.journal_path = self.path + ".journal"
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def open_database(self, **kwargs) -> JSONDatabase:
+        return JSONDatabase(self.path, journal=True, **kwargs)
+
+    def reopen_rows(self) -> list:
+        db = self.open_database()
+        try:
+            return db.data[:]
+        finally:
+            db.close()
+
+    def make_changes(self, db: JSONDatabase):
+        for i in range(6):
+            db.insert({"k": i, "odd": i % 2 == 1, "v": 0})
+        db.select(SelectionMode.VALUE_EQUALS, "odd", True).remove()
+        db.select(SelectionMode.VALUE_GREATER_THAN, "k", 2).update("v", 1)
+
+    def test_changes_are_appended_to_the_journal(self):
+        db = self.open_database()
+        self.make_changes(db)
+        self.assertEqual(load_json(self.path), [])
+        self.assertEqual([entry["op"] for entry in read_entries(self.journal_path)],
+                         ["insert"] * 6 + ["remove", "update"])
+        # The journal is replayed without the database being closed
+        db._journal.close()
+        self.assertEqual(self.reopen_rows(), EXPECTED)
+
+    def test_compaction(self):
+        db = self.open_database(compact_after=4)
+        self.make_changes(db)
+        db.close()
+        # At least one snapshot was written, although later changes may only be in the journal
+        self.assertNotEqual(load_json(self.path), [])
+        self.assertLessEqual(len(read_entries(self.journal_path)), 4)
+        self.assertFalse(os.path.exists(self.path + ".journal.old"))
+        self.assertEqual(self.reopen_rows(), EXPECTED)
+
+    def test_compact_empties_journal(self):
+        db = self.open_database()
+        self.make_changes(db)
+        db.compact()
+        self.assertEqual(read_entries(self.journal_path), [])
+        self.assertEqual(load_json(self.path), EXPECTED)
+        db.close()
+
+    def test_partly_written_entry_is_ignored(self):
+        db = self.open_database()
+        db.insert({"k": 1})
+        db._journal.close()
+        with open(self.journal_path, "ab") as f:
+            f.write(b'{"op": "insert", "row": {"k"')
+        self.assertEqual(self.reopen_rows(), [{"k": 1}])
+
+    def test_recover_interrupted_compaction(self):
+        # The old journal had been moved aside, and the snapshot including it had been written but not renamed
+        write_json_atomic(self.path, [{"k": 1}])
+        with open(self.path + ".journal.old", "w") as f:
+            f.write('{"op": "insert", "row": {"k": 2}}\n')
+        write_json_atomic(self.path + ".compact", [{"k": 1}, {"k": 2}])
+        with open(self.journal_path, "w") as f:
+            f.write('{"op": "insert", "row": {"k": 3}}\n')
+        self.assertEqual(self.reopen_rows(), [{"k": 1}, {"k": 2}, {"k": 3}])
+        self.assertFalse(os.path.exists(self.path + ".compact"))
+        self.assertFalse(os.path.exists(self.path + ".journal.old"))
+
+    def test_recover_compaction_without_snapshot(self):
+        # The old journal had been moved aside, but the snapshot hadn't been written
+        write_json_atomic(self.path, [{"k": 1}])
+        with open(self.path + ".journal.old", "w") as f:
+            f.write('{"op": "insert", "row": {"k": 2}}\n')
+        journal = Journal(self.path)
+        self.assertEqual(journal.load(), [{"k": 1}, {"k": 2}])
+        journal.close()
+        self.assertEqual(load_json(self.path), [{"k": 1}, {"k": 2}])
+
+
+if __name__ == "__main__":
+    unittest.main()
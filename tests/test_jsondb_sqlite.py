@@ -0,0 +1,130 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from libraries.JSONDB import IndexType, JSONDatabase, SelectionMode, SQLiteDatabase
+from libraries.JSONDB.Migrate import migrate_json_to_sqlite
+
+__author__ = 'Riley Flynn (nint8835)'
+
+ROWS = [{"k": None}, {"k": 1}, {"k": 2}, {"k": 2.5}, {"k": True}, {"k": "a"}, {"k": "b"}, {"k": [1]}]
+
+SELECTIONS = [
+    (SelectionMode.VALUE_EQUALS, 1),
+    (SelectionMode.VALUE_EQUALS, "a"),
+    (SelectionMode.VALUE_NOT_EQUAL, 1),
+    (SelectionMode.VALUE_NOT_EQUAL, "a"),
+    (SelectionMode.VALUE_NOT_EQUAL, None),
+    (SelectionMode.ALL, None),
+]
+
+
+class SQLiteDatabaseTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = SQLiteDatabase(os.path.join(self.directory, "db.sqlite3"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.directory)
+
+    def insert_rows(self, rows: list):
+        for row in rows:
+            self.db.insert(row, save_after=False)
+        self.db.save_db()
+
+    def assertSelects(self, mode: SelectionMode, selection_var, rows: list):
+        self.assertEqual([dict(row) for row in self.db.select(mode, "k", selection_var).rows], rows)
+
+    def test_not_equal_selects_null(self):
+        self.insert_rows([{"k": None}, {"k": 1}, {"k": 2}])
+        self.assertSelects(SelectionMode.VALUE_NOT_EQUAL, 1, [{"k": None}, {"k": 2}])
+
+    def test_selections_match_json_database(self):
+        self.insert_rows(ROWS)
+        json_db = JSONDatabase(os.path.join(self.directory, "db.json"))
+        for row in ROWS:
+            json_db.insert(dict(row), save_after=False)
+        for indexed in (False, True):
+            if indexed:
+                self.db.create_index("k")
+            for mode, selection_var in SELECTIONS:
+                with self.subTest(mode=mode, selection_var=selection_var, indexed=indexed):
+                    expected = [dict(row) for row in json_db.select(mode, "k", selection_var).rows]
+                    self.assertSelects(mode, selection_var, expected)
+
+    def test_regex_selections(self):
+        self.insert_rows(ROWS)
+        self.assertSelects(SelectionMode.REGEX_MATCH, "[ab]", [{"k": "a"}, {"k": "b"}])
+        self.assertSelects(SelectionMode.REGEX_SEARCH, re.compile("A", re.I), [{"k": "a"}])
+        self.assertSelects(SelectionMode.REGEX_FULLMATCH, ("B", re.I), [{"k": "b"}])
+
+    def test_range_selections(self):
+        self.insert_rows([{"k": i} for i in range(5)])
+        self.db.create_index("k", IndexType.SORTED)
+        self.assertSelects(SelectionMode.VALUE_LESS_THAN, 2, [{"k": 0}, {"k": 1}])
+        self.assertSelects(SelectionMode.VALUE_GREATER_THAN_OR_EQUAL, 3, [{"k": 3}, {"k": 4}])
+
+    def test_rows_missing_the_key_are_not_selected(self):
+        self.insert_rows([{"other": 1}, {"k": 1}])
+        self.assertSelects(SelectionMode.VALUE_EQUALS, 1, [{"k": 1}])
+        self.assertSelects(SelectionMode.VALUE_NOT_EQUAL, 2, [{"k": 1}])
+
+    def test_update_and_remove_are_saved(self):
+        self.insert_rows([{"k": i, "v": 0} for i in range(3)])
+        self.db.select(SelectionMode.VALUE_GREATER_THAN, "k", 0).update("v", [1])
+        self.db.select(SelectionMode.VALUE_EQUALS, "k", 2).remove()
+        self.db.close()
+        self.db = SQLiteDatabase(os.path.join(self.directory, "db.sqlite3"))
+        self.assertEqual([dict(row) for row in self.db.data], [{"k": 0, "v": 0}, {"k": 1, "v": [1]}])
+
+
+class MigrationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.json_path = os.path.join(self.directory, "db.json")
+        self.sqlite_path = os.path.join(self.directory, "db.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def sqlite_rows(self) -> list:
+        db = SQLiteDatabase(self.sqlite_path)
+        try:
+            return [dict(row) for row in db.data]
+        finally:
+            db.close()
+
+    def test_migrate_includes_journal(self):
+        db = JSONDatabase(self.json_path, journal=True)
+        db.insert({"k": 1})
+        db.insert({"k": 2})
+        db.select(SelectionMode.VALUE_EQUALS, "k", 1).update("k", 3)
+        # The changes are only in the journal until it's compacted
+        db._journal.close()
+        self.assertEqual(migrate_json_to_sqlite(self.json_path, self.sqlite_path), 2)
+        self.assertEqual(self.sqlite_rows(), [{"k": 3}, {"k": 2}])
+
+    def test_migrate_again(self):
+        db = JSONDatabase(self.json_path)
+        db.insert({"k": 1})
+        db.close()
+        migrate_json_to_sqlite(self.json_path, self.sqlite_path)
+        with self.assertRaises(ValueError):
+            migrate_json_to_sqlite(self.json_path, self.sqlite_path)
+        self.assertEqual(self.sqlite_rows(), [{"k": 1}])
+        self.assertEqual(migrate_json_to_sqlite(self.json_path, self.sqlite_path, replace=True), 1)
+        self.assertEqual(self.sqlite_rows(), [{"k": 1}])
+
+    def test_missing_json_database(self):
+        with self.assertRaises(FileNotFoundError):
+            migrate_json_to_sqlite(self.json_path, self.sqlite_path)
+        self.assertFalse(os.path.exists(self.json_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import types
+import unittest
+
+# The bot's modules import each other, and can only be imported starting from Bot, as the bot itself does
+import NintbotForDiscord.Bot
+import discord
+from NintbotForDiscord.Permissions.Cache import PermissionCache, permission_cache
+from NintbotForDiscord.Permissions.General import Administrator, ManageRoles
+
+__author__ = 'Riley Flynn (nint8835)'
+
+ADMINISTRATOR = 0x8
+MANAGE_ROLES = 0x10000000
+
+
+def make_role(role_id: int, value: int):
+    return types.SimpleNamespace(id=role_id, permissions=discord.Permissions(value))
+
+
+def make_member(member_id: int, server, roles: list):
+    return types.SimpleNamespace(id=member_id, guild=server, roles=roles)
+
+
+class PermissionCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = PermissionCache()
+        self.server = types.SimpleNamespace(id=1)
+        self.everyone = make_role(1, 0)
+        self.moderator = make_role(2, MANAGE_ROLES)
+
+    def test_combines_role_permissions(self):
+        member = make_member(10, self.server, [self.everyone, self.moderator, make_role(3, ADMINISTRATOR)])
+        self.assertEqual(self.cache.get_permissions(member).value, MANAGE_ROLES | ADMINISTRATOR)
+
+    def test_member_roles_changing(self):
+        member = make_member(10, self.server, [self.everyone])
+        self.assertEqual(self.cache.get_permissions(member).value, 0)
+        member.roles = [self.everyone, self.moderator]
+        self.assertEqual(self.cache.get_permissions(member).value, MANAGE_ROLES)
+
+    def test_role_permissions_changing(self):
+        member = make_member(10, self.server, [self.everyone, self.moderator])
+        self.assertEqual(self.cache.get_permissions(member).value, MANAGE_ROLES)
+        # Nothing invalidates the entry, as happens when the bot misses the role update event
+        self.moderator.permissions = discord.Permissions(0)
+        self.assertEqual(self.cache.get_permissions(member).value, 0)
+
+    def test_user_outside_server(self):
+        self.assertIsNone(self.cache.get_permissions(types.SimpleNamespace(id=10)))
+
+    def test_invalidate_member(self):
+        member = make_member(10, self.server, [self.moderator])
+        self.cache.get_permissions(member)
+        self.cache.invalidate_member(member)
+        self.assertEqual(self.cache._cache, {})
+        self.cache.invalidate_member(member)
+
+    def test_invalidate_server(self):
+        other_server = types.SimpleNamespace(id=2)
+        self.cache.get_permissions(make_member(10, self.server, [self.moderator]))
+        self.cache.get_permissions(make_member(10, other_server, [self.moderator]))
+        self.cache.invalidate_server(self.server)
+        self.assertEqual(list(self.cache._cache), [other_server.id])
+
+
+class RolePermissionTests(unittest.TestCase):
+
+    def tearDown(self):
+        permission_cache._cache.clear()
+
+    def test_role_permission(self):
+        moderator = make_role(2, MANAGE_ROLES)
+        member = make_member(10, types.SimpleNamespace(id=1), [moderator])
+        self.assertTrue(ManageRoles().has_permission(member))
+        self.assertFalse(Administrator().has_permission(member))
+        moderator.permissions = discord.Permissions(ADMINISTRATOR)
+        self.assertFalse(ManageRoles().has_permission(member))
+        self.assertTrue(Administrator().has_permission(member))
+
+    def test_default_outside_server(self):
+        self.assertFalse(Administrator().has_permission(types.SimpleNamespace(id=10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
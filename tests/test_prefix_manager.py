@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import tempfile
+import types
+import unittest
+
+from NintbotForDiscord.PrefixManager import PrefixManager
+
+__author__ = 'Riley Flynn (nint8835)'
+
+
+class FakeBot:
+
+    def __init__(self, config: dict):
+        self.config = config
+
+
+def make_server(server_id: int):
+    return types.SimpleNamespace(id=server_id)
+
+
+class PrefixManagerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "prefixes.json")
+        self.server = make_server(1)
+        self.other_server = make_server(2)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_manager(self, **config) -> PrefixManager:
+        config = dict({"command_prefix": "!", "prefix_path": self.path}, **config)
+        return PrefixManager(FakeBot(config))
+
+    def test_default_prefix(self):
+        manager = self.create_manager()
+        self.assertEqual(manager.get_prefixes(self.server), ["!"])
+        self.assertEqual(manager.strip_prefix("!ping", self.server), "ping")
+        self.assertEqual(manager.strip_prefix("!ping"), "ping")
+        self.assertIsNone(manager.strip_prefix("ping", self.server))
+
+    def test_server_prefixes(self):
+        manager = self.create_manager()
+        manager.set_prefixes(self.server, ["?", "??", "", "bot."])
+        self.assertEqual(manager.get_prefixes(self.server), ["?", "??", "bot."])
+        # The longest matching prefix is removed
+        self.assertEqual(manager.strip_prefix("??ping", self.server), "ping")
+        self.assertEqual(manager.strip_prefix("bot.ping", self.server), "ping")
+        # Prefixes are matched literally
+        self.assertIsNone(manager.strip_prefix("botxping", self.server))
+        self.assertIsNone(manager.strip_prefix("!ping", self.server))
+        self.assertEqual(manager.strip_prefix("!ping", self.other_server), "ping")
+
+        manager.reset_prefixes(self.server)
+        self.assertEqual(manager.strip_prefix("!ping", self.server), "ping")
+
+    def test_empty_prefixes(self):
+        manager = self.create_manager()
+        with self.assertRaises(ValueError):
+            manager.set_prefixes(self.server, [""])
+        self.assertEqual(manager.get_prefixes(self.server), ["!"])
+
+    def test_prefixes_are_saved(self):
+        manager = self.create_manager()
+        manager.set_prefixes(self.server, ["?"])
+        manager.set_prefixes(self.other_server, ["$"])
+        manager.reset_prefixes(self.other_server)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {"1": ["?"]})
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+        self.assertEqual(self.create_manager().strip_prefix("?ping", self.server), "ping")
+
+    def test_mention_prefix(self):
+        manager = self.create_manager(mention_prefix=True)
+        manager.set_prefixes(self.server, ["?"])
+        self.assertIsNone(manager.strip_prefix("<@5> ping", self.server))
+        manager.set_bot_user(types.SimpleNamespace(id=5))
+        for content in ("<@5> ping", "<@!5>ping", "?ping"):
+            with self.subTest(content=content):
+                self.assertEqual(manager.strip_prefix(content, self.server), "ping")
+        self.assertEqual(manager.strip_prefix("<@5> ping"), "ping")
+        self.assertIsNone(manager.strip_prefix("<@6> ping"))
+
+    def test_mention_prefix_disabled(self):
+        manager = self.create_manager()
+        manager.set_bot_user(types.SimpleNamespace(id=5))
+        self.assertIsNone(manager.strip_prefix("<@5> ping"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,400 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import selectors
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# The bot's modules import each other, and can only be imported starting from Bot, as the bot itself does
+import NintbotForDiscord.Bot
+from NintbotForDiscord.ScheduledTask import ScheduledTask, TASK_TYPES
+from NintbotForDiscord.Scheduler import Scheduler
+from NintbotForDiscord.Schedules import CronSchedule, FixedDelaySchedule, FixedRateSchedule
+from NintbotForDiscord.TaskStore import TaskStore
+
+__author__ = 'Riley Flynn (nint8835)'
+
+# The fake clock starts at midnight UTC on Wednesday 2023-11-15
+START_MONOTONIC = 1000.0
+START_WALL = datetime.datetime(2023, 11, 15, tzinfo=datetime.timezone.utc).timestamp()
+
+DAY = 86400
+
+
+class FakeSelector:
+
+    """A selector that never blocks, and instead moves the fake clock forward by the time it would have waited"""
+
+    def __init__(self, clock: "FakeClock"):
+        self._clock = clock
+        self._selector = selectors.DefaultSelector()
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if not events and timeout:
+            self._clock.now += timeout
+        return events
+
+    def __getattr__(self, item):
+        return getattr(self._selector, item)
+
+
+class FakeClock:
+
+    """
+    A controllable clock for the scheduler, replacing the event loop's clock, time.monotonic and time.time.
+    The event loop jumps straight to its next timer instead of sleeping, so days of scheduling run in moments.
+    """
+
+    def __init__(self):
+        self.now = START_MONOTONIC
+        self.loop = asyncio.SelectorEventLoop(FakeSelector(self))
+        self.loop.time = self.monotonic
+        # Timers are due when within the clock resolution of now. Far from 0, adding a timeout to the clock can land a
+        # few ulps short of the timer it was meant to reach, so the resolution must be coarser than that.
+        self.loop._clock_resolution = 1e-6
+        self._patches = [mock.patch("time.monotonic", self.monotonic), mock.patch("time.time", self.time)]
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now - START_MONOTONIC + START_WALL
+
+    def start(self):
+        for patch in self._patches:
+            patch.start()
+
+    def stop(self):
+        for patch in self._patches:
+            patch.stop()
+        self.loop.close()
+
+    def run(self, seconds: float, step: float = DAY):
+        """
+        Runs the event loop until the clock has moved forward
+        :param seconds: The number of seconds to run for
+        :param step: The longest single sleep, which keeps each jump of the clock small relative to its value
+        """
+        end = self.now + seconds
+        while self.now < end:
+            self.loop.run_until_complete(asyncio.sleep(min(step, end - self.now)))
+
+
+class FakePlugin:
+
+    def __init__(self, name: str):
+        self.manifest = {"name": name}
+        self.logger = logging.getLogger(name)
+
+
+class FakePluginManager:
+
+    def __init__(self, *plugins: FakePlugin):
+        self._plugins = {plugin.manifest["name"]: plugin for plugin in plugins}
+
+    def get_plugin(self, name: str):
+        return self._plugins.get(name)
+
+
+class FakeBot:
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, config: dict, plugin_manager: FakePluginManager = None):
+        self.is_closed = False
+        self.config = config
+        self.logger = logging.getLogger("bot")
+        self.EventManager = mock.Mock(loop=loop)
+        self.PluginManager = plugin_manager
+
+
+class RecordingTask(ScheduledTask):
+
+    """A task recording the times it starts executing, and taking work seconds to execute"""
+
+    def __init__(self, delay: float = 30, work: float = 0):
+        ScheduledTask.__init__(self, delay)
+        self.work = work
+        self.started = []
+
+    async def execute_task(self):
+        self.started.append(time.monotonic())
+        if self.work:
+            await asyncio.sleep(self.work)
+
+    def to_dict(self) -> dict:
+        return {"work": self.work}
+
+    @classmethod
+    def from_dict(cls, data: dict, bot_instance, delay: float) -> "RecordingTask":
+        return cls(delay, data["work"])
+
+
+class SchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.clock.start()
+        self.plugin = FakePlugin("test")
+        self.schedulers = []
+        self.scheduler = self.create_scheduler()
+
+    def tearDown(self):
+        for scheduler in self.schedulers:
+            scheduler.close()
+        self.clock.stop()
+
+    def create_scheduler(self, **config) -> Scheduler:
+        config.setdefault("scheduled_task_path", None)
+        config.setdefault("scheduler_concurrency", 100000)
+        config.setdefault("scheduled_task_timeout", None)
+        scheduler = Scheduler(FakeBot(self.clock.loop, config, FakePluginManager(self.plugin)))
+        self.schedulers.append(scheduler)
+        return scheduler
+
+    def wall_times(self, task: RecordingTask):
+        return [datetime.datetime.fromtimestamp(started - START_MONOTONIC + START_WALL, datetime.timezone.utc)
+                for started in task.started]
+
+
+class FixedRateTests(SchedulerTestCase):
+
+    def test_no_drift_at_scale(self):
+        periods = [0.25, 1, 7.5, 60, 300]
+        tasks = []
+        for i in range(500):
+            period = periods[i % len(periods)]
+            # Executing takes part of the period, which would add up if deadlines were based on when tasks finish
+            task = RecordingTask(period, period * (i % 3) / 4)
+            self.scheduler.add_task(task, self.plugin, FixedRateSchedule(period))
+            tasks.append((task, period))
+        self.clock.run(600)
+
+        for task, period in tasks:
+            self.assertEqual(len(task.started), int(600 / period))
+            for k, started in enumerate(task.started):
+                self.assertAlmostEqual(started, START_MONOTONIC + (k + 1) * period, delta=1e-6)
+        self.assertAlmostEqual(self.scheduler.get_lateness_stats()["max"], 0, delta=1e-6)
+
+    def test_missed_periods_are_skipped(self):
+        # Each execution overruns the 1 second period by 1.5 seconds, so two periods are missed after each one
+        task = RecordingTask(1, 2.5)
+        self.scheduler.add_task(task, self.plugin, FixedRateSchedule(1))
+        self.clock.run(30)
+
+        expected = [START_MONOTONIC + 1 + 3 * k for k in range(10)]
+        self.assertEqual(len(task.started), len(expected))
+        for started, deadline in zip(task.started, expected):
+            self.assertAlmostEqual(started, deadline, delta=1e-6)
+
+    def test_repeating_task_wrapper_has_no_drift(self):
+        from NintbotForDiscord.ScheduledTask import RepeatingScheduledTaskWrapper
+        inner = RecordingTask(10, 0.3)
+        self.scheduler.add_task(RepeatingScheduledTaskWrapper(inner, self.plugin, self.scheduler), self.plugin)
+        self.clock.run(3600)
+
+        self.assertEqual(len(inner.started), 360)
+        self.assertAlmostEqual(inner.started[-1], START_MONOTONIC + 3600, delta=1e-6)
+
+
+class FixedDelayTests(SchedulerTestCase):
+
+    def test_gaps_include_execution_time(self):
+        tasks = []
+        for i in range(500):
+            delay, work = [1, 30, 600][i % 3], [0, 0.5, 2][i // 3 % 3]
+            task = RecordingTask(delay, work)
+            self.scheduler.add_task(task, self.plugin, FixedDelaySchedule(delay))
+            tasks.append((task, delay, work))
+        self.clock.run(1800)
+
+        for task, delay, work in tasks:
+            self.assertGreater(len(task.started), 1)
+            self.assertAlmostEqual(task.started[0], START_MONOTONIC + delay, delta=1e-6)
+            for previous, started in zip(task.started, task.started[1:]):
+                self.assertAlmostEqual(started - previous, delay + work, delta=1e-6)
+
+
+class CronTests(SchedulerTestCase):
+
+    def setUp(self):
+        # Cron expressions are in local time
+        self._timezone = os.environ.get("TZ")
+        os.environ["TZ"] = "UTC"
+        time.tzset()
+        super(CronTests, self).setUp()
+
+    def tearDown(self):
+        super(CronTests, self).tearDown()
+        if self._timezone is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = self._timezone
+        time.tzset()
+
+    def add_cron_task(self, expression: str) -> RecordingTask:
+        task = RecordingTask(0)
+        self.scheduler.add_task(task, self.plugin, CronSchedule(expression))
+        return task
+
+    def test_every_15_minutes(self):
+        task = self.add_cron_task("*/15 * * * *")
+        self.clock.run(2 * DAY)
+
+        times = self.wall_times(task)
+        self.assertEqual(len(times), 2 * 24 * 4)
+        self.assertTrue(all(started.minute % 15 == 0 and started.second == 0 and started.microsecond == 0
+                            for started in times))
+        self.assertTrue(all((b - a) == datetime.timedelta(minutes=15) for a, b in zip(times, times[1:])))
+
+    def test_day_of_month_or_day_of_week(self):
+        # With both restricted, cron matches the 13th of the month and every Friday
+        task = self.add_cron_task("0 12 13 * 5")
+        self.clock.run(60 * DAY)
+
+        start = datetime.datetime.fromtimestamp(START_WALL, datetime.timezone.utc)
+        expected = [start + datetime.timedelta(days=day, hours=12) for day in range(60)]
+        expected = [day for day in expected if day.day == 13 or day.weekday() == 4]
+        self.assertEqual(self.wall_times(task), expected)
+
+    def test_weekdays(self):
+        task = self.add_cron_task("0 9 * * 1-5")
+        self.clock.run(14 * DAY)
+
+        times = self.wall_times(task)
+        self.assertEqual(len(times), 10)
+        self.assertTrue(all(started.weekday() < 5 and started.hour == 9 for started in times))
+
+    def test_february_29(self):
+        task = self.add_cron_task("0 0 29 2 *")
+        self.clock.run(120 * DAY)
+
+        self.assertEqual(self.wall_times(task), [datetime.datetime(2024, 2, 29, tzinfo=datetime.timezone.utc)])
+        self.assertEqual(datetime.datetime.fromtimestamp(CronSchedule("0 0 29 2 *").get_next_time(time.time())),
+                         datetime.datetime(2028, 2, 29))
+
+    def test_impossible_expression_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CronSchedule("0 0 30 2 *")
+
+    def test_invalid_expressions_are_rejected(self):
+        for expression in ("* * * *", "60 * * * *", "* 24 * * *", "*/0 * * * *", "5-1 * * * *"):
+            with self.assertRaises(ValueError):
+                CronSchedule(expression)
+
+
+class StoredScheduleTests(SchedulerTestCase):
+
+    def setUp(self):
+        super(StoredScheduleTests, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "tasks.json")
+        TASK_TYPES["RecordingTask"] = RecordingTask
+
+    def tearDown(self):
+        super(StoredScheduleTests, self).tearDown()
+        del TASK_TYPES["RecordingTask"]
+        shutil.rmtree(self.directory)
+
+    def test_schedule_survives_restart(self):
+        scheduler = self.create_scheduler(scheduled_task_path=self.path)
+        scheduler.add_task(RecordingTask(60), self.plugin, FixedRateSchedule(60))
+        self.clock.run(150)
+        scheduler.bot.is_closed = True
+        scheduler.close()
+
+        restarted = self.create_scheduler(scheduled_task_path=self.path)
+        restarted.load_tasks()
+        task = restarted.tasks[0]["task"]
+        self.assertIsInstance(task.schedule, FixedRateSchedule)
+        self.clock.run(60)
+        self.assertEqual(task.started, [START_MONOTONIC + 180])
+
+    def test_unknown_schedule_type_is_skipped(self):
+        rows = [{"id": task_id, "type": "RecordingTask", "plugin": "test", "deadline": time.time() + 60,
+                 "schedule": {"type": schedule, "data": {"period": 60}}, "data": {"work": 0}}
+                for task_id, schedule in enumerate(["MissingSchedule", "FixedRateSchedule"])]
+        with open(self.path, "w") as f:
+            json.dump(rows, f)
+
+        scheduler = self.create_scheduler(scheduled_task_path=self.path)
+        with self.assertLogs("bot", logging.WARNING):
+            scheduler.load_tasks()
+        self.assertEqual([entry["id"] for entry in scheduler.tasks], [1])
+        # The skipped task stays stored
+        with TaskStore(self.path) as store:
+            self.assertEqual(len(store.get_tasks()), 2)
+
+    def test_cancel_removes_stored_task_and_disable_keeps_it(self):
+        scheduler = self.create_scheduler(scheduled_task_path=self.path)
+        cancelled = scheduler.add_task(RecordingTask(60), self.plugin)
+        scheduler.add_task(RecordingTask(60), self.plugin)
+        cancelled.cancel()
+        scheduler.remove_tasks_for_plugin(self.plugin)
+        scheduler.close()
+
+        with TaskStore(self.path) as store:
+            self.assertEqual([row["id"] for row in store.get_tasks()], [1])
+
+    def test_close_cancels_running_tasks(self):
+        scheduler = self.create_scheduler(scheduled_task_path=self.path)
+        running = RecordingTask(10, work=60)
+        waiting = RecordingTask(20)
+        scheduler.add_task(running, self.plugin)
+        scheduler.add_task(waiting, self.plugin)
+        self.clock.run(15)
+        scheduler.close()
+        self.clock.run(60)
+
+        self.assertEqual(len(running.started), 1)
+        self.assertEqual(waiting.started, [])
+        self.assertEqual(scheduler._running, {})
+        # The interrupted task is executed again after a restart
+        with TaskStore(self.path) as store:
+            self.assertEqual(len(store.get_tasks()), 2)
+
+
+class CancellationTests(SchedulerTestCase):
+
+    def test_cancelled_tasks_are_skipped(self):
+        tasks = [RecordingTask(i % 100 + 1) for i in range(1000)]
+        handles = [self.scheduler.add_task(task, self.plugin) for task in tasks]
+        for handle in handles[::3]:
+            handle.cancel()
+        self.clock.run(200)
+
+        for i, (task, handle) in enumerate(zip(tasks, handles)):
+            self.assertEqual(handle.cancelled, i % 3 == 0)
+            self.assertEqual(len(task.started), 0 if i % 3 == 0 else 1)
+        self.assertEqual(self.scheduler.tasks, [])
+
+    def test_cancelled_recurring_task_stops(self):
+        task = RecordingTask(1)
+        handle = self.scheduler.add_task(task, self.plugin, FixedRateSchedule(1))
+        self.clock.run(5.5)
+        handle.cancel()
+        self.clock.run(10)
+
+        self.assertEqual(len(task.started), 5)
+
+    def test_removing_plugin_only_cancels_its_tasks(self):
+        other = FakePlugin("other")
+        removed = [RecordingTask(10) for _ in range(100)]
+        kept = [RecordingTask(10) for _ in range(100)]
+        for task in removed:
+            self.scheduler.add_task(task, self.plugin, FixedRateSchedule(10))
+        for task in kept:
+            self.scheduler.add_task(task, other)
+        self.scheduler.remove_tasks_for_plugin(self.plugin)
+        self.clock.run(30)
+
+        self.assertTrue(all(not task.started for task in removed))
+        self.assertTrue(all(len(task.started) == 1 for task in kept))
+
+
+if __name__ == "__main__":
+    unittest.main()